@@ -1,23 +1,21 @@
-# Import the 'os' module to access environment variables and interact with the operating system
-import os  
+# Import the 'os' and 'sys' modules to work with file paths and the module search path
+import os
+import sys
 
 # Import AssistantAgent and UserProxyAgent classes from AutoGen for AI agent interactions
 from autogen import AssistantAgent, UserProxyAgent  
 
-# Import 'load_dotenv' to load environment variables from a .env file
-from dotenv import load_dotenv  
+# Add the repository root to the module search path so the shared helpers can be imported
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Load environment variables from the .env file into the program's environment
-load_dotenv()  
+# Import the shared LLM configuration (loads the .env file and reuses one HTTP connection pool)
+from shared.llm_client import get_llm_config
 
-# Specify the model name to be used for the LLM (here, a smaller, faster GPT-4 variant)
-model = "gpt-4o-mini"  
+# Import the sandbox pool: warm worker processes that run code blocks with their own folder and resource limits
+from shared.sandbox_pool import PooledCodeExecutor, get_sandbox_pool
 
-# Define the LLM configuration, including model and API key from environment variables
-llm_config = {
-    "model": model,
-    "api_key": os.environ.get("OPENAI_API_KEY"),  # Retrieve API key securely from environment
-}
+# Define the LLM configuration (gpt-4o-mini, a smaller, faster GPT-4 variant, with the API key from the environment)
+llm_config = get_llm_config()
 
 # Create an AssistantAgent instance
 # - name: Identifier for the assistant agent
@@ -31,15 +29,14 @@ assistant = AssistantAgent(
 # - name: Identifier for the user proxy agent
 # - llm_config: Same model configuration
 # - code_execution_config: Settings for running AI-generated code
-#   - workd_dir: Directory for storing executed code files (note: possible typo, should be 'work_dir')
-#   - use_docker: Whether to run code in Docker container (False = run locally)
+#   - executor: Run code blocks in the shared sandbox pool; this conversation gets its own
+#     scratch folder (under .cache/sandboxes) and CPU/memory/time limits per block
 # - human_input_mode: "NEVER" means it won't pause for human input
 user_proxy = UserProxyAgent(
     name="user_proxy",
     llm_config=llm_config,
     code_execution_config={
-        "work_dir": "code_execution", 
-        "use_docker": False,
+        "executor": PooledCodeExecutor(get_sandbox_pool()),
     },
     human_input_mode="NEVER",
 )
@@ -1,37 +1,38 @@
-# Import the os module to interact with environment variables and file paths
+# Import the os and sys modules to work with file paths and the module search path
 import os
+import sys
 
-# Import the ConversableAgent class from the autogen package to create an AI-powered conversational agent
-from autogen import ConversableAgent
+# Add the repository root to the module search path so the shared helpers can be imported
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Import the load_dotenv function from the dotenv package to load environment variables from a .env file
-from dotenv import load_dotenv
+# Import the shared LLM configuration (loads the .env file and reuses one HTTP connection pool)
+from shared.llm_client import get_llm_config
 
-# Load environment variables from the .env file into the system's environment
-load_dotenv()
+# Import the streaming agent: a ConversableAgent that can also hand out its reply token by token
+from shared.streaming import StreamingConversableAgent
 
-# Define the OpenAI model to be used for generating responses
-model = "gpt-4o-mini"
+# Create a configuration dictionary for the language model (gpt-4o-mini by default)
+# - temperature: set close to 1 so that the model is creative
+llm_config = get_llm_config(temperature=0.8)
 
-# Create a configuration dictionary for the language model
-llm_config = {
-    "model": model,  # Specify which model to use
-    "api_key": os.environ.get("OPENAI_API_KEY"),  # Retrieve the API key from environment variables
-    "temperature":0.8 #set temperature close to 1 so that the model is creative
-}
-
-# Initialize the ConversableAgent with its configuration
-agent = ConversableAgent(
+# Initialize the (streaming) ConversableAgent with its configuration
+agent = StreamingConversableAgent(
     name="chatbot",               # Name of the agent
     llm_config=llm_config,        # Language model configuration
     code_execution_config=False,  # Disable code execution capability
     human_input_mode="NEVER",     # The agent will not request manual human input
 )
 
-# Generate a reply from the agent based on a given user message
-response = agent.generate_reply(
+# Stream a reply from the agent based on a given user message
+# (agent.generate_reply(...) would return the same text, but only once the whole reply is finished)
+stream = agent.stream_reply(
     messages=[{"role": "user", "content": "Tell me a funny joke."}]
 )
 
-# Print the generated response to the console
-print(response)
+# Print each piece of the response as soon as it arrives
+for text in stream:
+    print(text, end="", flush=True)
+print()
+
+# Print how quickly the first token arrived and how fast the rest followed
+print(stream.metrics)
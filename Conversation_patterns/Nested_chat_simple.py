@@ -1,15 +1,20 @@
 # Import required Python modules
-import os  # For accessing environment variables like the API key
+import os  # For building the path to the repository root
+import sys  # For adding the repository root to the module search path
 from autogen import AssistantAgent, UserProxyAgent  # Import agent classes from AutoGen
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Make the shared helpers importable
+from shared.llm_client import get_llm_config  # Shared LLM configuration with one pooled HTTP client
+from shared.sandbox_pool import PooledCodeExecutor, get_sandbox_pool  # Warm, resource-limited code workers
+from shared.async_nested import register_async_nested_chats  # Concurrent, speculative nested chats
+from shared.termination import TerminationRules, contains  # None-safe termination rules
+
 # ------------------------------------
 # Define LLM (Large Language Model) configuration
 # ------------------------------------
-llm_config = {
-    "model": "gpt-4o-mini",  # The OpenAI model to be used
-    "temperature": 0.4,  # Lower temperature = more focused and deterministic output
-    "api_key": os.environ["OPENAI_API_KEY"],  # Fetch API key from environment variables
-}
+# gpt-4o-mini with the API key from environment variables
+# Lower temperature = more focused and deterministic output
+llm_config = get_llm_config(temperature=0.4)
 
 # ------------------------------------
 # Create the "Writer" agent
@@ -30,12 +35,13 @@ writer = AssistantAgent(
 user_proxy = UserProxyAgent(
     name="User",  # Name of the proxy agent
     human_input_mode="NEVER",  # No human intervention; fully automated
-    is_termination_msg=lambda x: x.get("content", "").find("TERMINATE") >= 0,
-    # Lambda function to decide when the conversation should end
+    is_termination_msg=TerminationRules(contains("TERMINATE")),
+    # Ends the conversation when a message contains "TERMINATE" (messages without text are ignored)
     code_execution_config={
         "last_n_messages": 1,  # Only execute code from the most recent message
-        "work_dir": "my_code",  # Directory where code execution will take place
-        "use_docker": False,    # Whether to use Docker for isolation (disabled here)
+        # Run code in the shared sandbox pool: a private scratch folder for this conversation,
+        # CPU/memory/time limits per block, and no new Python start-up per block
+        "executor": PooledCodeExecutor(get_sandbox_pool()),
     },
 )
 
@@ -64,8 +70,12 @@ def reflection_message(recipient, messages, sender, config):
 # ------------------------------------
 # Register nested chat
 # This means when the 'writer' produces content, the 'critic' will automatically review it
+# - Nested chats in the list run concurrently (add more reviewers and they review at the same time)
+# - speculative=True starts the review as soon as the writer's message arrives, before the
+#   user proxy's other reply checks run; the proxy waits for it only when it needs the critique
 # ------------------------------------
-user_proxy.register_nested_chats(
+nested_reviews = register_async_nested_chats(
+    user_proxy,
     [
         {
             "recipient": critic,                # Who will receive the nested chat
@@ -75,6 +85,7 @@ user_proxy.register_nested_chats(
         }
     ],
     trigger=writer,  # Trigger the nested chat whenever 'writer' sends a message
+    speculative=True,  # Start reviewing immediately, join when the reply is needed
 )
 
 # ------------------------------------
@@ -92,3 +103,6 @@ res = user_proxy.initiate_chat(
     max_turns=2,       # Maximum 2 exchanges between user_proxy and writer
     summary_method="last_msg"  # Only summarize the last message for final output
 )
+
+# Show how many nested reviews ran and how many speculative starts were used
+print(nested_reviews.stats)
@@ -1,121 +1,177 @@
 # Import required modules
-import os                                      # For interacting with environment variables
+import os                                      # For building the path to the repository root
+import sys                                     # For adding the repository root to the module search path
 from autogen import ConversableAgent           # ConversableAgent: an AutoGen agent capable of chatting with other agents
 from typing import Annotated                   # Useful for type annotations (not directly used in this code)
-from dotenv import load_dotenv                 # To load environment variables from a .env file
 
-# Load environment variables from the .env file into the system environment
-load_dotenv()
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.llm_client import get_llm_config  # Shared LLM configuration (loads .env, pooled HTTP client)
+from shared.chat_dag import a_initiate_chat_dag, initiate_chat_dag  # Runs chats as a dependency graph instead of a strict sequence
+from shared.function_agent import FunctionAgent  # Agents that answer with a Python function instead of an LLM
 
-# Define the LLM model to be used
-model = "gpt-4o-mini"
-
-# LLM configuration dictionary
+# LLM configuration dictionary for gpt-4o-mini
 # temperature → Controls randomness in LLM output (0 = deterministic, 1 = highly creative)
-# api_key → Loaded securely from environment variables
-llm_config = {
-    "model": model,
-    "temperature": 0.0,
-    "api_key": os.environ["OPENAI_API_KEY"],  # Access the API key from environment variables
-}
+# api_key → Loaded securely from environment variables by the shared helper
+llm_config = get_llm_config(temperature=0.0)
 
 # ------------------------
 # Define Agents
 # ------------------------
 
-# Agent 1: Initial Agent
-# Always returns the exact text provided to it.
-initial_agent = ConversableAgent(
-    name="Initial_Agent",
-    system_message="You return me the text I give you.",
-    llm_config=llm_config,
-    human_input_mode="NEVER",   # Disables human intervention during the conversation
-)
+# Agents 2-4 do purely computable work, so they are FunctionAgents:
+# they answer with a Python function instead of an LLM call (instant and always exact).
 
 # Agent 2: Uppercase Agent
 # Converts the given text to uppercase.
-uppercase_agent = ConversableAgent(
-    name="Uppercase_Agent",
-    system_message="You convert the text I give you to uppercase.",
-    llm_config=llm_config,
-    human_input_mode="NEVER",
-)
+def to_uppercase(text: str) -> str:
+    return text.upper()
 
 # Agent 3: Word Count Agent
 # Counts the number of words in the given text.
-word_count_agent = ConversableAgent(
-    name="WordCount_Agent",
-    system_message="You count the number of words in the text I give you.",
-    llm_config=llm_config,
-    human_input_mode="NEVER",
-)
+def count_words(text: str) -> str:
+    return f"The text contains {len(text.split())} words."
 
 # Agent 4: Reverse Text Agent
-# Reverses the given text.
-reverse_text_agent = ConversableAgent(
-    name="ReverseText_Agent",
-    system_message="You reverse the sentence I sent you. For eg: if i semt you 'Hai you' then you need to sent me 'uoy iah'",
-    llm_config=llm_config,
-    human_input_mode="NEVER",
-)
-
-# Agent 5: Summarize Agent
-# Summarizes the given text.
-summarize_agent = ConversableAgent(
-    name="Summarize_Agent",
-    system_message="You summarize the text I give you.",
-    llm_config=llm_config,
-    human_input_mode="NEVER",
-)
+# Reverses the given text character by character. For eg: 'Hai you' becomes 'uoy iaH'
+def reverse_text(text: str) -> str:
+    return text[::-1]
+
+
+# Build the five agents of the pipeline
+# A function (instead of module-level agents) lets Sequential_chat_batch.py create and reuse
+# many independent copies of the pipeline in one process
+def build_agents():
+    # Agent 1: Initial Agent
+    # Always returns the exact text provided to it.
+    initial_agent = ConversableAgent(
+        name="Initial_Agent",
+        system_message="You return me the text I give you.",
+        llm_config=llm_config,
+        human_input_mode="NEVER",   # Disables human intervention during the conversation
+    )
+
+    uppercase_agent = FunctionAgent(
+        name="Uppercase_Agent",
+        function=to_uppercase,
+        description="Converts text to uppercase.",
+    )
+
+    word_count_agent = FunctionAgent(
+        name="WordCount_Agent",
+        function=count_words,
+        description="Counts the number of words in a text.",
+    )
+
+    reverse_text_agent = FunctionAgent(
+        name="ReverseText_Agent",
+        function=reverse_text,
+        description="Reverses a sentence character by character.",
+    )
+
+    # Agent 5: Summarize Agent
+    # Summarizes the given text.
+    summarize_agent = ConversableAgent(
+        name="Summarize_Agent",
+        system_message="You summarize the text I give you.",
+        llm_config=llm_config,
+        human_input_mode="NEVER",
+    )
+    return {
+        "initial": initial_agent,
+        "uppercase": uppercase_agent,
+        "word_count": word_count_agent,
+        "reverse": reverse_text_agent,
+        "summarize": summarize_agent,
+    }
+
 
 # ------------------------
 # Initiating Multiple Chats
 # ------------------------
 
-# Start a series of two-agent conversations using initiate_chats
+# The chats of the pipeline as a dependency graph for initiate_chat_dag
 # Each dictionary in the list defines:
+# - chat_id: Unique id of the chat
+# - prerequisites: Chats whose summaries this chat needs (they are passed as carryover)
 # - recipient: The agent to chat with
 # - message: The text sent to the agent
+# - carryover: Extra context for chats that do not depend on another chat
 # - max_turns: Maximum turns for the conversation
 # - summary_method: How to summarize the conversation ("last_msg" = use last message as summary)
-chat_results = initial_agent.initiate_chats(
-    [
+#
+# Chats 1 and 2 do not depend on each other, so they run at the same time:
+#   1 (uppercase) ──► 3 (reverse) ──► 4 (summarize)
+#   2 (word count) ─────────────────┘
+def build_chats(agents, text, silent=False):
+    return [
         {
-            "recipient": uppercase_agent,
-            "message": "This is a sample text document.",
+            "chat_id": 1,
+            "recipient": agents["uppercase"],
+            "message": text,
             "max_turns": 1,
             "summary_method": "last_msg",
+            "silent": silent,
         },
         {
-            "recipient": word_count_agent,
+            "chat_id": 2,
+            "recipient": agents["word_count"],
             "message": "count the number of words in the text",
+            "carryover": text,  # Counting words does not need the uppercase version
             "max_turns": 1,
             "summary_method": "last_msg",
+            "silent": silent,
         },
         {
-            "recipient": reverse_text_agent,
+            "chat_id": 3,
+            "prerequisites": [1],  # Reverse the uppercase text
+            "recipient": agents["reverse"],
             "message": "Reverse the sentence I sent you. For eg: if i semt you 'Hai you' then you need to sent me 'uoy iah'",
             "max_turns": 1,
             "summary_method": "last_msg",
+            "silent": silent,
         },
         {
-            "recipient": summarize_agent,
+            "chat_id": 4,
+            "prerequisites": [1, 2, 3],  # Summarize everything produced before
+            "recipient": agents["summarize"],
             "message": "summarize the text",
             "max_turns": 1,
             "summary_method": "last_msg",
+            "silent": silent,
         },
     ]
-)
 
-# ------------------------
-# Display Results
-# ------------------------
 
-# Print the summary of each chat in sequence
-print("First Chat Summary: ", chat_results[0].summary)   # Output from Uppercase Agent
-print('\n')
-print("Second Chat Summary: ", chat_results[1].summary)  # Output from Word Count Agent
-print('\n')
-print("Third Chat Summary: ", chat_results[2].summary)   # Output from Reverse Text Agent
-print('\n')
-print("Fourth Chat Summary: ", chat_results[3].summary)  # Output from Summarize Agent
+# Run the pipeline for one document without blocking the event loop
+# (used by Sequential_chat_batch.py to process many documents at once)
+# Returns the summary of every step, keyed by step name
+async def process(agents, text, silent=True):
+    chat_results = await a_initiate_chat_dag(agents["initial"], build_chats(agents, text, silent))
+    return {
+        "uppercase": chat_results[1].summary,
+        "word_count": chat_results[2].summary,
+        "reverse": chat_results[3].summary,
+        "summary": chat_results[4].summary,
+    }
+
+
+if __name__ == "__main__":
+    # The text document processed by the pipeline
+    text = "This is a sample text document."
+
+    # Start the two-agent conversations as a dependency graph using initiate_chat_dag
+    agents = build_agents()
+    chat_results = initiate_chat_dag(agents["initial"], build_chats(agents, text))
+
+    # ------------------------
+    # Display Results
+    # ------------------------
+
+    # Print the summary of each chat (results are keyed by chat_id)
+    print("First Chat Summary: ", chat_results[1].summary)   # Output from Uppercase Agent
+    print('\n')
+    print("Second Chat Summary: ", chat_results[2].summary)  # Output from Word Count Agent
+    print('\n')
+    print("Third Chat Summary: ", chat_results[3].summary)   # Output from Reverse Text Agent
+    print('\n')
+    print("Fourth Chat Summary: ", chat_results[4].summary)  # Output from Summarize Agent
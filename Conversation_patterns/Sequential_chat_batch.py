@@ -0,0 +1,46 @@
+# Run the Sequential_chat.py pipeline (uppercase → word count → reverse → summarize) over a whole corpus
+import argparse  # For the command line options
+import os  # For building the path to the repository root
+import sys  # For adding the repository root to the module search path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+# Bulk work yields to interactive conversations in the same process (see shared/llm_scheduler.py)
+os.environ.setdefault("LLM_PRIORITY", "batch")
+from Sequential_chat import build_agents, process  # The pipeline: a factory for its agents and one async run
+from shared.batch_runner import BatchRunner, read_items  # Bounded concurrency, rate limits, resumable JSONL output
+
+# Command line options
+# --input     : documents, one per line (plain text), or JSON lines such as {"id": "doc-1", "text": "..."}
+# --output    : results, one JSON line per document; running the same command again resumes the job
+# --rpm/--tpm : the account's requests and tokens per minute (leave some headroom for other jobs)
+parser = argparse.ArgumentParser(description="Process many documents with the Sequential_chat pipeline.")
+parser.add_argument("--input", required=True, help="Text file (one document per line) or .jsonl file")
+parser.add_argument("--output", default="sequential_results.jsonl", help="JSONL file the results are appended to")
+parser.add_argument("--concurrency", type=int, default=32, help="Documents processed at the same time")
+parser.add_argument("--rpm", type=float, default=None, help="Requests per minute allowed by the quota")
+parser.add_argument("--tpm", type=float, default=None, help="Tokens per minute allowed by the quota")
+parser.add_argument("--timeout", type=float, default=300, help="Seconds before a document is given up")
+parser.add_argument("--restart", action="store_true", help="Overwrite the output instead of resuming")
+args = parser.parse_args()
+
+# One runner for the whole job
+# - each document gets its own pooled set of five agents, reset and reused for the next document
+# - only the Summarize_Agent calls the LLM (the other steps are FunctionAgents): one request per document
+runner = BatchRunner(
+    build_agents,
+    process,
+    args.output,
+    concurrency=args.concurrency,
+    requests_per_minute=args.rpm,
+    tokens_per_minute=args.tpm,
+    requests_per_item=1,
+    tokens_per_item=300,  # First guess; the runner follows the tokens documents really use
+    item_timeout=args.timeout,
+    resume=not args.restart,
+)
+
+# Documents are read one line at a time and results are written as they finish
+stats = runner.run_batch(read_items(args.input))
+print("Batch:", stats)
+print("Agent pool:", runner.server.pool.stats)
@@ -1,24 +1,22 @@
 # Import required Python libraries
-import os                       # For interacting with the operating system (e.g., accessing environment variables)
+import os                       # For interacting with the operating system (e.g., building file paths)
+import sys                      # For adding the repository root to the module search path
 from autogen import ConversableAgent   # ConversableAgent is a type of AI agent in AutoGen that can have conversations with other agents
 import pprint                   # Pretty-printing of Python objects for better readability in console output
-from autogen import Cache
-from dotenv import load_dotenv  # To load environment variables from a .env file
 
-# Load environment variables from the .env file into the system environment
-load_dotenv()
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.llm_client import get_llm_config  # Shared LLM configuration (loads .env, pooled HTTP client)
+from shared.response_cache import get_response_cache  # Shared, size-capped response cache with hit/miss counters
+from shared.telemetry import start_telemetry  # Per-turn spans: LLM latency, tokens, cache hits
 
-# Define the model to use for LLM-based conversations
-model = "gpt-4o-mini"
+# Record where the time goes (start before the agents are created)
+# Set TELEMETRY_PATH=spans.jsonl to also write every span to a file
+telemetry = start_telemetry()
 
-# LLM (Large Language Model) configuration dictionary
+# LLM (Large Language Model) configuration dictionary for gpt-4o-mini
 # temperature → controls randomness (0 = deterministic, 1 = more creative)
-# api_key → pulled securely from environment variables
-llm_config = {
-    "model": model,
-    "temperature": 0.9,
-    "api_key": os.environ["OPENAI_API_KEY"],  # Read the API key from environment variables
-}
+# api_key → pulled securely from environment variables by the shared helper
+llm_config = get_llm_config(temperature=0.9)
 
 # Create the first agent: Traveler_Agent
 # This agent plays the role of a person planning a vacation
@@ -41,7 +39,10 @@ guide_agent = ConversableAgent(
 # summary_method → determines how the chat summary is generated
 # max_turns → limits the number of conversation turns
 
-with Cache.disk(cache_seed=42, cache_path_root=".cache") as cache: #Add cache so that agent can use it during multiple runs
+# Add cache so that agent can use it during multiple runs
+# The shared cache (.cache/responses.sqlite) is used by every pattern, is capped in size (LRU eviction)
+# and can be shared safely by several processes
+with get_response_cache() as cache:
     chat_result = traveler_agent.initiate_chat(
         guide_agent,
         message="What are the must-see attractions in Tokyo?",
@@ -66,3 +67,11 @@ pprint.pprint(chat_result.chat_history)
 # Display the cost of the conversation (tokens used × cost per token)
 print(" \n**Chat Cost**: \n")
 pprint.pprint(chat_result.cost)
+
+# Display how much the response cache helped (hits, misses, bytes saved, size)
+print(" \n**Cache Statistics**: \n")
+pprint.pprint(get_response_cache().stats())
+
+# Display where the time went: every turn and LLM call, slowest first
+print(" \n**Telemetry**: \n")
+print(telemetry.format_summary())
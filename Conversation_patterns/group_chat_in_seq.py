@@ -1,17 +1,21 @@
 import os
+import sys
 from autogen import ConversableAgent, GroupChat, GroupChatManager
-from dotenv import load_dotenv
+from autogen.agentchat.contrib.capabilities.transform_messages import TransformMessages  # Hooks transforms into agents
 
-# Load environment variables from the .env file (contains API keys, etc.)
-load_dotenv()
+# Make the shared helpers importable (the shared module also loads the .env file with the API key)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.llm_client import get_llm_config, get_prefix_stats  # Also reports prompt tokens served from the provider's prompt cache
+from shared.speaker_selection import DescriptionRouter  # Local, description-based speaker selection
+from shared.history_compaction import RollingHistoryCompactor  # Keeps each agent's history under a token budget
+from shared.telemetry import start_telemetry  # Per-turn spans: LLM calls, speaker selection, turns
 
-# Define the model and LLM configuration
-model = "gpt-4o-mini"
-llm_config = {
-    "model": model,                  # Model to use for conversation
-    "temperature": 0.4,               # Lower temperature = more deterministic responses
-    "api_key": os.environ["OPENAI_API_KEY"],  # Retrieve API key from environment
-}
+# Record where the time goes (start before the agents are created)
+# Set TELEMETRY_PATH=spans.jsonl to also write every span to a file
+telemetry = start_telemetry()
+
+# Define the LLM configuration (gpt-4o-mini, one pooled HTTP client shared by all six agents)
+llm_config = get_llm_config(temperature=0.4)  # Lower temperature = more deterministic responses
 
 # ===================================================
 # Group Chat in a Sequential Chat
@@ -63,6 +67,19 @@ weather_agent = ConversableAgent(
     description="Provides weather forecast.",
 )
 
+# --------------------------
+# Keep every agent's prompt under a token budget
+# --------------------------
+# Both group chats below share one manager, so the history (introductions, first plan, summary,
+# refinements) keeps growing. Before each reply an agent now keeps its latest 4 messages word for
+# word and folds older ones into a short summary, so no prompt exceeds ~2000 history tokens.
+# keep_first=2 pins the introductions and the task, and prefix_stable=True folds old turns in jumps,
+# so the system message + introductions + summary prefix stays identical for several turns and is
+# served from the provider's prompt cache (cached tokens are billed at a discount)
+history_compaction = TransformMessages(transforms=[RollingHistoryCompactor(max_tokens=2000, keep_recent=4, keep_first=2, prefix_stable=True)])
+for agent in [flight_agent, hotel_agent, activity_agent, restaurant_agent, weather_agent]:
+    history_compaction.add_to_agent(agent)
+
 # --------------------------
 # Create a Group Chat with introduction messages
 # --------------------------
@@ -71,6 +88,7 @@ group_chat_with_introductions = GroupChat(
     messages=[],                # No prior messages at start
     max_round=6,                 # Maximum conversation rounds allowed
     send_introductions=True,     # Send each agent’s introduction message at the start
+    speaker_selection_method=DescriptionRouter(),  # Pick speakers from their descriptions; LLM only when unsure
 )
 
 # --------------------------
@@ -117,3 +135,13 @@ chat_result = travel_planner_agent.initiate_chats(
 # --------------------------
 for result in chat_result:
     print(result.cost)
+
+# --------------------------
+# Print where the time went: speaker selection, each agent's turns and LLM calls, slowest first
+# --------------------------
+print(telemetry.format_summary())
+
+# --------------------------
+# Print how much of every prompt came from the provider's prompt-prefix cache
+# --------------------------
+print(get_prefix_stats().stats())
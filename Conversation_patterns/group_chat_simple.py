@@ -1,23 +1,18 @@
 # Import required modules
-import os                                                 # For interacting with environment variables
+import os                                                 # For building the path to the repository root
+import sys                                                # For adding the repository root to the module search path
 from autogen import ConversableAgent, GroupChat, GroupChatManager  # AutoGen classes for multi-agent conversations
-from dotenv import load_dotenv                            # To load environment variables from a .env file
 
-# Load environment variables from the .env file into the environment
-load_dotenv()
-
-# Define the LLM model to be used
-model = "gpt-4o-mini"
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.llm_client import get_llm_config              # Shared LLM configuration (loads .env, pooled HTTP client)
+from shared.speaker_selection import DescriptionRouter     # Picks the next speaker from agent descriptions, without an LLM call
 
 # LLM configuration dictionary
-# - model: The chosen LLM model
+# - model: gpt-4o-mini (the shared default)
 # - temperature: Controls creativity in output (0 = deterministic, 1 = highly creative)
 # - api_key: Securely loaded from environment variables
-llm_config = {
-    "model": model,
-    "temperature": 0.9,
-    "api_key": os.environ["OPENAI_API_KEY"],  # Retrieves OpenAI API key from system environment
-}
+# - http_client: One keep-alive connection pool shared by the five agents and the manager
+llm_config = get_llm_config(temperature=0.9)
 
 # ------------------------
 # Define Individual Agents
@@ -72,6 +67,9 @@ group_chat = GroupChat(
     agents=[flight_agent, hotel_agent, activity_agent, restaurant_agent, weather_agent],  # List of agents
     messages=[],       # Starting with no messages
     max_round=6,       # Maximum number of conversation rounds allowed
+    # Choose the next speaker by matching the last message against each agent's description;
+    # the manager only asks the LLM when no agent is a clear match
+    speaker_selection_method=DescriptionRouter(),
 )
 
 # Create a GroupChatManager to control the conversation flow among agents
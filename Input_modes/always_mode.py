@@ -1,20 +1,17 @@
 # Import necessary libraries
-import os  # For accessing environment variables
+import asyncio  # For running the conversation without blocking on input()
+import os  # For building the path to the repository root
+import sys  # For adding the repository root to the module search path
 from autogen import ConversableAgent  # For creating conversational AI agents
-from dotenv import load_dotenv  # For loading environment variables from a .env file
 
-# Load environment variables from .env into system environment
-load_dotenv()
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.llm_client import get_llm_config  # Shared LLM configuration (loads .env, pooled HTTP client)
+from shared.termination import TerminationRules, contains  # None-safe termination rules
+from shared.human_gateway import HumanGatewayAgent, HumanInputGateway, StdinTransport  # Non-blocking human input
 
-# Define the LLM (Large Language Model) to use
-model = "gpt-4o-mini"
-
-# Configuration for the LLM
-# Includes the model name and the API key stored in the environment variables
-llm_config = {
-    "model": model,
-    "api_key": os.environ.get("OPENAI_API_KEY"),  # Retrieve API key securely from .env
-}
+# Configuration for the LLM (Large Language Model)
+# Includes the model name (gpt-4o-mini) and the API key stored in the environment variables
+llm_config = get_llm_config()
 
 # Create the first agent: "agent_with_animal"
 # This agent has the animal "elephant" in mind and will respond with hints if guessed incorrectly
@@ -25,22 +22,35 @@ agent_with_animal = ConversableAgent(
         "and I will try to guess it. If I guess incorrectly, give me a hint. "
     ),
     llm_config=llm_config,  # Pass the model configuration
-    is_termination_msg=lambda msg: "elephant" in msg["content"],  # Stop conversation if 'elephant' is guessed
+    is_termination_msg=TerminationRules(contains("elephant")),  # Stop if 'elephant' is guessed (also safe for empty replies)
     human_input_mode="NEVER",  # Do not ask for manual/human input for this agent
 )
 
+# Human input goes through a gateway instead of a blocking input() call
+# The terminal transport prints each prompt and reads the answers on one background thread
+# If nobody answers within 5 minutes, "exit" ends the conversation
+gateway = HumanInputGateway(StdinTransport(), timeout=300, default_reply="exit")
+
 # Create the second agent: "human_proxy"
 # This acts as a bridge for actual human input (not an AI)
-human_proxy = ConversableAgent(
-    "human_proxy",  # Unique name for the human proxy
+human_proxy = HumanGatewayAgent(
+    "human_proxy",  # Unique name for the human proxy (also the session name shown with its prompts)
+    gateway=gateway,  # Ask the human through the shared gateway
     llm_config=False,  # No AI model — this agent will only take human input
     human_input_mode="ALWAYS",  # Always ask the user for input
 )
 
+
 # Start the conversation
 # human_proxy sends the first guess "Parrot" to agent_with_animal
 # The game will continue until the termination condition (guessing "elephant") is met
-result = human_proxy.initiate_chat(
-    agent_with_animal,
-    message="Parrot",
-)
+# While waiting for the human the conversation is suspended, so the same event loop
+# could run many such conversations at once (answer them as "<session>: text")
+async def main():
+    return await human_proxy.a_initiate_chat(
+        agent_with_animal,
+        message="Parrot",
+    )
+
+
+result = asyncio.run(main())
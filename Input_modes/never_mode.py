@@ -1,50 +1,68 @@
 # Importing necessary libraries
-import os  # For accessing environment variables
-from autogen import ConversableAgent # For creating AI agents that can converse
-from dotenv import load_dotenv  # For loading environment variables from a .env file
+import os  # For building the path to the repository root
+import sys  # For adding the repository root to the module search path
+from autogen import ConversableAgent  # For creating conversational AI agents
 
-# Load environment variables from the .env file into the system environment
-load_dotenv()
-
-# Define the model to be used for the agents
-model = "gpt-4o-mini"
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.llm_client import get_llm_config  # Shared LLM configuration (loads .env, pooled HTTP client)
+from shared.termination import TerminationRules, contains, register_early_termination  # None-safe termination rules that also stop streamed replies early
 
 # Configuration for the LLM (Large Language Model)
-# Includes the model name and API key from environment variables
-llm_config = {
-    "model": model,
-    "api_key": os.environ.get("OPENAI_API_KEY"),  # Retrieve API key from environment
-}
-
-# Create the first agent ("agent_with_animal")
-# This agent has an animal ("elephant") in mind and will give hints if guessed incorrectly
-agent_with_animal = ConversableAgent(
-    "agent_with_animal",  # Unique name for the agent
-    system_message=(
-        "You are thinking of an animal. You have the animal 'elephant' in your mind, "
-        "and I will try to guess it. If I guess incorrectly, give me a hint. "
-    ),
-    llm_config=llm_config,  # Pass the model configuration
-    is_termination_msg=lambda msg: "elephant" in msg["content"],  # End chat if 'elephant' is guessed
-    human_input_mode="NEVER",  # No manual/human input during the chat
-)
-
-# Create the second agent ("agent_guess_animal")
-# This agent will try to guess the animal in the other agent's mind using given hints
-agent_guess_animal = ConversableAgent(
-    "agent_guess_animal",  # Unique name for the agent
-    system_message=(
-        "I have an animal in my mind, and you will try to guess it. "
-        "If I give you a hint, use it to narrow down your guesses. "
-    ),
-    llm_config=llm_config,  # Pass the model configuration
-    human_input_mode="NEVER",  # No manual/human input during the chat
-)
-
-# Start the conversation
-# 'agent_with_animal' starts by challenging 'agent_guess_animal' to guess the animal
-agent_with_animal.initiate_chat(
-    agent_guess_animal,
-    message="I am thinking of an animal. Guess which one!",
-)
+# Includes the model name (gpt-4o-mini) and the API key stored in the environment variables
+llm_config = get_llm_config()
+
+# Build both agents of the game
+# A function (instead of module-level agents) lets never_mode_server.py create and reuse
+# many independent copies of the game in one process
+def build_agents():
+    # Create the first agent ("agent_with_animal")
+    # This agent has an animal ("elephant") in mind and will give hints if guessed incorrectly
+    agent_with_animal = ConversableAgent(
+        "agent_with_animal",  # Unique name for the agent
+        system_message=(
+            "You are thinking of an animal. You have the animal 'elephant' in your mind, "
+            "and I will try to guess it. If I guess incorrectly, give me a hint. "
+        ),
+        llm_config=llm_config,  # Pass the model configuration
+        is_termination_msg=TerminationRules(contains("elephant")),  # End chat if 'elephant' is guessed (None-safe)
+        human_input_mode="NEVER",  # No manual/human input during the chat
+    )
+
+    # Create the second agent ("agent_guess_animal")
+    # This agent will try to guess the animal in the other agent's mind using given hints
+    agent_guess_animal = ConversableAgent(
+        "agent_guess_animal",  # Unique name for the agent
+        system_message=(
+            "I have an animal in my mind, and you will try to guess it. "
+            "If I give you a hint, use it to narrow down your guesses. "
+        ),
+        llm_config=llm_config,  # Pass the model configuration
+        human_input_mode="NEVER",  # No manual/human input during the chat
+    )
+
+    # Stream the guesser's replies and stop generating as soon as "elephant" appears
+    # (the rules come from agent_with_animal, the agent the guesses are sent to)
+    register_early_termination(agent_guess_animal)
+    return agent_with_animal, agent_guess_animal
+
+
+# Opening message of every game
+OPENING_MESSAGE = "I am thinking of an animal. Guess which one!"
+
+
+# Play one game with a pair of agents from build_agents() without blocking the event loop
+# (used by never_mode_server.py to run many games at once)
+async def play(agents, message=OPENING_MESSAGE, silent=True):
+    agent_with_animal, agent_guess_animal = agents
+    return await agent_with_animal.a_initiate_chat(agent_guess_animal, message=message, silent=silent)
+
+
+if __name__ == "__main__":
+    agent_with_animal, agent_guess_animal = build_agents()
 
+    # Start the conversation
+    # 'agent_with_animal' starts by challenging 'agent_guess_animal' to guess the animal
+    agent_with_animal.initiate_chat(
+        agent_guess_animal,
+        message=OPENING_MESSAGE,
+    )
@@ -0,0 +1,49 @@
+# Serve many guessing games (never_mode.py) at once from one process
+import argparse  # For the command line options
+import asyncio  # Every game is an asyncio task
+import os  # For building the path to the repository root
+import sys  # For adding the repository root to the module search path
+import time  # For measuring throughput
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from never_mode import build_agents, play  # The game: a factory for its agents and one async game
+from shared.conversation_server import ConversationServer  # Pooled agents, concurrent sessions
+
+# Command line options
+# --sessions N : play N games concurrently and print the throughput (default)
+# --serve      : accept games as JSON lines on a local socket, e.g.
+#                echo '{"session": "alice", "inputs": {"message": "Guess my animal!"}}' | nc 127.0.0.1 8765
+parser = argparse.ArgumentParser(description="Run many never_mode guessing games concurrently.")
+parser.add_argument("--sessions", type=int, default=20, help="Number of games to play")
+parser.add_argument("--max-sessions", type=int, default=100, help="Games running at the same time")
+parser.add_argument("--timeout", type=float, default=300, help="Seconds before a game is cancelled")
+parser.add_argument("--serve", action="store_true", help="Serve games over a local socket instead")
+parser.add_argument("--port", type=int, default=8765, help="Port for --serve")
+args = parser.parse_args()
+
+# One server for the whole process
+# - build_agents creates a pair of agents when the pool has no idle pair
+# - finished pairs are reset (history, counters) and reused by the next game
+server = ConversationServer(build_agents, play, max_sessions=args.max_sessions, session_timeout=args.timeout)
+
+
+async def main():
+    if args.serve:
+        tcp = await server.start_tcp(port=args.port)
+        print(f"Serving guessing games on 127.0.0.1:{args.port}", flush=True)
+        async with tcp:
+            await tcp.serve_forever()
+        return
+    started = time.perf_counter()
+    results = await server.run_many([{} for _ in range(args.sessions)])
+    elapsed = time.perf_counter() - started
+    # Report every game, then the totals
+    for outcome in results:
+        print(outcome.as_dict())
+    print(f"{len(results)} games in {elapsed:.2f} s ({len(results) / elapsed:.1f} games/s)")
+    print("Server:", server.stats)
+    print("Agent pool:", server.pool.stats)
+
+
+asyncio.run(main())
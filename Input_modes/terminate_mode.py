@@ -1,33 +1,34 @@
 # Import required libraries
-import os  # For accessing environment variables
+import asyncio  # For running the conversation without blocking on input()
+import os  # For building the path to the repository root
+import sys  # For adding the repository root to the module search path
 
-from dotenv import load_dotenv  # For loading API keys and settings from a .env file
 from autogen import ConversableAgent  # For creating conversational AI agents
 
-# Load environment variables from .env into the system's environment variables
-load_dotenv()
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.llm_client import get_llm_config  # Shared LLM configuration (loads .env, pooled HTTP client)
+from shared.termination import TerminationRules, contains, register_early_termination  # None-safe termination rules that also stop streamed replies early
+from shared.human_gateway import HumanGatewayAgent, HumanInputGateway, StdinTransport  # Non-blocking human input
 
-# Define the LLM (Large Language Model) to use
-model = "gpt-4o-mini"
+# Configuration for the LLM (gpt-4o-mini, API key from environment variables)
+llm_config = get_llm_config(temperature=0.9)  # Controls randomness (higher = more creative responses)
 
-# Configuration for the LLM
-llm_config = {
-    "model": model,  # Model name
-    "temperature": 0.9,  # Controls randomness (higher = more creative responses)
-    "api_key": os.environ["OPENAI_API_KEY"],  # Get API key from environment variables
-}
+# Human input goes through a gateway instead of a blocking input() call
+# If nobody answers within 5 minutes, the empty default reply lets the chat end as it would on Enter
+gateway = HumanInputGateway(StdinTransport(), timeout=300, default_reply="")
 
 # Create the first agent: "agent_with_animal"
 # This agent has the animal "elephant" in mind and will give hints until guessed
-agent_with_animal = ConversableAgent(
+agent_with_animal = HumanGatewayAgent(
     "agent_with_animal",  # Unique identifier for this agent
+    gateway=gateway,  # Ask the human through the shared gateway
     system_message=(
         "You are thinking of an animal. You have the animal 'elephant' in your mind, "
         "and I will try to guess it. If I guess incorrectly, give me a hint. "
     ),
     llm_config=llm_config,  # Pass model configuration
     max_consecutive_auto_reply=1,  # Max consecutive AI replies before asking for human input
-    is_termination_msg=lambda msg: "elephant" in msg["content"],  # Stop if 'elephant' is guessed
+    is_termination_msg=TerminationRules(contains("elephant")),  # Stop if 'elephant' is guessed (None-safe)
     human_input_mode="TERMINATE",  # Continue asking for human input until termination condition is met
 )
 
@@ -43,9 +44,17 @@ agent_guess_animal = ConversableAgent(
     human_input_mode="NEVER",  # This agent never takes human input — fully automated
 )
 
+# Stream the guesser's replies and stop generating as soon as "elephant" appears
+register_early_termination(agent_guess_animal)
+
 # Start a new conversation between both agents
 # Note: The comment in the code reminds you to clear previous chat history/cache before starting
-result = agent_with_animal.initiate_chat(
-    agent_guess_animal,
-    message="I am thinking of an animal. Guess which one!",
-)
+# The conversation is suspended (not blocked) while it waits for the human
+async def main():
+    return await agent_with_animal.a_initiate_chat(
+        agent_guess_animal,
+        message="I am thinking of an animal. Guess which one!",
+    )
+
+
+result = asyncio.run(main())
@@ -1,25 +1,24 @@
 # Import necessary libraries
-import os  # For accessing environment variables and OS-related functionality
+import os  # For building the path to the repository root
+import sys  # For adding the repository root to the module search path
 from autogen import ConversableAgent  # Core class from AutoGen to create conversational AI agents
 from typing import Annotated  # For adding metadata/annotations to function parameters
-from dotenv import load_dotenv  # To load environment variables from a .env file
 
-# Load environment variables from the .env file into the OS environment
-load_dotenv()
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.llm_client import get_llm_config  # Shared LLM configuration (loads .env, pooled HTTP client)
+from shared.tool_cache import memoize_tool  # Caches results of pure tools (keeps the Annotated schema)
+from shared.termination import TerminationRules, contains, register_early_termination  # None-safe termination rules that also stop streamed replies early
 
-# Define the LLM model to be used
-model = "gpt-4o-mini"
-llm_config = {
-    "model": model,                  # The selected LLM model
-    "temperature": 0.0,              # Controls randomness (0.0 means deterministic output)
-    "api_key": os.environ["OPENAI_API_KEY"],  # Load API key from environment variable
-}
+# Define the LLM configuration (gpt-4o-mini, API key from environment variable)
+llm_config = get_llm_config(temperature=0.0)  # Controls randomness (0.0 means deterministic output)
 
 # ---------------------------
 # TOOL FUNCTIONS (Calculator)
 # ---------------------------
 
 # Function to add two integers with descriptive parameter annotations
+# The same numbers always give the same answer, so results are memoized
+@memoize_tool(maxsize=1024)
 def add_numbers(
     a: Annotated[int, "First number"],  # Annotated type hint for better documentation
     b: Annotated[int, "Second number"]  # Annotated type hint for better documentation
@@ -28,6 +27,7 @@ def add_numbers(
     return f"The sum of {a} and {b} is {a + b}."
 
 # Function to multiply two integers with descriptive parameter annotations
+@memoize_tool(maxsize=1024)
 def multiply_numbers(
     a: Annotated[int, "First number"],
     b: Annotated[int, "Second number"]
@@ -49,8 +49,8 @@ assistant = ConversableAgent(
 # Create a user proxy agent that acts as the "human" side of the conversation
 user_proxy = ConversableAgent(
     name="User",  # Agent's identity name
-    # Function to determine when the conversation should stop
-    is_termination_msg=lambda msg: msg.get("content") is not None and "TERMINATE" in msg["content"],
+    # Stop the conversation when a message contains "TERMINATE" (messages without text are ignored)
+    is_termination_msg=TerminationRules(contains("TERMINATE")),
     human_input_mode="NEVER",  # The user will not provide manual input; automation only
 )
 
@@ -66,6 +66,10 @@ assistant.register_for_llm(name="multiply_numbers", description="Multiply two nu
 user_proxy.register_for_execution(name="add_numbers")(add_numbers)
 user_proxy.register_for_execution(name="multiply_numbers")(multiply_numbers)
 
+# Stream the assistant's replies and stop generating as soon as "TERMINATE" appears
+# (the rules are taken from the user proxy, the agent the replies are sent to)
+register_early_termination(assistant)
+
 # ----------------------------------
 # CHAT INITIATION
 # ----------------------------------
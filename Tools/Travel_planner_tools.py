@@ -1,29 +1,35 @@
 # -----------------------------
 # IMPORT REQUIRED LIBRARIES
 # -----------------------------
-import os  # For accessing environment variables like API keys
+import os  # For building the path to the repository root
+import sys  # For adding the repository root to the module search path
 from autogen import ConversableAgent, AssistantAgent, UserProxyAgent  
 # ConversableAgent: general-purpose agent for conversation
 # AssistantAgent: specialized for LLM-powered tool suggestion
 # UserProxyAgent: specialized for acting as a human proxy to execute tools
 
 from typing import Annotated  # For adding descriptive metadata to function parameters
-from dotenv import load_dotenv  # For loading environment variables from a .env file
 
 # -----------------------------
-# LOAD ENVIRONMENT VARIABLES
+# LOAD SHARED HELPERS
 # -----------------------------
-load_dotenv()  # Reads .env file and makes variables accessible via os.environ
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.llm_client import get_llm_config  # Reads the .env file and provides the pooled LLM configuration
+from shared.tool_cache import memoize_tool  # In-memory LRU cache for pure tools
+from shared.travel_data import get_travel_store  # Indexed activity reference data
+from shared.termination import TerminationRules, contains, register_early_termination  # None-safe termination rules that also stop streamed replies early
 
 # -----------------------------
 # CONFIGURE LLM SETTINGS
 # -----------------------------
-model = "gpt-4o-mini"  # The AI model being used
-llm_config = {
-    "model": model,  # Model selection
-    "temperature": 0.9,  # Controls randomness; higher value = more creative
-    "api_key": os.environ["OPENAI_API_KEY"],  # Loads API key from environment
-}
+# gpt-4o-mini with the API key from the environment
+llm_config = get_llm_config(temperature=0.9)  # Controls randomness; higher value = more creative
+
+# -----------------------------
+# LOAD REFERENCE DATA
+# -----------------------------
+# Activities are bulk-loaded once from Tools/data/travel_reference.json and indexed by location
+travel_store = get_travel_store()
 
 # -----------------------------
 # TOOL FUNCTIONS
@@ -31,6 +37,8 @@ llm_config = {
 
 # Function to calculate travel time given distance and speed
 # Annotated helps provide LLM-friendly descriptions for each parameter
+# memoize_tool serves repeated calls with the same arguments from memory
+@memoize_tool(maxsize=1024)
 def calculate_travel_time(
     distance: Annotated[int, "Distance in kilometers"],
     speed: Annotated[int, "Speed in km/h"],
@@ -39,6 +47,7 @@ def calculate_travel_time(
     return f"At a speed of {speed} km/h, it will take approximately {travel_time:.2f} hours to travel {distance} kilometers."
 
 # Function to convert currency from USD to EUR
+@memoize_tool(maxsize=1024)
 def convert_currency(
     amount: Annotated[float, "Amount in USD"],
     rate: Annotated[float, "Exchange rate to EUR"],
@@ -46,15 +55,13 @@ def convert_currency(
     converted_amount = amount * rate
     return f"${amount} USD is approximately €{converted_amount:.2f} EUR."
 
-# Function to suggest activities for a location
+# Function to suggest activities for a location (cached for an hour)
+@memoize_tool(maxsize=256, ttl=3600)
 def suggest_activity(location: Annotated[str, "Location"]) -> str:
-    activities = {
-        "Paris": "Visit the Eiffel Tower and the Louvre Museum.",
-        "New York": "See Times Square and Central Park.",
-        "Tokyo": "Explore the Shibuya Crossing and the Senso-ji Temple.",
-    }
+    # Case-insensitive lookup that also tolerates small typos ("tokio")
+    activity = travel_store.lookup("activities", location)
     # Return activity if location exists, else return fallback
-    return activities.get(location, f"No specific activities found for {location}.")
+    return activity or f"No specific activities found for {location}."
 
 # -----------------------------
 # CREATE ASSISTANT AGENT
@@ -71,7 +78,7 @@ assistant = AssistantAgent(
 user_proxy = ConversableAgent(
     name="User",  # Agent name
     # Function that decides when to end the conversation (looks for 'TERMINATE' in content)
-    is_termination_msg=lambda msg: msg.get("content") is not None and "TERMINATE" in msg["content"],
+    is_termination_msg=TerminationRules(contains("TERMINATE")),  # Stop when a message contains "TERMINATE" (None-safe)
     human_input_mode="TERMINATE",  # Waits for termination message, not manual user input
 )
 
@@ -102,6 +109,13 @@ user_proxy.register_for_execution(name="calculate_travel_time")(calculate_travel
 user_proxy.register_for_execution(name="convert_currency")(convert_currency)
 user_proxy.register_for_execution(name="suggest_activity")(suggest_activity)
 
+# -----------------------------
+# STOP GENERATING AFTER "TERMINATE"
+# -----------------------------
+# Stream the assistant's replies and close each request as soon as the user proxy's
+# termination rules fire, so no tokens are generated after the conversation has ended
+register_early_termination(assistant)
+
 # -----------------------------
 # START THE CONVERSATION
 # -----------------------------
@@ -1,26 +1,34 @@
 # -----------------------------
 # IMPORT REQUIRED LIBRARIES
 # -----------------------------
-import os  # For accessing environment variables from the operating system
+import os  # For building the path to the repository root
+import sys  # For adding the repository root to the module search path
 from autogen import ConversableAgent  # AutoGen's class for creating conversational AI agents
 from typing import Annotated  # To add metadata/description to type hints for better LLM context
-from dotenv import load_dotenv  # To load environment variables from a .env file
 
 # -----------------------------
-# LOAD ENVIRONMENT VARIABLES
+# LOAD SHARED HELPERS
 # -----------------------------
-# This loads variables from the .env file into the OS environment so we can use them in code
-load_dotenv()
+# The shared module also loads the .env file into the OS environment so we can use the API key
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.llm_client import get_llm_config
+from shared.parallel_tools import ParallelToolCalls  # Runs the tool calls of one message at the same time
+from shared.tool_cache import memoize_tool  # In-memory LRU/TTL cache for pure tools
+from shared.travel_data import get_travel_store  # Indexed flight/hotel/advice reference data
+from shared.termination import TerminationRules, contains, register_early_termination  # None-safe termination rules that also stop streamed replies early
 
 # -----------------------------
 # CONFIGURE LLM SETTINGS
 # -----------------------------
-model = "gpt-4o-mini"  # The AI model to be used
-llm_config = {
-    "model": model,  # Which model to use
-    "temperature": 0.0,  # 0.0 means deterministic, consistent responses
-    "api_key": os.environ["OPENAI_API_KEY"],  # Fetch API key from environment variables
-}
+# gpt-4o-mini with the API key from environment variables and one pooled HTTP client
+llm_config = get_llm_config(temperature=0.0)  # 0.0 means deterministic, consistent responses
+
+# -----------------------------
+# LOAD REFERENCE DATA
+# -----------------------------
+# Flights, hotels and travel advice are bulk-loaded once from Tools/data/travel_reference.json
+# and indexed, so every tool call is a dictionary lookup instead of building a new dict
+travel_store = get_travel_store()
 
 # -----------------------------
 # TOOL FUNCTIONS
@@ -30,30 +38,26 @@ llm_config = {
 # Annotated[str, "Flight number"] means the parameter must be a string,
 # and the annotation helps AutoGen describe this parameter to the LLM
 def get_flight_status(flight_number: Annotated[str, "Flight number"]) -> str:
-    # Dummy data simulating flight status lookups
-    dummy_data = {"AA123": "On time", "DL456": "Delayed", "UA789": "Cancelled"}
+    # "aa 123" and "AA-123" find AA123; flight codes are never fuzzy-matched (AA124 is another flight)
+    status = travel_store.lookup("flights", flight_number, fuzzy=False)
     # Return the status or 'unknown' if not found
-    return f"The current status of flight {flight_number} is {dummy_data.get(flight_number, 'unknown')}."
+    return f"The current status of flight {flight_number} is {status or 'unknown'}."
 
 # Function to get top hotel information for a location
+# Hotel info changes rarely, so results are cached in memory for an hour
+@memoize_tool(maxsize=256, ttl=3600)
 def get_hotel_info(location: Annotated[str, "Location"]) -> str:
-    dummy_data = {
-        "New York": "Top hotel in New York: The Plaza - 5 stars",
-        "Los Angeles": "Top hotel in Los Angeles: The Beverly Hills Hotel - 5 stars",
-        "Chicago": "Top hotel in Chicago: The Langham - 5 stars",
-    }
+    # Case-insensitive lookup that also tolerates small typos ("new yrok")
+    hotel = travel_store.lookup("hotels", location)
     # Return hotel info or fallback if no data found
-    return dummy_data.get(location, f"No hotels found in {location}.")
+    return hotel or f"No hotels found in {location}."
 
-# Function to get travel advice for a location
+# Function to get travel advice for a location (cached like hotel info)
+@memoize_tool(maxsize=256, ttl=3600)
 def get_travel_advice(location: Annotated[str, "Location"]) -> str:
-    dummy_data = {
-        "New York": "Travel advice for New York: Visit Central Park and Times Square.",
-        "Los Angeles": "Travel advice for Los Angeles: Check out Hollywood and Santa Monica Pier.",
-        "Chicago": "Travel advice for Chicago: Don't miss the Art Institute and Millennium Park.",
-    }
+    advice = travel_store.lookup("travel_advice", location)
     # Return travel advice or fallback if no advice found
-    return dummy_data.get(location, f"No travel advice available for {location}.")
+    return advice or f"No travel advice available for {location}."
 
 # -----------------------------
 # CREATE ASSISTANT AGENT
@@ -71,8 +75,7 @@ assistant = ConversableAgent(
 # Acts as the "executor" that actually runs the functions when the assistant requests them
 user_proxy = ConversableAgent(
     name="User",  # Agent name
-    is_termination_msg=lambda msg: msg.get("content") is not None
-    and "TERMINATE" in msg["content"],  # Condition to stop the conversation
+    is_termination_msg=TerminationRules(contains("TERMINATE")),  # Condition to stop the conversation (None-safe)
     human_input_mode="NEVER",  # No manual user input — fully automated execution
 )
 
@@ -103,6 +106,21 @@ user_proxy.register_for_execution(name="get_flight_status")(get_flight_status)
 user_proxy.register_for_execution(name="get_hotel_info")(get_hotel_info)
 user_proxy.register_for_execution(name="get_travel_advice")(get_travel_advice)
 
+# -----------------------------
+# RUN TOOL CALLS IN PARALLEL
+# -----------------------------
+# The request below needs hotel info AND a flight status, so the assistant asks for several tools
+# in one message. Run them concurrently (results keep the requested order) and give each tool
+# at most 10 seconds, so the turn takes as long as the slowest tool instead of the sum of all.
+ParallelToolCalls(max_workers=8, timeout=10).add_to_agent(user_proxy)
+
+# -----------------------------
+# STOP GENERATING AFTER "TERMINATE"
+# -----------------------------
+# Stream the assistant's replies and close each request as soon as the user proxy's
+# termination rules fire, so no tokens are generated after the conversation has ended
+register_early_termination(assistant)
+
 # -----------------------------
 # INITIATE CHAT
 # -----------------------------
@@ -0,0 +1,150 @@
+# -----------------------------
+# PER-PATTERN LATENCY BENCHMARK
+# -----------------------------
+# Runs each example script against the offline stub LLM server and reports
+# wall time, LLM turns, messages sent and framework overhead per turn.
+#
+# Usage:
+#     python benchmarks/run_patterns.py                   # all patterns, one run each
+#     python benchmarks/run_patterns.py --repeat 5        # median of five runs
+#     python benchmarks/run_patterns.py --only Tools      # patterns whose path contains "Tools"
+#     python benchmarks/run_patterns.py --latency 0.2 --json results.json
+#     python benchmarks/run_patterns.py --telemetry spans/     # per-turn spans, one JSONL file per script
+#     python benchmarks/run_patterns.py --launcher        # start each script through run.py (lazy imports)
+
+import argparse  # For the command line interface
+import json  # For writing machine readable results
+import os  # For paths and environment variables
+import statistics  # For the median of repeated runs
+import subprocess  # For running each example in its own Python process
+import sys  # For the current Python interpreter and module search path
+import tempfile  # For a scratch working directory per run
+import time  # For wall clock measurements
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(REPO_ROOT)
+from shared.stub_llm_server import ScriptedResponder, StubLLMServer  # Offline OpenAI-compatible server
+
+# Human input fed to scripts that ask for it ("exit" ends the conversation)
+HUMAN_INPUT = "exit\n" * 50
+
+# Each pattern: the script to run and the stub settings it needs to terminate.
+# The guessing games end when "elephant" appears, every other example ends on "TERMINATE".
+PATTERNS = [
+    {"script": "Basics/simple_conv_agent.py"},
+    {"script": "Basics/assistant_proxy_agent.py"},
+    {"script": "Conversation_patterns/Two_agent_chat.py"},
+    {"script": "Conversation_patterns/Sequential_chat.py"},
+    {"script": "Conversation_patterns/Nested_chat_simple.py"},
+    {"script": "Conversation_patterns/group_chat_simple.py"},
+    {"script": "Conversation_patterns/group_chat_in_seq.py"},
+    {"script": "Input_modes/always_mode.py", "final_reply": "elephant"},
+    {"script": "Input_modes/never_mode.py", "final_reply": "elephant"},
+    {"script": "Input_modes/terminate_mode.py", "final_reply": "elephant"},
+    {"script": "Tools/Simple_calculator_tool.py"},
+    {"script": "Tools/Travel_planner_tools.py"},
+    {"script": "Tools/Travel_tools.py"},
+    {"script": "code_executors/simple_code_executor.py"},
+]
+
+
+def measure_startup(env: dict, launcher: bool = False) -> float:
+    # Time to start Python and import the framework; subtracted from each run so that
+    # "overhead per turn" only counts work done during the conversation
+    imports = "import autogen, shared.llm_client"
+    if launcher:
+        imports = "from shared.lazy_imports import install_lazy_imports; install_lazy_imports(); " + imports
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", imports], cwd=REPO_ROOT, env=env, check=True, capture_output=True)
+    return time.perf_counter() - started
+
+
+def run_pattern(pattern: dict, latency: float, timeout: float, telemetry_dir: str | None = None, launcher: bool = False) -> dict:
+    """Run one script once against a fresh stub server and collect its numbers."""
+    responder = ScriptedResponder(final_after=pattern.get("final_after", 4), final_reply=pattern.get("final_reply", "TERMINATE"))
+    with StubLLMServer(responder=responder, latency=latency) as server, tempfile.TemporaryDirectory() as work_dir:
+        env = dict(os.environ, OPENAI_BASE_URL=server.base_url, OPENAI_API_KEY="sk-stub-benchmark", PYTHONPATH=REPO_ROOT)
+        if telemetry_dir:
+            # shared.llm_client starts span recording when TELEMETRY_PATH is set
+            name = pattern["script"].replace("/", "__").removesuffix(".py")
+            env["TELEMETRY_PATH"] = os.path.join(os.path.abspath(telemetry_dir), f"{name}.jsonl")
+        script = os.path.join(REPO_ROOT, pattern["script"])
+        command = [sys.executable, os.path.join(REPO_ROOT, "run.py"), script] if launcher else [sys.executable, script]
+        started = time.perf_counter()
+        # Run from a scratch directory so caches and generated code do not pollute the repository
+        try:
+            proc = subprocess.run(
+                command,
+                cwd=work_dir,
+                env=env,
+                input=HUMAN_INPUT,
+                capture_output=True,
+                text=True,
+                timeout=timeout,
+            )
+            returncode, error = proc.returncode, (proc.stderr.strip().splitlines() or [f"exit code {proc.returncode}"])[-1]
+        except subprocess.TimeoutExpired:
+            # A hung script fails its row instead of aborting the whole benchmark
+            returncode, error = None, f"timeout after {timeout:g} s"
+        wall = time.perf_counter() - started
+        stats = server.stats()
+    return {
+        "script": pattern["script"],
+        "ok": returncode == 0,
+        "wall_seconds": wall,
+        "turns": stats["requests"],
+        "messages": stats["messages"],
+        "tool_calls": stats["tool_calls"],
+        "server_seconds": stats["server_seconds"],
+        "error": error if returncode != 0 else "",
+    }
+
+
+def summarize(runs: list[dict], startup: float) -> dict:
+    # Median over repeats; overhead = time not spent starting Python or "waiting for the model"
+    result = dict(runs[0])
+    result["wall_seconds"] = statistics.median(r["wall_seconds"] for r in runs)
+    result["server_seconds"] = statistics.median(r["server_seconds"] for r in runs)
+    result["ok"] = all(r["ok"] for r in runs)
+    overhead = max(0.0, result["wall_seconds"] - startup - result["server_seconds"])
+    result["overhead_per_turn_ms"] = 1000 * overhead / result["turns"] if result["turns"] else 0.0
+    return result
+
+
+def print_table(results: list[dict], startup: float) -> None:
+    print(f"\nPython + framework startup: {startup * 1000:.0f} ms (excluded from overhead)\n")
+    header = f"{'Pattern':45} {'OK':3} {'Wall (s)':>9} {'Turns':>6} {'Msgs':>6} {'Tools':>6} {'Overhead/turn (ms)':>19}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['script']:45} {'✓' if r['ok'] else '✗':3} {r['wall_seconds']:9.2f} {r['turns']:6d} "
+            f"{r['messages']:6d} {r['tool_calls']:6d} {r['overhead_per_turn_ms']:19.1f}"
+        )
+        if r["error"]:
+            print(f"    error: {r['error']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark every conversation pattern against the offline stub LLM.")
+    parser.add_argument("--only", help="Run only patterns whose script path contains this text")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per pattern (the median is reported)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated model latency per request, in seconds")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds before a run is killed")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    parser.add_argument("--telemetry", help="Write per-turn spans of each script to a JSONL file in this folder")
+    parser.add_argument("--launcher", action="store_true", help="Start each script through run.py instead of plain python")
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    startup = measure_startup(env, args.launcher)
+    selected = [p for p in PATTERNS if not args.only or args.only in p["script"]]
+    results = [summarize([run_pattern(p, args.latency, args.timeout, args.telemetry, args.launcher) for _ in range(args.repeat)], startup) for p in selected]
+    print_table(results, startup)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"startup_seconds": startup, "latency": args.latency, "launcher": args.launcher, "results": results}, f, indent=2)
+
+    # Non-zero exit status when any script failed, so CI-like runs notice
+    sys.exit(0 if all(r["ok"] for r in results) else 1)
@@ -1,23 +1,21 @@
 # filename: plot_stock_prices.py
-import yfinance as yf
-import matplotlib.pyplot as plt
+from shared.market_data import download  # Local cache in front of yfinance (repository root on PYTHONPATH)
+from shared.chart_rendering import render_line_chart  # Headless (Agg) rendering with downsampling
 
 # Define the stock symbols and the date range
 stocks = ["META", "TSLA"]
 start_date = "2020-01-01"
 end_date = "2023-10-01"
 
-# Download the stock data
-data = yf.download(stocks, start=start_date, end=end_date)['Close']
+# Load the stock data (only dates that are not cached yet are downloaded)
+data = download(stocks, start=start_date, end=end_date)['Close']
 
-# Plotting the stock prices
-plt.figure(figsize=(14, 7))
-for stock in stocks:
-    plt.plot(data.index, data[stock], label=stock)
-
-plt.title('META and TESLA Stock Price Change')
-plt.xlabel('Date')
-plt.ylabel('Stock Price (USD)')
-plt.legend()
-plt.grid()
-plt.show()
\ No newline at end of file
+# Plot the stock prices to a file (no window, long series are downsampled)
+path = render_line_chart(
+    data,
+    "stock_prices.png",
+    title='META and TESLA Stock Price Change',
+    xlabel='Date',
+    ylabel='Stock Price (USD)',
+)
+print(f"Chart saved to {path}")
@@ -1,24 +1,41 @@
 # Importing necessary modules
 import os  # Provides functions to interact with the operating system (e.g., environment variables, file paths)
+import sys  # Gives access to the module search path
 from autogen import AssistantAgent, UserProxyAgent  # Classes from AutoGen library to create AI agents
-from dotenv import load_dotenv  # Utility to load environment variables from a `.env` file
 
-# Load environment variables from `.env` file into the system's environment
-load_dotenv()
+# Add the repository root to the module search path so the shared helpers can be imported
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(REPO_ROOT)
+from shared.llm_client import get_llm_config  # Loads the `.env` file and builds the pooled LLM configuration
+from shared.warm_kernel import WarmKernelCodeExecutor  # Keeps one Python process (imports + variables) alive between code blocks
+from shared.market_data import MARKET_DATA_PROMPT  # Tells the assistant to load prices through the local cache
+from shared.chart_rendering import CHART_PROMPT  # Tells the assistant to save charts to files instead of plt.show()
 
-# Define the model name to be used for the LLM
-model = "gpt-4o-mini"
-
-# Configuration dictionary for the LLM (Large Language Model)
-llm_config = {
-    "model": model,  # The LLM model to use
-    "api_key": os.environ.get("OPENAI_API_KEY"),  # Fetch API key from environment variables
-}
+# Configuration dictionary for the LLM (gpt-4o-mini, API key from environment variables)
+llm_config = get_llm_config()
 
 # Create an AI assistant agent with the given configuration
 assistant = AssistantAgent(
     name="Assistant",  # Name of the assistant agent
     llm_config=llm_config,  # LLM configuration (model, API key, etc.)
+    # The default instructions plus hints to use the local market-data cache and headless chart rendering
+    system_message="\n\n".join([AssistantAgent.DEFAULT_SYSTEM_MESSAGE, MARKET_DATA_PROMPT, CHART_PROMPT]),
+)
+
+# Create a persistent Python kernel for the generated code
+# - Every code block runs in the same process, so imports and variables are kept between retries
+# - yfinance, pandas and the chart/market-data helpers are imported in the background while the assistant writes its first block
+# - A block that runs longer than 60 seconds is interrupted; the kernel is restarted if it does not stop
+executor = WarmKernelCodeExecutor(
+    work_dir="codes",  # Directory where generated/executed code will be saved
+    timeout=60,  # Maximum seconds per code block
+    preload=["yfinance", "pandas", "shared.market_data", "shared.chart_rendering"],  # Heavy imports done once, up front
+    env={
+        # Put the repository root on PYTHONPATH so the generated code can import the shared helpers
+        "PYTHONPATH": os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get("PYTHONPATH")])),
+        # Non-interactive matplotlib backend: a stray plt.show() returns at once instead of blocking
+        "MPLBACKEND": "Agg",
+    },
 )
 
 # Create a user proxy agent that simulates human interaction with the assistant
@@ -26,8 +43,7 @@ user_proxy = UserProxyAgent(
     name="user",  # Name of the user proxy agent
     human_input_mode="ALWAYS",  # Always ask for user input when needed
     code_execution_config={  # Configuration for executing code
-        "work_dir": "codes",  # Directory where generated/executed code will be saved
-        "use_docker": False,  # Set to True to execute code inside a Docker container
+        "executor": executor,  # Run code in the warm kernel instead of a new Python process per block
     },
 )
 
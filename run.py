@@ -0,0 +1,148 @@
+# -----------------------------
+# LAUNCHER FOR EVERY EXAMPLE SCRIPT
+# -----------------------------
+# One entry point for all patterns in this repository. It starts them faster
+# than `python <script>` because optional heavy modules that AutoGen imports at
+# start-up (matplotlib and, through it, numpy and PIL) are only loaded when a
+# script really uses them (see shared/lazy_imports.py). The launcher itself
+# imports only the standard library, so `--list` and `--help` are instant.
+#
+# Usage:
+#     python run.py --list                              # Every pattern that can be launched
+#     python run.py two_agent_chat                      # By file name (case-insensitive, no .py needed)
+#     python run.py Input_modes/never_mode_server --sessions 200   # Arguments after the name go to the script
+#     python run.py --profile-imports group_chat_simple # Run it and print where start-up time went (--top N rows)
+#     python run.py --no-lazy Two_agent_chat            # Import everything eagerly, like `python <script>`
+
+import argparse  # For the launcher's own options
+import os  # For finding the example scripts
+import re  # For reading the -X importtime report
+import runpy  # For running a script as __main__
+import subprocess  # For profiling in a fresh interpreter
+import sys  # For the interpreter, argv and the module search path
+import time  # For the wall time of a profiled run
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Folders holding runnable examples
+PATTERN_DIRS = ["Basics", "Conversation_patterns", "Input_modes", "Tools", "code_executors"]
+
+# One line of `python -X importtime`: self and cumulative microseconds, then the indented module name
+_IMPORT_TIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$")
+
+
+def discover_patterns() -> list[str]:
+    """Repository-relative paths of every example script, without importing any of them."""
+    patterns = []
+    for folder in PATTERN_DIRS:
+        path = os.path.join(REPO_ROOT, folder)
+        if not os.path.isdir(path):
+            continue
+        for name in sorted(os.listdir(path), key=str.lower):
+            if name.endswith(".py") and not name.startswith("_"):
+                patterns.append(f"{folder}/{name}")
+    return patterns
+
+
+def resolve_pattern(name: str) -> str:
+    """Find the script meant by `name`: a path, a file name, or a unique beginning of one."""
+    if os.path.isfile(name):
+        return os.path.abspath(name)
+    wanted = name.replace("\\", "/").removesuffix(".py").lower()
+    patterns = discover_patterns()
+    stems = {p: p.removesuffix(".py").lower() for p in patterns}
+    # An exact folder/file match, then an exact file name, then a unique prefix of either
+    for matches in (
+        [p for p, stem in stems.items() if stem == wanted],
+        [p for p, stem in stems.items() if stem.split("/")[-1] == wanted],
+        [p for p, stem in stems.items() if stem.startswith(wanted) or stem.split("/")[-1].startswith(wanted)],
+    ):
+        if len(matches) == 1:
+            return os.path.join(REPO_ROOT, matches[0])
+        if len(matches) > 1:
+            raise SystemExit(f"'{name}' matches several patterns: {', '.join(matches)}")
+    raise SystemExit(f"No pattern called '{name}'. Use --list to see them all.")
+
+
+def run_pattern(script: str, script_args: list[str], lazy: bool) -> None:
+    # Make the script believe it was started as `python <script> <args>`
+    if REPO_ROOT not in sys.path:
+        sys.path.append(REPO_ROOT)
+    if lazy:
+        from shared.lazy_imports import install_lazy_imports  # Standard library only; cheap
+
+        install_lazy_imports()
+    sys.argv = [script, *script_args]
+    sys.path[0] = os.path.dirname(script)
+    runpy.run_path(script, run_name="__main__")
+
+
+def print_import_profile(lines: list[str], top: int, wall: float) -> None:
+    # Self time per module, summed per top-level package; cumulative time of the modules the script imported itself
+    self_us: dict[str, int] = {}
+    packages: dict[str, int] = {}
+    roots: dict[str, int] = {}
+    for line in lines:
+        match = _IMPORT_TIME.match(line)
+        if not match:
+            continue
+        own, cumulative, indent, module = int(match.group(1)), int(match.group(2)), match.group(3), match.group(4)
+        self_us[module] = self_us.get(module, 0) + own
+        package = module.split(".")[0]
+        packages[package] = packages.get(package, 0) + own
+        if len(indent) <= 1:
+            roots[module] = roots.get(module, 0) + cumulative
+    total = sum(self_us.values())
+
+    out = sys.stderr
+    print(f"\n==== Import-time profile: {total / 1000:.0f} ms in {len(self_us)} imports, {wall:.2f} s wall ====", file=out)
+    print(f"\n{'Package':32} {'Self (ms)':>10} {'Share':>7}", file=out)
+    for package, us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"{package:32} {us / 1000:10.1f} {us / total if total else 0:7.1%}", file=out)
+    print(f"\n{'Slowest modules':50} {'Self (ms)':>10}", file=out)
+    for module, us in sorted(self_us.items(), key=lambda item: -item[1])[:top]:
+        print(f"{module:50} {us / 1000:10.1f}", file=out)
+    print(f"\n{'Top-level imports':50} {'Cumulative (ms)':>16}", file=out)
+    for module, us in sorted(roots.items(), key=lambda item: -item[1])[:top]:
+        print(f"{module:50} {us / 1000:16.1f}", file=out)
+
+
+def profile_pattern(launcher_args: list[str], top: int) -> int:
+    # Run the same command in a fresh interpreter with -X importtime; its report goes to stderr,
+    # everything else the script writes there is passed through unchanged
+    command = [sys.executable, "-X", "importtime", os.path.abspath(__file__), *launcher_args]
+    started = time.perf_counter()
+    proc = subprocess.Popen(command, stderr=subprocess.PIPE, text=True, errors="replace")
+    report = []
+    for line in proc.stderr:
+        if line.startswith("import time:"):
+            report.append(line)
+        else:
+            sys.stderr.write(line)
+    returncode = proc.wait()
+    print_import_profile(report, top, time.perf_counter() - started)
+    return returncode
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Launch any example pattern of this repository.")
+    parser.add_argument("pattern", nargs="?", help="Script to run: a file name such as two_agent_chat, or folder/name")
+    parser.add_argument("script_args", nargs=argparse.REMAINDER, help="Arguments passed to the script")
+    parser.add_argument("--list", action="store_true", help="List every pattern and exit")
+    parser.add_argument("--no-lazy", action="store_true", help="Import optional heavy modules eagerly")
+    parser.add_argument("--profile-imports", action="store_true", help="Print where start-up time went after the run")
+    parser.add_argument("--top", type=int, default=15, help="Rows per table of the import profile")
+    args = parser.parse_args()
+
+    if args.list:
+        for pattern in discover_patterns():
+            print(pattern)
+        sys.exit(0)
+    if not args.pattern:
+        parser.error("name a pattern to run (see --list)")
+
+    script = resolve_pattern(args.pattern)
+    if args.profile_imports:
+        forwarded = (["--no-lazy"] if args.no_lazy else []) + [script, *args.script_args]
+        sys.exit(profile_pattern(forwarded, args.top))
+    run_pattern(script, args.script_args, lazy=not args.no_lazy)
@@ -0,0 +1,3 @@
+# Shared helpers used by the example scripts in this repository.
+# Each script adds the repository root to `sys.path` and imports from here, e.g.:
+#     from shared.llm_client import get_llm_config
@@ -0,0 +1,177 @@
+# -----------------------------
+# CONCURRENT AND SPECULATIVE NESTED CHATS
+# -----------------------------
+# `register_nested_chats` runs the nested chats of a trigger one after another,
+# and only when the agent gets to that reply function, so an agent with several
+# reviewers waits for the sum of all reviews on every turn.
+# `register_async_nested_chats` keeps the same chat_queue format but
+#   - runs the nested chats concurrently (a chat with "prerequisites" waits for
+#     those chats and receives their summaries, like the DAG runner in chat_dag.py)
+#   - with speculative=True, starts them the moment the trigger's message arrives,
+#     before the agent's other reply functions run (termination check, human
+#     input, ...), and only waits for them (the join point) when the nested-chat
+#     reply is actually needed. Batches that end up unused are counted as wasted
+#     and cancelled: a batch still queued never runs, but one that is already
+#     running finishes (and pays for) its LLM calls.
+# It works in both `initiate_chat` and `a_initiate_chat` conversations.
+#
+# Usage:
+#     register_async_nested_chats(
+#         user_proxy,
+#         [{"recipient": critic, "message": reflection_message, "max_turns": 1},
+#          {"recipient": seo_reviewer, "message": reflection_message, "max_turns": 1}],
+#         trigger=writer,
+#         speculative=True,
+#     )
+
+import asyncio  # Each batch of nested chats runs in its own event loop
+import contextvars  # Batches inherit the caller's context (e.g. the telemetry span that started them)
+from concurrent.futures import Future, ThreadPoolExecutor  # Background batches and the join point
+from typing import Any
+
+from autogen import Agent, ConversableAgent
+
+from shared.chat_dag import a_initiate_chat_dag  # Concurrent chats with optional prerequisites
+
+
+class AsyncNestedChats:
+    """Nested chats that run concurrently, optionally started speculatively. See `register_async_nested_chats`."""
+
+    def __init__(self, chat_queue: list[dict[str, Any]], speculative: bool = False, combine: str = "last", timeout: float | None = None, max_workers: int = 4):
+        if combine not in ("last", "all"):
+            raise ValueError("combine must be 'last' or 'all'.")
+        self.chat_queue = chat_queue
+        self.speculative = speculative
+        self.combine = combine
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="nested-chats")
+        self._pending: dict[tuple[int, int], tuple[dict, list[dict], Future]] = {}  # (agent, sender) -> (trigger message, chats, batch)
+        self.stats = {"launched": 0, "joined": 0, "speculative_hits": 0, "wasted": 0, "cancelled": 0}
+
+    # ---- running a batch ------------------------------------------------------------
+
+    def _chats_to_run(self, agent: ConversableAgent, messages: list[dict], sender: Agent, config: Any) -> list[dict]:
+        # Same preparation as AutoGen's nested chats: carryover config, callable messages, empty messages skipped
+        restore, original = ConversableAgent._process_chat_queue_carryover(self.chat_queue, agent, messages, sender, config)
+        chats = ConversableAgent._get_chats_to_run(self.chat_queue, agent, messages, sender, config)
+        if restore:
+            self.chat_queue[0]["message"] = original
+        if not any("chat_id" in chat for chat in chats):
+            for index, chat in enumerate(chats):
+                chat["chat_id"] = index
+        return chats
+
+    def _launch(self, agent: ConversableAgent, messages: list[dict], sender: Agent, config: Any) -> tuple[list[dict], Future | None]:
+        chats = self._chats_to_run(agent, messages, sender, config)
+        if not chats:
+            return chats, None
+        self.stats["launched"] += 1
+        return chats, self._pool.submit(contextvars.copy_context().run, self._run_batch, agent, chats)
+
+    def _run_batch(self, agent: ConversableAgent, chats: list[dict]) -> dict:
+        return asyncio.run(a_initiate_chat_dag(agent, chats))
+
+    def _discard(self, future: Future) -> None:
+        # An unused speculative batch. Only a batch still waiting for a worker can be cancelled;
+        # a running one cannot be stopped from outside its thread and runs to completion
+        self.stats["wasted"] += 1
+        if future.cancel():
+            self.stats["cancelled"] += 1
+
+    def _summary(self, chats: list[dict], results: dict) -> str | None:
+        if self.combine == "last":
+            return results[chats[-1]["chat_id"]].summary
+        return "\n\n".join(f"{chat['recipient'].name}: {results[chat['chat_id']].summary}" for chat in chats)
+
+    def _take_or_launch(self, agent: ConversableAgent, messages: list[dict] | None, sender: Agent, config: Any) -> tuple[list[dict], Future | None]:
+        if messages is None:
+            messages = agent._oai_messages[sender]
+        pending = self._pending.pop((id(agent), id(sender)), None)
+        if pending is not None:
+            trigger_message, chats, future = pending
+            if trigger_message is messages[-1]:
+                self.stats["speculative_hits"] += 1
+                return chats, future
+            self._discard(future)  # Started for a message that was answered differently
+        return self._launch(agent, messages, sender, config)
+
+    # ---- reply functions --------------------------------------------------------------
+
+    def launch_nested_chats(self, agent: ConversableAgent, messages: list[dict] | None = None, sender: Agent | None = None, config: Any = None) -> tuple[bool, None]:
+        """Speculative start: launch the batch in the background, then let the other reply functions run."""
+        if messages is None:
+            messages = agent._oai_messages[sender]
+        chats, future = self._launch(agent, messages, sender, config)
+        if future is not None:
+            previous = self._pending.pop((id(agent), id(sender)), None)
+            if previous is not None:
+                self._discard(previous[2])  # Never joined: the agent replied without it
+            self._pending[(id(agent), id(sender))] = (messages[-1], chats, future)
+        return False, None
+
+    def nested_chats_reply(self, agent: ConversableAgent, messages: list[dict] | None = None, sender: Agent | None = None, config: Any = None) -> tuple[bool, str | None]:
+        """Join point for sync conversations: wait for the batch and reply with its summary."""
+        chats, future = self._take_or_launch(agent, messages, sender, config)
+        if future is None:
+            return True, None
+        results = future.result(timeout=self.timeout)
+        self.stats["joined"] += 1
+        return True, self._summary(chats, results)
+
+    async def a_nested_chats_reply(self, agent: ConversableAgent, messages: list[dict] | None = None, sender: Agent | None = None, config: Any = None) -> tuple[bool, str | None]:
+        """Join point for async conversations: awaits the batch without blocking the event loop."""
+        chats, future = self._take_or_launch(agent, messages, sender, config)
+        if future is None:
+            return True, None
+        results = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        self.stats["joined"] += 1
+        return True, self._summary(chats, results)
+
+    def add_to_agent(self, agent: ConversableAgent, trigger, position: int = 2) -> None:
+        # Names matter: AutoGen skips `nested_chats_reply` in async chats because `a_nested_chats_reply` exists
+        def nested_chats_reply(recipient, messages=None, sender=None, config=None):
+            return self.nested_chats_reply(recipient, messages, sender, config)
+
+        async def a_nested_chats_reply(recipient, messages=None, sender=None, config=None):
+            return await self.a_nested_chats_reply(recipient, messages, sender, config)
+
+        def launch_nested_chats(recipient, messages=None, sender=None, config=None):
+            return self.launch_nested_chats(recipient, messages, sender, config)
+
+        agent.register_reply(trigger, nested_chats_reply, position)
+        agent.register_reply(trigger, a_nested_chats_reply, position, ignore_async_in_sync_chat=True)
+        if self.speculative:
+            # First in the list, so the batch starts before any other reply function runs
+            agent.register_reply(trigger, launch_nested_chats, 0)
+
+
+def register_async_nested_chats(
+    agent: ConversableAgent,
+    chat_queue: list[dict[str, Any]],
+    trigger,
+    speculative: bool = False,
+    combine: str = "last",
+    timeout: float | None = None,
+    position: int = 2,
+) -> AsyncNestedChats:
+    """Concurrent version of `agent.register_nested_chats(chat_queue, trigger=...)`.
+
+    Args:
+        agent: The agent that runs the nested chats and replies with their summary.
+        chat_queue: Same entries as for `register_nested_chats`. Chats run concurrently; add
+            "chat_id"/"prerequisites" to make one chat wait for (and receive the summaries of) others.
+        trigger: Same as for `register_nested_chats` (an agent, agent class, name, callable or list).
+        speculative: Start the nested chats as soon as a trigger message arrives, before the
+            agent's other reply functions run, and join them when the reply is needed.
+        combine: "last" replies with the summary of the last chat (AutoGen's behaviour);
+            "all" joins the summaries of every chat, prefixed with the recipient's name.
+        timeout: Seconds to wait at the join point (None = no limit).
+        position: Position of the join point among the agent's reply functions.
+
+    Returns the AsyncNestedChats object, whose `stats` count launched, joined, speculative, wasted and
+    cancelled batches. Wasted batches are cancelled, but a batch that is already running cannot be
+    stopped: it finishes its chats, and their LLM calls are still made and paid for.
+    """
+    nested = AsyncNestedChats(chat_queue, speculative=speculative, combine=combine, timeout=timeout)
+    nested.add_to_agent(agent, trigger, position)
+    return nested
@@ -0,0 +1,281 @@
+# -----------------------------
+# RATE-LIMITED BATCH RUNNER
+# -----------------------------
+# The example scripts process one hard-coded input. BatchRunner pushes a whole
+# corpus (tens of thousands of documents) through the same pipeline:
+#   - items are read lazily from a file or any iterator and results are streamed
+#     to a JSONL file as they finish, so neither is held in memory
+#   - a fixed number of items run at once, each with its own pooled team of agents
+#     (see conversation_server.py)
+#   - token buckets keep requests and tokens per minute under the account's quota,
+#     so a bulk job uses the whole quota without running into 429 errors
+#   - progress is resumable: items already written to the output file are skipped
+#     when the job is started again
+#
+# Usage:
+#     runner = BatchRunner(build_agents, process, "results.jsonl", concurrency=32,
+#                          requests_per_minute=500, tokens_per_minute=200_000)
+#     runner.run_batch(read_items("documents.jsonl"))
+#
+# See Conversation_patterns/Sequential_chat_batch.py for a complete example.
+
+import asyncio  # Items are asyncio sessions
+import json  # For the JSONL input and output
+import os  # For checking whether the output file exists
+import time  # For the token buckets and the progress report
+from typing import Any, Awaitable, Callable, Iterable, Iterator
+
+from autogen.agentchat.utils import gather_usage_summary  # Token usage of a team of agents
+
+from shared.conversation_server import ConversationServer, _agents  # Pooled teams, bounded concurrency
+
+# Errors worth trying again after a pause; anything else is written to the output as failed
+_RETRYABLE = ("RateLimitError", "APITimeoutError", "APIConnectionError", "InternalServerError", "TimeoutError")
+
+
+class TokenBucket:
+    """Allows `per_minute` units per minute, with bursts of up to `burst` units.
+
+    `acquire` waits until enough units are available; waiters are served in order.
+    `charge` corrects an earlier estimate afterwards (the level may become negative,
+    which delays the next acquisitions until the debt is paid back).
+    """
+
+    def __init__(self, per_minute: float, burst: float | None = None):
+        self.rate = per_minute / 60.0
+        self.capacity = burst or per_minute
+        self.level = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float) -> None:
+        amount = min(amount, self.capacity)  # A single item larger than a burst still gets through
+        async with self._lock:
+            self._refill()
+            while self.level < amount:
+                await asyncio.sleep((amount - self.level) / self.rate)
+                self._refill()
+            self.level -= amount
+
+    def charge(self, amount: float) -> None:
+        self._refill()
+        self.level -= amount
+
+    def drain(self) -> None:
+        """Empty the bucket, e.g. after the server answered 429."""
+        self._refill()
+        self.level = min(self.level, 0.0)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limits for whole items.
+
+    An item is admitted once both buckets have room for `requests_per_item` requests and
+    the estimated tokens of an item. After the item the estimate is corrected with the
+    tokens it really used, and the estimate for the next items follows the observed average.
+
+    Args:
+        requests_per_minute: Request quota (None = no limit).
+        tokens_per_minute: Token quota (None = no limit).
+        requests_per_item: LLM requests one item makes.
+        tokens_per_item: Initial token estimate per item.
+        burst_seconds: Bucket size in seconds of quota. Providers also enforce limits over
+            windows shorter than a minute, so a full minute's burst at start-up would be refused.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float | None = None,
+        tokens_per_minute: float | None = None,
+        requests_per_item: int = 1,
+        tokens_per_item: float = 1000,
+        burst_seconds: float = 10.0,
+    ):
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute * burst_seconds / 60) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute * burst_seconds / 60) if tokens_per_minute else None
+        self.requests_per_item = requests_per_item
+        self.tokens_per_item = float(tokens_per_item)
+
+    async def acquire(self) -> float:
+        """Wait until one more item may start; return the token estimate that was reserved."""
+        estimate = self.tokens_per_item
+        if self.requests is not None:
+            await self.requests.acquire(self.requests_per_item)
+        if self.tokens is not None:
+            await self.tokens.acquire(estimate)
+        return estimate
+
+    def record(self, estimate: float, tokens: int) -> None:
+        """Settle an item: charge the difference to the estimate and update the average."""
+        if self.tokens is not None:
+            self.tokens.charge(tokens - estimate)
+        self.tokens_per_item = 0.8 * self.tokens_per_item + 0.2 * tokens
+
+    def back_off(self) -> None:
+        # After a 429 every running item slows down, not only the one that was refused
+        for bucket in (self.requests, self.tokens):
+            if bucket is not None:
+                bucket.drain()
+
+
+def read_items(path: str, text_key: str = "text") -> Iterator[dict]:
+    """Yield items from a file, one per line, without reading the whole file.
+
+    `.jsonl` files hold one JSON object per line (its "id" is kept, otherwise the line
+    number is used); any other file holds one plain-text document per line, which
+    becomes {"id": <line number>, text_key: <line>}. Empty lines are skipped.
+    """
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            line = line.rstrip("\r\n")
+            if not line.strip():
+                continue
+            if path.endswith(".jsonl"):
+                item = json.loads(line)
+                item.setdefault("id", number)
+            else:
+                item = {"id": number, text_key: line}
+            yield item
+
+
+def completed_ids(output_path: str) -> set[str]:
+    """Ids of the items that already have a successful result in the output file."""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # A line cut short when the previous run was killed
+            if record.get("ok"):
+                done.add(str(record["id"]))
+    return done
+
+
+def _team_tokens(team: Any) -> int:
+    # Tokens the team sent to the API since its last reset (cached replies cost nothing)
+    usage = gather_usage_summary(_agents(team))["usage_excluding_cached_inference"]
+    return sum(data.get("total_tokens", 0) for model, data in usage.items() if model != "total_cost")
+
+
+class BatchRunner:
+    """Runs a conversation pipeline over many items with bounded concurrency and rate limits.
+
+    Args:
+        factory: Builds a fresh team of agents (see AgentPool).
+        run: `async def run(team, **inputs)` processes one item and returns a JSON-serializable result.
+            The inputs are the item without its "id".
+        output_path: JSONL file the results are appended to, one line per item:
+            {"id", "ok", "result" or "error", "tokens", "seconds", "attempts"}.
+        concurrency: Items processed at the same time.
+        requests_per_minute, tokens_per_minute, requests_per_item, tokens_per_item: See RateLimiter.
+        item_timeout: Seconds an item may take before it is cancelled (None = no limit).
+        max_retries: Extra attempts for items that failed with a rate-limit, timeout or connection error.
+        resume: Skip items that already have a successful line in `output_path`.
+        progress_every: Print a progress line every N items (0 = quiet).
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        run: Callable[..., Awaitable[Any]],
+        output_path: str,
+        concurrency: int = 16,
+        requests_per_minute: float | None = None,
+        tokens_per_minute: float | None = None,
+        requests_per_item: int = 1,
+        tokens_per_item: float = 1000,
+        item_timeout: float | None = None,
+        max_retries: int = 3,
+        resume: bool = True,
+        progress_every: int = 100,
+    ):
+        self.run = run
+        self.output_path = output_path
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.resume = resume
+        self.progress_every = progress_every
+        self.limiter = RateLimiter(requests_per_minute, tokens_per_minute, requests_per_item, tokens_per_item)
+        self.server = ConversationServer(factory, self._run_item, max_sessions=concurrency, session_timeout=item_timeout)
+        self.stats = {"done": 0, "failed": 0, "skipped": 0, "retries": 0, "tokens": 0, "seconds": 0.0}
+
+    async def _run_item(self, team: Any, **inputs: Any) -> tuple[Any, int]:
+        # Runs inside the server's session, before the team is reset and returned to the pool
+        result = await self.run(team, **inputs)
+        return result, _team_tokens(team)
+
+    async def _process(self, item: dict, output) -> None:
+        item_id = item.get("id")
+        inputs = {key: value for key, value in item.items() if key != "id"}
+        for attempt in range(1, self.max_retries + 2):
+            estimate = await self.limiter.acquire()
+            outcome = await self.server.run_session(str(item_id), **inputs)
+            if outcome.ok:
+                result, tokens = outcome.result
+                self.limiter.record(estimate, tokens)
+                record = {"id": item_id, "ok": True, "result": result, "tokens": tokens}
+                break
+            record = {"id": item_id, "ok": False, "error": outcome.error}
+            if attempt > self.max_retries or not outcome.error.startswith(_RETRYABLE):
+                break
+            self.stats["retries"] += 1
+            self.limiter.back_off()
+            await asyncio.sleep(min(60.0, 2.0**attempt))
+        record.update(seconds=round(outcome.seconds, 3), attempts=attempt)
+
+        # One complete line per item, flushed at once, so a killed job loses nothing it finished
+        output.write(json.dumps(record, default=str) + "\n")
+        output.flush()
+        self.stats["done" if record["ok"] else "failed"] += 1
+        self.stats["tokens"] += record.get("tokens", 0)
+        finished = self.stats["done"] + self.stats["failed"]
+        if self.progress_every and finished % self.progress_every == 0:
+            self._report(finished)
+
+    def _report(self, finished: int) -> None:
+        elapsed = time.perf_counter() - self._started
+        print(
+            f"[batch] {finished} items ({self.stats['failed']} failed, {self.stats['skipped']} skipped) "
+            f"in {elapsed:.1f} s: {finished / elapsed:.1f} items/s, {self.stats['tokens'] / elapsed * 60:,.0f} tokens/min",
+            flush=True,
+        )
+
+    async def a_run_batch(self, items: Iterable[dict]) -> dict:
+        """Process every item and return the stats. Results are in `output_path`."""
+        done = completed_ids(self.output_path) if self.resume else set()
+        # A short queue between the reader and the workers keeps memory flat for any corpus size
+        queue: asyncio.Queue = asyncio.Queue(maxsize=2 * self.concurrency)
+        self._started = time.perf_counter()
+
+        async def feed() -> None:
+            for item in items:
+                if str(item.get("id")) in done:
+                    self.stats["skipped"] += 1
+                    continue
+                await queue.put(item)
+            for _ in range(self.concurrency):
+                await queue.put(None)
+
+        async def work(output) -> None:
+            while (item := await queue.get()) is not None:
+                await self._process(item, output)
+
+        with open(self.output_path, "a" if self.resume else "w", encoding="utf-8") as output:
+            await asyncio.gather(feed(), *(work(output) for _ in range(self.concurrency)))
+        self.stats["seconds"] = round(time.perf_counter() - self._started, 3)
+        return self.stats
+
+    def run_batch(self, items: Iterable[dict]) -> dict:
+        """Synchronous wrapper around `a_run_batch` for scripts without an event loop."""
+        try:
+            return asyncio.run(self.a_run_batch(items))
+        finally:
+            self.server.close()
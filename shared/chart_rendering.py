@@ -0,0 +1,156 @@
+# -----------------------------
+# HEADLESS CHART RENDERING
+# -----------------------------
+# Agent-written plotting code usually ends with `plt.show()`, which blocks (or
+# does nothing) when the code runs inside an executor without a screen, and it
+# draws every raw data point even when a series has decades of daily prices.
+# This module renders charts straight to image files:
+#   - the non-interactive Agg backend (nothing ever opens a window)
+#   - PNG or SVG output, picked from the file extension, written to the work dir
+#   - LTTB (Largest-Triangle-Three-Buckets) downsampling, which keeps the visual
+#     shape of a long series with a few thousand points
+#   - `render_batch` draws many charts in one process, reusing one figure
+#
+# Usage (from code run by the code executor, with the repository root on PYTHONPATH):
+#     from shared.chart_rendering import render_line_chart
+#     render_line_chart(data, "stock_prices.png", title="META and TESLA", ylabel="USD")
+
+import os  # For output folders
+
+import matplotlib
+
+matplotlib.use("Agg")  # Render to files only; must happen before pyplot is imported anywhere
+
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+DEFAULT_MAX_POINTS = 2000  # Points kept per series; more than a chart can show at normal sizes
+
+# Instructions for an assistant whose code runs with the repository root on PYTHONPATH
+CHART_PROMPT = (
+    "Never call plt.show(); the code runs without a screen. Save charts to files instead:\n"
+    "    from shared.chart_rendering import render_line_chart\n"
+    '    render_line_chart(data, "chart.png", title="...", xlabel="Date", ylabel="Price (USD)")\n'
+    "`data` is a DataFrame (one line per column) or a dict of Series; long series are downsampled automatically."
+)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """Positions of the points LTTB keeps, always including the first and the last one."""
+    n = len(x)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # max_points - 2 buckets between the fixed first and last point
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = edges[i + 1], (edges[i + 2] if i + 2 < len(edges) else n)
+        # Keep the point that forms the largest triangle with the previously kept point
+        # and the average of the next bucket
+        avg_x, avg_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        area = np.abs((x[previous] - avg_x) * (y[start:end] - y[previous]) - (x[previous] - x[start:end]) * (avg_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
+
+
+def downsample(series: pd.Series, max_points: int = DEFAULT_MAX_POINTS) -> pd.Series:
+    """LTTB-downsample a Series (numeric or datetime index); missing values are dropped first."""
+    series = series.dropna()
+    if len(series) <= max_points:
+        return series
+    index = series.index
+    if isinstance(index, pd.DatetimeIndex):
+        x = index.asi8  # Nanoseconds, so gaps (weekends, holidays) keep their width
+    elif pd.api.types.is_numeric_dtype(index):
+        x = index.to_numpy()
+    else:
+        x = np.arange(len(series))
+    return series.iloc[lttb_indices(x, series.to_numpy(), max_points)]
+
+
+def _as_series(data) -> dict[str, pd.Series]:
+    if isinstance(data, pd.Series):
+        return {str(data.name or "value"): data}
+    if isinstance(data, pd.DataFrame):
+        return {str(column): data[column] for column in data.columns}
+    return {str(name): pd.Series(values) if not isinstance(values, pd.Series) else values for name, values in dict(data).items()}
+
+
+def _draw(figure: Figure, data, title: str = "", xlabel: str = "", ylabel: str = "", max_points: int = DEFAULT_MAX_POINTS, grid: bool = True) -> None:
+    axes = figure.add_subplot()
+    for name, series in _as_series(data).items():
+        points = downsample(series, max_points)
+        axes.plot(points.index, points.to_numpy(), label=name, linewidth=1)
+    axes.set_title(title)
+    axes.set_xlabel(xlabel)
+    axes.set_ylabel(ylabel)
+    if len(axes.lines) > 1:
+        axes.legend()
+    axes.grid(grid)
+
+
+def _save(figure: Figure, path: str, dpi: int) -> str:
+    folder = os.path.dirname(os.path.abspath(path))
+    os.makedirs(folder, exist_ok=True)
+    # Format comes from the extension (.png, .svg, .pdf)
+    figure.savefig(path, dpi=dpi, bbox_inches="tight")
+    return os.path.abspath(path)
+
+
+def render_line_chart(
+    data,
+    path: str,
+    title: str = "",
+    xlabel: str = "",
+    ylabel: str = "",
+    max_points: int = DEFAULT_MAX_POINTS,
+    figsize: tuple[float, float] = (14, 7),
+    dpi: int = 100,
+) -> str:
+    """Draw one line per column/series of `data` and save it to `path` (PNG/SVG by extension).
+
+    Returns the absolute path of the written file.
+    """
+    figure = Figure(figsize=figsize)
+    FigureCanvasAgg(figure)
+    _draw(figure, data, title, xlabel, ylabel, max_points)
+    return _save(figure, path, dpi)
+
+
+def render_batch(charts: list[dict], out_dir: str = ".", figsize: tuple[float, float] = (14, 7), dpi: int = 100) -> list[str]:
+    """Render many line charts in one go, reusing a single figure.
+
+    Each entry holds the keyword arguments of `render_line_chart` ("data", "path", "title", ...);
+    relative paths are placed in `out_dir`. Returns the written paths in order.
+    """
+    figure = Figure(figsize=figsize)
+    FigureCanvasAgg(figure)
+    written = []
+    for chart in charts:
+        chart = dict(chart)
+        path = os.path.join(out_dir, chart.pop("path"))
+        figure.clear()
+        figure.set_size_inches(chart.pop("figsize", figsize))
+        chart_dpi = chart.pop("dpi", dpi)
+        _draw(figure, chart.pop("data"), **chart)
+        written.append(_save(figure, path, chart_dpi))
+    return written
+
+
+def save_open_figures(out_dir: str = ".", prefix: str = "figure", fmt: str = "png", dpi: int = 100) -> list[str]:
+    """Headless stand-in for `plt.show()`: save every open pyplot figure to a file and close it."""
+    import matplotlib.pyplot as plt
+
+    written = []
+    for number in plt.get_fignums():
+        written.append(_save(plt.figure(number), os.path.join(out_dir, f"{prefix}_{number}.{fmt}"), dpi))
+    plt.close("all")
+    return written
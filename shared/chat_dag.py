@@ -0,0 +1,137 @@
+# -----------------------------
+# DEPENDENCY-AWARE (DAG) CHAT RUNNER
+# -----------------------------
+# `initiate_chats` runs a list of chats strictly one after another and passes the
+# summary of every finished chat to the next one. Many pipelines only need some of
+# those summaries. Here each chat declares the chats it depends on and every chat
+# starts as soon as its own prerequisites are done, so independent chats run
+# concurrently and the total time is the critical path, not the sum of all chats.
+#
+# Each entry accepts the same keys as `initiate_chats`, plus:
+#   - "chat_id": a unique id for the chat
+#   - "prerequisites": a list of chat ids whose summaries become this chat's carryover
+#
+# Usage:
+#     results = initiate_chat_dag(sender, [
+#         {"chat_id": 1, "recipient": a, "message": "..."},
+#         {"chat_id": 2, "recipient": b, "message": "...", "carryover": "..."},
+#         {"chat_id": 3, "recipient": c, "message": "...", "prerequisites": [1, 2]},
+#     ])
+#     print(results[3].summary)
+
+import asyncio  # For running independent chats concurrently
+import warnings  # For warning about agents used by two concurrent chats
+
+from autogen import ChatResult, ConversableAgent  # Agent class and the result type of a chat
+from autogen.agentchat.utils import consolidate_chat_info  # Same validation initiate_chats uses
+from autogen.events.agent_events import PostCarryoverProcessingEvent  # Same console output initiate_chats prints
+from autogen.io.base import IOStream  # Default output stream of AutoGen
+
+# Keys used by the DAG runner itself, not passed on to a_initiate_chat
+_DAG_KEYS = ("chat_id", "prerequisites", "sender", "recipient")
+
+
+def _check_dag(chat_queue: list[dict]) -> dict:
+    """Validate ids and prerequisites; return {chat_id: chat_info}. Raises ValueError on bad graphs."""
+    chat_book = {}
+    for chat_info in chat_queue:
+        if "chat_id" not in chat_info:
+            raise ValueError("Each chat must have a 'chat_id' for DAG execution.")
+        if chat_info["chat_id"] in chat_book:
+            raise ValueError(f"Duplicate chat_id {chat_info['chat_id']!r}.")
+        chat_book[chat_info["chat_id"]] = chat_info
+
+    for chat_id, chat_info in chat_book.items():
+        for pre_id in chat_info.get("prerequisites", []):
+            if pre_id not in chat_book:
+                raise ValueError(f"Chat {chat_id!r} depends on unknown chat {pre_id!r}.")
+
+    # Kahn's algorithm: if some chats can never become ready, there is a cycle
+    remaining = {chat_id: set(info.get("prerequisites", [])) for chat_id, info in chat_book.items()}
+    while remaining:
+        ready = [chat_id for chat_id, pres in remaining.items() if not pres]
+        if not ready:
+            raise ValueError(f"Circular prerequisites between chats {sorted(map(str, remaining))}.")
+        for chat_id in ready:
+            del remaining[chat_id]
+        for pres in remaining.values():
+            pres.difference_update(ready)
+    return chat_book
+
+
+def _ancestors(chat_id, chat_book: dict) -> set:
+    # All chats that must finish before `chat_id` starts
+    seen, stack = set(), list(chat_book[chat_id].get("prerequisites", []))
+    while stack:
+        pre_id = stack.pop()
+        if pre_id not in seen:
+            seen.add(pre_id)
+            stack.extend(chat_book[pre_id].get("prerequisites", []))
+    return seen
+
+
+def _warn_on_shared_recipients(chat_book: dict) -> None:
+    # Two chats with the same recipient that may run at the same time would share its history
+    ids = list(chat_book)
+    for i, first in enumerate(ids):
+        for second in ids[i + 1 :]:
+            if chat_book[first]["recipient"] is chat_book[second]["recipient"] and not (
+                first in _ancestors(second, chat_book) or second in _ancestors(first, chat_book)
+            ):
+                warnings.warn(
+                    f"Chats {first!r} and {second!r} use the same recipient and may run concurrently; "
+                    "add a prerequisite between them to keep their histories apart.",
+                    UserWarning,
+                )
+
+
+async def a_initiate_chat_dag(sender: ConversableAgent, chat_queue: list[dict]) -> dict:
+    """(async) Run chats as a dependency graph. Returns {chat_id: ChatResult}.
+
+    Args:
+        sender: The agent that starts every chat (an entry may override it with "sender").
+        chat_queue: The chats, as for `initiate_chats`, each with "chat_id" and optional "prerequisites".
+    """
+    chat_book = _check_dag(chat_queue)
+    for chat_info in chat_queue:
+        chat_info.setdefault("sender", sender)
+    consolidate_chat_info(chat_queue)
+    _warn_on_shared_recipients(chat_book)
+
+    tasks: dict = {}
+
+    async def run_chat(chat_id) -> ChatResult:
+        chat_info = chat_book[chat_id]
+        # Wait only for this chat's own prerequisites
+        pre_ids = list(chat_info.get("prerequisites", []))
+        pre_results = await asyncio.gather(*(tasks[pre_id] for pre_id in pre_ids))
+
+        # Carryover = the chat's own carryover + the summaries of its prerequisites, in declared order
+        carryover = chat_info.get("carryover", [])
+        if isinstance(carryover, str):
+            carryover = [carryover]
+        kwargs = {k: v for k, v in chat_info.items() if k not in _DAG_KEYS}
+        kwargs["carryover"] = carryover + [result.summary for result in pre_results]
+
+        if not kwargs.get("silent", False):
+            IOStream.get_default().send(PostCarryoverProcessingEvent(chat_info={**chat_info, **kwargs}))
+
+        result = await chat_info["sender"].a_initiate_chat(chat_info["recipient"], **kwargs)
+        result.chat_id = chat_id
+        return result
+
+    # Create every task up front; each one blocks only on its prerequisites
+    for chat_id in chat_book:
+        tasks[chat_id] = asyncio.ensure_future(run_chat(chat_id))
+    try:
+        await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        raise
+    return {chat_id: task.result() for chat_id, task in tasks.items()}
+
+
+def initiate_chat_dag(sender: ConversableAgent, chat_queue: list[dict]) -> dict:
+    """Synchronous wrapper around `a_initiate_chat_dag` for scripts without an event loop."""
+    return asyncio.run(a_initiate_chat_dag(sender, chat_queue))
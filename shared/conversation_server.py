@@ -0,0 +1,254 @@
+# -----------------------------
+# MULTI-SESSION CONVERSATION SERVER
+# -----------------------------
+# The example scripts build their agents at import time and run one
+# `initiate_chat`. To serve many users, ConversationServer hosts many concurrent
+# sessions of one pattern in a single asyncio process:
+#   - a pattern is a factory that builds a fresh team of agents and an async `run`
+#     function that plays one conversation with such a team
+#   - AgentPool keeps finished teams and resets them (history, counters, usage)
+#     instead of building new ConversableAgents for every session
+#   - each session leases its own team, so no two sessions share history
+#   - a limit on concurrent sessions, per-session timeouts, and a thread pool
+#     sized for the blocking LLM calls AutoGen makes from `a_initiate_chat`
+#   - `serve_tcp` accepts sessions as JSON lines over a local socket
+#
+# Usage:
+#     def build_team():
+#         return build_agents()                      # e.g. (agent_with_animal, agent_guess_animal)
+#
+#     async def play(team, message="Guess which one!"):
+#         host, guesser = team
+#         return await host.a_initiate_chat(guesser, message=message, silent=True)
+#
+#     server = ConversationServer(build_team, play, max_sessions=200)
+#     results = asyncio.run(server.run_many([{"message": "..."}] * 100))
+#
+# See Input_modes/never_mode_server.py for a complete example.
+
+import asyncio  # Sessions are asyncio tasks
+import itertools  # For session ids
+import json  # For the socket protocol
+import time  # For per-session timings
+from concurrent.futures import ThreadPoolExecutor  # For AutoGen's blocking LLM calls
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable
+
+from autogen import ConversableAgent
+
+
+def _agents(team: Any) -> list[ConversableAgent]:
+    # A team is one agent, a list/tuple of agents or a dict of agents
+    if isinstance(team, ConversableAgent):
+        return [team]
+    if isinstance(team, dict):
+        return [agent for agent in team.values() if isinstance(agent, ConversableAgent)]
+    return [agent for agent in team if isinstance(agent, ConversableAgent)]
+
+
+def reset_team(team: Any) -> None:
+    """Make a used team ready for the next session: histories, auto-reply counters, usage and human input."""
+    for agent in _agents(team):
+        agent.reset()
+        agent._human_input = []
+
+
+class AgentPool:
+    """Reusable teams of agents built by `factory`.
+
+    Args:
+        factory: Function without arguments that returns a new team (agent, tuple/list or dict of agents).
+        max_size: Most teams that can exist at once; `acquire` waits when all are leased (None = no limit).
+        reset: Function that cleans a returned team, `reset_team` by default.
+    """
+
+    def __init__(self, factory: Callable[[], Any], max_size: int | None = None, reset: Callable[[Any], None] = reset_team):
+        self.factory = factory
+        self.max_size = max_size
+        self.reset = reset
+        self._idle: list[Any] = []
+        self._slots = asyncio.Semaphore(max_size) if max_size else None
+        self.stats = {"created": 0, "reused": 0, "discarded": 0, "in_use": 0, "peak_in_use": 0}
+
+    def warm(self, count: int) -> None:
+        """Build `count` teams ahead of the first sessions."""
+        for _ in range(count):
+            self._idle.append(self.factory())
+            self.stats["created"] += 1
+
+    async def acquire(self) -> Any:
+        if self._slots is not None:
+            await self._slots.acquire()
+        if self._idle:
+            team = self._idle.pop()
+            self.stats["reused"] += 1
+        else:
+            team = self.factory()
+            self.stats["created"] += 1
+        self.stats["in_use"] += 1
+        self.stats["peak_in_use"] = max(self.stats["peak_in_use"], self.stats["in_use"])
+        return team
+
+    def release(self, team: Any, healthy: bool = True) -> None:
+        """Return a team; teams of failed or cancelled sessions are dropped instead of reused."""
+        self.stats["in_use"] -= 1
+        if healthy:
+            self.reset(team)
+            self._idle.append(team)
+        else:
+            self.stats["discarded"] += 1
+        if self._slots is not None:
+            self._slots.release()
+
+    @asynccontextmanager
+    async def lease(self):
+        """`async with pool.lease() as team:` acquire a team and give it back afterwards."""
+        team = await self.acquire()
+        healthy = False
+        try:
+            yield team
+            healthy = True
+        finally:
+            self.release(team, healthy)
+
+
+class SessionResult:
+    """Outcome of one session: the `run` function's return value or the error."""
+
+    def __init__(self, session_id: str, result: Any = None, error: str | None = None, seconds: float = 0.0):
+        self.session_id = session_id
+        self.result = result
+        self.error = error
+        self.seconds = seconds
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def as_dict(self) -> dict:
+        # ChatResult-like results are reduced to what a client needs
+        data = {"session": self.session_id, "ok": self.ok, "seconds": round(self.seconds, 3)}
+        if self.error is not None:
+            data["error"] = self.error
+        elif hasattr(self.result, "chat_history"):
+            data["summary"] = self.result.summary
+            data["messages"] = len(self.result.chat_history)
+        else:
+            data["result"] = self.result
+        return data
+
+
+class ConversationServer:
+    """Runs many concurrent sessions of one conversation pattern.
+
+    Args:
+        factory: Builds a fresh team of agents (see AgentPool).
+        run: `async def run(team, **inputs)` plays one conversation and returns its result
+            (typically the ChatResult of `a_initiate_chat(..., silent=True)`).
+        max_sessions: Sessions running at the same time; more requests wait for a free slot.
+        pool_size: Most teams kept by the pool (defaults to max_sessions).
+        llm_threads: Threads for AutoGen's blocking LLM calls (defaults to max_sessions).
+            Also raise LLM_MAX_CONNECTIONS so the shared HTTP pool has enough sockets.
+        session_timeout: Seconds a session may take before it is cancelled (None = no limit).
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        run: Callable[..., Awaitable[Any]],
+        max_sessions: int = 100,
+        pool_size: int | None = None,
+        llm_threads: int | None = None,
+        session_timeout: float | None = None,
+    ):
+        self.run = run
+        self.max_sessions = max_sessions
+        self.llm_threads = llm_threads or max_sessions
+        self.session_timeout = session_timeout
+        self.pool = AgentPool(factory, max_size=pool_size or max_sessions)
+        self._slots = asyncio.Semaphore(max_sessions)
+        self._ids = itertools.count(1)
+        self._executor: ThreadPoolExecutor | None = None
+        self.stats = {"sessions": 0, "failed": 0, "active": 0, "peak_active": 0, "total_seconds": 0.0}
+
+    def _prepare_loop(self) -> None:
+        # `a_initiate_chat` runs each LLM request in the loop's default executor, whose
+        # default size (a few threads per CPU) would cap the number of concurrent sessions
+        loop = asyncio.get_running_loop()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.llm_threads, thread_name_prefix="llm-call")
+        loop.set_default_executor(self._executor)
+
+    async def run_session(self, session_id: str | None = None, **inputs: Any) -> SessionResult:
+        """Run one conversation with a pooled team; errors are reported in the result, not raised."""
+        self._prepare_loop()
+        session_id = session_id or f"s{next(self._ids)}"
+        async with self._slots:
+            self.stats["active"] += 1
+            self.stats["peak_active"] = max(self.stats["peak_active"], self.stats["active"])
+            started = time.perf_counter()
+            try:
+                async with self.pool.lease() as team:
+                    result = await asyncio.wait_for(self.run(team, **inputs), self.session_timeout)
+                outcome = SessionResult(session_id, result=result)
+            except Exception as e:
+                outcome = SessionResult(session_id, error=f"{type(e).__name__}: {e}" if str(e) else type(e).__name__)
+                self.stats["failed"] += 1
+            finally:
+                self.stats["active"] -= 1
+            outcome.seconds = time.perf_counter() - started
+            self.stats["sessions"] += 1
+            self.stats["total_seconds"] += outcome.seconds
+            return outcome
+
+    async def run_many(self, inputs: list[dict[str, Any]]) -> list[SessionResult]:
+        """Run one session per inputs dict concurrently; results keep the input order."""
+        return await asyncio.gather(*(self.run_session(**dict(item)) for item in inputs))
+
+    async def start_tcp(self, host: str = "127.0.0.1", port: int = 8765) -> asyncio.AbstractServer:
+        """Start accepting sessions over a local socket and return the listening asyncio server.
+
+        Each request is a JSON line such as {"session": "alice", "inputs": {"message": "..."}};
+        each finished session is answered with a JSON line (see SessionResult.as_dict).
+        A connection can send many requests; their answers arrive as sessions finish.
+        """
+        self._prepare_loop()
+
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            lock = asyncio.Lock()
+            tasks = set()
+
+            async def answer(request: dict) -> None:
+                outcome = await self.run_session(request.get("session"), **(request.get("inputs") or {}))
+                async with lock:
+                    writer.write((json.dumps(outcome.as_dict(), default=str) + "\n").encode("utf-8"))
+                    await writer.drain()
+
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    writer.write(b'{"ok": false, "error": "Invalid JSON"}\n')
+                    continue
+                # Anything but an object (with an object of inputs) would fail inside the task, unanswered
+                if not isinstance(request, dict) or not isinstance(request.get("inputs") or {}, dict):
+                    writer.write(b'{"ok": false, "error": "Expected a JSON object whose inputs are an object"}\n')
+                    continue
+                task = asyncio.create_task(answer(request))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            writer.close()
+
+        return await asyncio.start_server(handle, host, port, limit=1 << 20)
+
+    async def serve_tcp(self, host: str = "127.0.0.1", port: int = 8765) -> None:
+        """Serve sessions over a local socket until cancelled (see `start_tcp`)."""
+        server = await self.start_tcp(host, port)
+        async with server:
+            await server.serve_forever()
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
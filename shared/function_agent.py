@@ -0,0 +1,80 @@
+# -----------------------------
+# DETERMINISTIC "FUNCTION AGENTS"
+# -----------------------------
+# Some pipeline stages are plain computations: upper-casing text, counting words,
+# reversing a sentence. Asking an LLM to do them costs a full round trip and the
+# answer is sometimes wrong. A FunctionAgent is a ConversableAgent that answers
+# with a registered Python callable instead of a model call, so it can take part
+# in `initiate_chat`, `initiate_chats` or `initiate_chat_dag` like any other agent.
+#
+# Usage:
+#     uppercase_agent = FunctionAgent(name="Uppercase_Agent", function=str.upper)
+#     initial_agent.initiate_chats([{"recipient": uppercase_agent, "message": "hello", "max_turns": 1}])
+
+from typing import Any, Callable  # Type hints for the registered function
+
+from autogen import Agent, ConversableAgent  # Base agent class and the sender type
+
+# initiate_chats appends the summaries of earlier chats to the message after this marker
+CARRYOVER_MARKER = "\nContext: \n"
+
+
+def extract_payload(content: str) -> str:
+    """Return the text the function should work on.
+
+    For the first chat in a pipeline this is the message itself. For later chats
+    the useful input is the carryover (the previous chats' summaries) that
+    `initiate_chats` appends after "Context:", so that part is returned instead.
+    """
+    if CARRYOVER_MARKER in content:
+        return content.split(CARRYOVER_MARKER, 1)[1].strip()
+    return content.strip()
+
+
+class FunctionAgent(ConversableAgent):
+    """An agent whose replies come from a Python callable, never from an LLM.
+
+    Args:
+        name: Agent name.
+        function: Callable that receives the input text and returns the reply (converted with `str`).
+        description: Short description for group chats; defaults to the function's docstring.
+        use_carryover: When True (default), the function gets the carryover text if there is one,
+            otherwise the whole message. When False, it always gets the whole message.
+        **kwargs: Other ConversableAgent arguments (for example `is_termination_msg`).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        function: Callable[[str], Any],
+        description: str | None = None,
+        use_carryover: bool = True,
+        **kwargs: Any,
+    ):
+        super().__init__(
+            name=name,
+            llm_config=False,  # No model behind this agent
+            code_execution_config=False,
+            human_input_mode="NEVER",
+            description=description or (function.__doc__ or f"Applies {getattr(function, '__name__', 'a function')}.").strip(),
+            **kwargs,
+        )
+        self._function = function
+        self._use_carryover = use_carryover
+        # Answer right after the (sync and async) termination checks, before tools, code or LLM,
+        # so `is_termination_msg` and `max_consecutive_auto_reply` still end the chat
+        self.register_reply([Agent, None], FunctionAgent._generate_function_reply, position=2)
+
+    def _generate_function_reply(
+        self,
+        messages: list[dict[str, Any]] | None = None,
+        sender: Agent | None = None,
+        config: Any | None = None,
+    ) -> tuple[bool, str | None]:
+        if messages is None:
+            messages = self._oai_messages[sender]
+        content = messages[-1].get("content") if messages else None
+        if not isinstance(content, str):
+            content = "" if content is None else str(content)
+        text = extract_payload(content) if self._use_carryover else content
+        return True, str(self._function(text))
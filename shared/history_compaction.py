@@ -0,0 +1,207 @@
+# -----------------------------
+# TOKEN-BUDGETED HISTORY COMPACTION
+# -----------------------------
+# In a long group chat every agent receives the whole conversation on every turn,
+# so prompts (and latency) grow with each round. RollingHistoryCompactor is a
+# message transform for AutoGen's `TransformMessages` capability that keeps an
+# agent's history under a token budget:
+#   - system messages and the most recent turns are kept word for word
+#   - older turns are folded into one short summary message (or dropped)
+#   - tokens are counted locally with tiktoken (no API calls)
+#   - prefix-stable mode keeps the leading messages (e.g. group-chat introductions)
+#     word for word and moves the compaction point in jumps, so the prompt up to
+#     the recent turns stays byte-identical for several turns and providers can
+#     serve it from their prompt cache (see prompt_prefix.py)
+#
+# Usage:
+#     from autogen.agentchat.contrib.capabilities.transform_messages import TransformMessages
+#
+#     compaction = TransformMessages(transforms=[RollingHistoryCompactor(max_tokens=1500)])
+#     for agent in agents:
+#         compaction.add_to_agent(agent)
+
+import functools  # For caching token counts of messages that are seen again and again
+import json  # For counting the tokens of tool calls
+import re  # For cutting a message down to its first sentence
+import warnings  # For reporting the token-count fallback once
+from typing import Any, Callable
+
+from autogen.token_count_utils import get_max_token_limit  # Model context sizes known to AutoGen
+
+SUMMARY_HEADER = "Summary of the earlier conversation:"
+MESSAGE_OVERHEAD_TOKENS = 4  # Role/name framing the API adds to every message
+
+
+@functools.lru_cache(maxsize=8)
+def _encoding_for(model: str):
+    try:
+        import tiktoken
+
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:  # tiktoken missing, or its encoding file cannot be downloaded (offline)
+        warnings.warn(f"tiktoken is unavailable ({type(e).__name__}); estimating 4 characters per token.", stacklevel=2)
+        return None
+
+
+@functools.lru_cache(maxsize=16384)
+def count_text_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    """Count the tokens of `text` for `model` (about len/4 when tiktoken cannot be used)."""
+    encoding = _encoding_for(model)
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _content_text(message: dict[str, Any]) -> str:
+    content = message.get("content")
+    if isinstance(content, list):  # Multimodal content: count only the text parts
+        content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content or ""
+
+
+def count_message_tokens(message: dict[str, Any], model: str = "gpt-4o-mini") -> int:
+    """Tokens one chat message adds to a prompt, including tool calls and framing."""
+    tokens = MESSAGE_OVERHEAD_TOKENS + count_text_tokens(_content_text(message), model)
+    if message.get("name"):
+        tokens += count_text_tokens(message["name"], model)
+    if message.get("tool_calls"):
+        tokens += count_text_tokens(json.dumps(message["tool_calls"], sort_keys=True), model)
+    return tokens
+
+
+def extractive_summary(messages: list[dict[str, Any]], max_chars: int = 200) -> list[str]:
+    """Default summarizer: one line per message with the speaker and its first sentence."""
+    lines = []
+    for message in messages:
+        text = " ".join(_content_text(message).split())
+        if not text:
+            continue
+        first = re.split(r"(?<=[.!?])\s", text, maxsplit=1)[0]
+        if len(first) > max_chars:
+            first = first[: max_chars - 3].rstrip() + "..."
+        lines.append(f"- {message.get('name') or message.get('role', 'unknown')}: {first}")
+    return lines
+
+
+class RollingHistoryCompactor:
+    """Keeps the message history under `max_tokens`, summarizing (or dropping) the oldest turns.
+
+    Args:
+        max_tokens: Token budget for the history (the agent's own system message comes on top).
+            Defaults to half of the model's context window.
+        keep_recent: Number of most recent messages that are always kept word for word.
+        summarize: Replace the compacted turns by a summary message; False drops them.
+        summarizer: Callable turning the compacted messages into summary lines; defaults
+            to `extractive_summary` (local, no LLM call). Lines that do not fit are dropped, oldest first.
+        model: Model name used to pick the tokenizer.
+        keep_first: Number of leading non-system messages (introductions, the task) that are
+            always kept word for word, at the start of the history.
+        prefix_stable: Compact in jumps instead of one turn at a time. When the recent turns outgrow
+            their share of the budget, older turns are folded until they use half of it; the summary
+            gets a fixed quarter of the budget. Between jumps the summary and everything before it
+            do not change, so that part of the prompt can be served from the provider's prompt cache.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int | None = None,
+        keep_recent: int = 4,
+        summarize: bool = True,
+        summarizer: Callable[[list[dict[str, Any]]], list[str]] | None = None,
+        model: str = "gpt-4o-mini",
+        keep_first: int = 0,
+        prefix_stable: bool = False,
+    ):
+        self.max_tokens = max_tokens or get_max_token_limit(model) // 2
+        self.keep_recent = max(1, keep_recent)
+        self.summarize = summarize
+        self.summarizer = summarizer or extractive_summary
+        self.model = model
+        self.keep_first = keep_first
+        self.prefix_stable = prefix_stable
+
+    def _tokens(self, message: dict[str, Any]) -> int:
+        return count_message_tokens(message, self.model)
+
+    def apply_transform(self, messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        sizes = [self._tokens(m) for m in messages]
+        if sum(sizes) <= self.max_tokens:
+            return messages
+
+        # System messages and the first `keep_first` other messages are always kept
+        head = [i for i, m in enumerate(messages) if m.get("role") == "system"]
+        rest = [i for i in range(len(messages)) if messages[i].get("role") != "system"]
+        head, rest = head + rest[: self.keep_first], rest[self.keep_first :]
+        budget = self.max_tokens - sum(sizes[i] for i in head)
+
+        if self.prefix_stable:
+            used = budget - budget // 4  # The summary always gets the same room, so its text only changes with the cut
+            start = self._stable_start(messages, sizes, rest, used)
+        else:
+            # Keep the newest turns: at least `keep_recent`, then as many more as the budget allows
+            start = len(rest)
+            used = 0
+            while start > 0:
+                size = sizes[rest[start - 1]]
+                if len(rest) - start >= self.keep_recent and used + size > budget:
+                    break
+                used += size
+                start -= 1
+            # A tool result must stay next to the assistant message that requested it
+            while start > 0 and messages[rest[start]].get("role") in ("tool", "function"):
+                start -= 1
+                used += sizes[rest[start]]
+        older, recent = rest[:start], rest[start:]
+
+        compacted = [messages[i] for i in head]
+        if older and self.summarize:
+            summary = self._summary([messages[i] for i in older], budget - used)
+            if summary is not None:
+                compacted.append(summary)
+        compacted.extend(messages[i] for i in recent)
+        return compacted
+
+    def _stable_start(self, messages: list[dict[str, Any]], sizes: list[int], rest: list[int], high: int) -> int:
+        # Replay the history turn by turn: the cut only moves when the recent turns exceed `high`,
+        # and then jumps far enough that they use half of it. The same history always gives the same cut.
+        start, window = 0, 0
+        for n, i in enumerate(rest):
+            window += sizes[i]
+            if window <= high:
+                continue
+            while window > high // 2 and n + 1 - start > self.keep_recent:
+                window -= sizes[rest[start]]
+                start += 1
+            # A tool result must stay next to the assistant message that requested it
+            while 0 < start <= n and messages[rest[start]].get("role") in ("tool", "function"):
+                start -= 1
+                window += sizes[rest[start]]
+        return start
+
+    def _summary(self, older: list[dict[str, Any]], budget: int) -> dict[str, Any] | None:
+        # Fill the remaining budget with the newest summary lines
+        room = budget - MESSAGE_OVERHEAD_TOKENS - count_text_tokens(SUMMARY_HEADER, self.model)
+        kept: list[str] = []
+        for line in reversed(self.summarizer(older)):
+            size = count_text_tokens(line, self.model) + 1
+            if size > room:
+                break
+            kept.append(line)
+            room -= size
+        if not kept:
+            return None
+        return {"role": "user", "content": "\n".join([SUMMARY_HEADER, *reversed(kept)])}
+
+    def get_logs(self, pre_transform_messages: list[dict[str, Any]], post_transform_messages: list[dict[str, Any]]) -> tuple[str, bool]:
+        before = sum(self._tokens(m) for m in pre_transform_messages)
+        after = sum(self._tokens(m) for m in post_transform_messages)
+        if before == after and len(pre_transform_messages) == len(post_transform_messages):
+            return "No history compaction needed.", False
+        return (
+            f"Compacted history from {len(pre_transform_messages)} to {len(post_transform_messages)} messages "
+            f"({before} -> {after} tokens, budget {self.max_tokens}).",
+            True,
+        )
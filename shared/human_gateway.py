@@ -0,0 +1,278 @@
+# -----------------------------
+# NON-BLOCKING HUMAN INPUT GATEWAY
+# -----------------------------
+# With human_input_mode="ALWAYS" or "TERMINATE" an agent calls `input()` and the
+# whole process waits for one person. HumanInputGateway lets one process host
+# many human-in-the-loop conversations at once:
+#   - agents ask the gateway for input; a waiting conversation is just a pending
+#     future (no thread or process per conversation)
+#   - replies arrive through a transport: the terminal (StdinTransport) or a local
+#     TCP socket (SocketTransport), and are routed to the right conversation
+#   - every request can time out and fall back to a default reply
+#
+# Usage:
+#     gateway = HumanInputGateway(StdinTransport(), timeout=300, default_reply="exit")
+#     human = HumanGatewayAgent("human_proxy", gateway=gateway, llm_config=False, human_input_mode="ALWAYS")
+#     asyncio.run(human.a_initiate_chat(other_agent, message="..."))
+#
+# Routing: a reply written as "<session>: text" goes to that session; any other
+# line goes to the conversation that has been waiting longest.
+
+import asyncio  # Waiting conversations are awaited futures
+import itertools  # For request ids
+import json  # Socket transport messages
+import re  # For "<session>: text" replies
+import socketserver  # Socket transport
+import sys  # Stdin transport
+import threading  # One reader thread per transport, not per conversation
+import time  # For wait statistics
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from autogen import ConversableAgent
+
+_ADDRESSED = re.compile(r"^\s*([\w.\-]+):\s?(.*)$", re.DOTALL)
+
+
+class HumanRequest:
+    """One pending question to a human."""
+
+    def __init__(self, request_id: int, session: str, prompt: str):
+        self.id = request_id
+        self.session = session
+        self.prompt = prompt
+        self.created = time.monotonic()
+        self.future: Future = Future()  # Resolved by the transport's thread, awaited by the conversation
+
+    def resolve(self, text: str) -> bool:
+        """Hand `text` to the waiting conversation; False when it already gave up (timed out and cancelled)."""
+        # set_running_or_notify_cancel() makes the future uncancellable, so a timeout that
+        # cancels it at the same moment cannot make set_result() fail in the reader thread
+        if self.future.done() or not self.future.set_running_or_notify_cancel():
+            return False
+        self.future.set_result(text)
+        return True
+
+
+class HumanInputGateway:
+    """Routes human-input requests of many conversations over one transport.
+
+    Args:
+        transport: Where prompts are shown and replies come from (StdinTransport, SocketTransport, ...).
+        timeout: Default seconds to wait for a reply (None = wait forever).
+        default_reply: Reply used when a request times out ("" = let the agent auto-reply, "exit" = end the chat).
+    """
+
+    def __init__(self, transport, timeout: float | None = None, default_reply: str = ""):
+        self.transport = transport
+        self.timeout = timeout
+        self.default_reply = default_reply
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._pending: dict[int, HumanRequest] = {}  # Insertion order = waiting order
+        self._unclaimed: deque[tuple[str | None, str]] = deque()  # Replies that arrived before their question
+        self.stats = {"requests": 0, "replies": 0, "timeouts": 0, "total_wait_seconds": 0.0}
+        transport.start(self)
+
+    # ---- conversation side ------------------------------------------------------------
+
+    def _open(self, session: str, prompt: str) -> HumanRequest:
+        with self._lock:
+            request = HumanRequest(next(self._ids), session, prompt)
+            self.stats["requests"] += 1
+            # A reply typed (or piped) before the question was asked is used right away
+            for i, (target, text) in enumerate(self._unclaimed):
+                if target in (None, session):
+                    del self._unclaimed[i]
+                    request.resolve(text)
+                    return request
+            self._pending[request.id] = request
+        self.transport.send_prompt(request)
+        return request
+
+    def _finish(self, request: HumanRequest, reply: str | None, timeout: float | None, default: str | None) -> str:
+        with self._lock:
+            self._pending.pop(request.id, None)
+            # A reply delivered between the timeout and this point still counts; once the request
+            # is no longer pending, later replies go to the next request (or wait for one)
+            if reply is None and request.future.done() and not request.future.cancelled():
+                reply = request.future.result()
+            self.stats["total_wait_seconds"] += time.monotonic() - request.created
+            if reply is None:
+                self.stats["timeouts"] += 1
+            else:
+                self.stats["replies"] += 1
+        if reply is None:
+            reply = self.default_reply if default is None else default
+            self.transport.notify(request.session, f"No reply after {timeout} seconds; using {reply!r}.")
+        return reply
+
+    async def a_request(self, session: str, prompt: str, timeout: float | None = None, default: str | None = None) -> str:
+        """Ask the human for input without blocking the event loop."""
+        timeout = self.timeout if timeout is None else timeout
+        request = self._open(session, prompt)
+        try:
+            reply = await asyncio.wait_for(asyncio.wrap_future(request.future), timeout)
+        except asyncio.TimeoutError:
+            reply = None
+        return self._finish(request, reply, timeout, default)
+
+    def request(self, session: str, prompt: str, timeout: float | None = None, default: str | None = None) -> str:
+        """Blocking version for synchronous conversations (blocks only the calling thread)."""
+        timeout = self.timeout if timeout is None else timeout
+        request = self._open(session, prompt)
+        try:
+            reply = request.future.result(timeout=timeout)
+        except FutureTimeoutError:
+            reply = None
+        return self._finish(request, reply, timeout, default)
+
+    # ---- transport side ---------------------------------------------------------------
+
+    def deliver(self, text: str, session: str | None = None) -> None:
+        """Route a reply: to `session`, to the session named as "<session>: text", or to the oldest request."""
+        text = text.rstrip("\r\n")
+        with self._lock:
+            if session is None:
+                match = _ADDRESSED.match(text)
+                if match and any(r.session == match.group(1) for r in self._pending.values()):
+                    session, text = match.group(1), match.group(2)
+            for request in self._pending.values():
+                if (session is None or request.session == session) and request.resolve(text):
+                    return
+            self._unclaimed.append((session, text))
+
+    def pending(self) -> list[HumanRequest]:
+        with self._lock:
+            return list(self._pending.values())
+
+    def close(self) -> None:
+        self.transport.stop()
+
+
+class StdinTransport:
+    """Prompts on the terminal; one background thread reads replies from stdin."""
+
+    def __init__(self, stream=None, output=None):
+        self.stream = stream or sys.stdin
+        self.output = output or sys.stdout
+
+    def start(self, gateway: HumanInputGateway) -> None:
+        self.gateway = gateway
+        threading.Thread(target=self._read, daemon=True, name="human-input-stdin").start()
+
+    def _read(self) -> None:
+        for line in self.stream:
+            self.gateway.deliver(line)
+
+    def send_prompt(self, request: HumanRequest) -> None:
+        hint = f" (answer as '{request.session}: ...')" if len(self.gateway.pending()) > 1 else ""
+        print(f"[{request.session}]{hint} {request.prompt}", file=self.output, flush=True)
+
+    def notify(self, session: str, text: str) -> None:
+        print(f"[{session}] {text}", file=self.output, flush=True)
+
+    def stop(self) -> None:
+        pass  # The daemon thread ends with the process
+
+
+class SocketTransport:
+    """Line-based TCP transport on a local port, for a separate console or UI.
+
+    Every connected client receives prompts as JSON lines
+    ({"type": "prompt", "id": 1, "session": "...", "prompt": "..."}) and answers with
+    JSON ({"session": "...", "reply": "..."}) or plain text ("<session>: text"),
+    e.g. with `nc 127.0.0.1 8766`.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8766):
+        self.host = host
+        self.port = port
+        self._clients: set = set()
+        self._clients_lock = threading.Lock()
+        self._server = None
+
+    def start(self, gateway: HumanInputGateway) -> None:
+        transport = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                with transport._clients_lock:
+                    transport._clients.add(self.wfile)
+                for request in gateway.pending():  # Catch up on questions asked before connecting
+                    transport._send(self.wfile, {"type": "prompt", "id": request.id, "session": request.session, "prompt": request.prompt})
+                try:
+                    for raw in self.rfile:
+                        line = raw.decode("utf-8", errors="replace")
+                        try:
+                            message = json.loads(line)
+                            gateway.deliver(str(message.get("reply", "")), message.get("session"))
+                        except (ValueError, AttributeError):
+                            gateway.deliver(line)
+                finally:
+                    with transport._clients_lock:
+                        transport._clients.discard(self.wfile)
+
+        self._server = socketserver.ThreadingTCPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True, name="human-input-socket").start()
+
+    def _send(self, wfile, message: dict) -> None:
+        try:
+            wfile.write((json.dumps(message) + "\n").encode("utf-8"))
+            wfile.flush()
+        except OSError:
+            with self._clients_lock:
+                self._clients.discard(wfile)
+
+    def _broadcast(self, message: dict) -> None:
+        with self._clients_lock:
+            clients = list(self._clients)
+        for wfile in clients:
+            self._send(wfile, message)
+
+    def send_prompt(self, request: HumanRequest) -> None:
+        self._broadcast({"type": "prompt", "id": request.id, "session": request.session, "prompt": request.prompt})
+
+    def notify(self, session: str, text: str) -> None:
+        self._broadcast({"type": "notice", "session": session, "text": text})
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+class HumanGatewayAgent(ConversableAgent):
+    """ConversableAgent that asks for human input through a HumanInputGateway instead of `input()`.
+
+    Args:
+        gateway: The shared gateway.
+        session: Name shown with its prompts and used to address replies (defaults to the agent name).
+        input_timeout: Seconds to wait for this agent's human (defaults to the gateway's timeout).
+        default_reply: Reply on timeout (defaults to the gateway's default reply).
+        Other arguments are passed to ConversableAgent.
+    """
+
+    def __init__(self, *args, gateway: HumanInputGateway, session: str | None = None, input_timeout: float | None = None, default_reply: str | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.gateway = gateway
+        self.session = session or self.name
+        self.input_timeout = input_timeout
+        self.default_reply = default_reply
+
+    def _record(self, reply: str) -> str:
+        # Same bookkeeping as ConversableAgent.get_human_input
+        processed = self._process_human_input(reply)
+        if processed is None:
+            raise ValueError("safeguard_human_inputs hook returned None")
+        self._human_input.append(processed)
+        return processed
+
+    def get_human_input(self, prompt: str, **kwargs) -> str:
+        return self._record(self.gateway.request(self.session, prompt, self.input_timeout, self.default_reply))
+
+    async def a_get_human_input(self, prompt: str, **kwargs) -> str:
+        return self._record(await self.gateway.a_request(self.session, prompt, self.input_timeout, self.default_reply))
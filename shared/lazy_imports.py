@@ -0,0 +1,107 @@
+# -----------------------------
+# LAZY IMPORTS FOR FAST STARTUP
+# -----------------------------
+# `from autogen import ConversableAgent` imports every optional helper AutoGen
+# ships with, e.g. `autogen.graph_utils` imports matplotlib.pyplot (and with it
+# numpy and PIL) only to draw speaker-transition graphs. For a short-lived job
+# that is a third of its start-up time. `install_lazy_imports()` makes chosen
+# modules lazy: importing them only creates an empty module object, and the
+# module's code runs the first time one of its attributes is used.
+#
+# Usage:
+#     from shared.lazy_imports import install_lazy_imports
+#     install_lazy_imports()                       # Before `import autogen`
+#     import autogen                               # matplotlib is not loaded...
+#     import matplotlib.pyplot as plt; plt.plot    # ...until it is really used
+#
+# run.py installs it for every pattern it launches. Modules that do work at import
+# time that other code relies on (registering plugins, patching) must not be lazy.
+
+import importlib.abc  # Finder and loader interfaces
+import importlib.machinery  # For locating modules without running them
+import importlib.metadata  # For answering version checks without loading the module
+import sys  # For the import system hooks
+import threading  # A lazy module may first be used from any thread
+import types
+
+# Imported by AutoGen at start-up but only used by optional features (graph drawing, charts)
+DEFAULT_LAZY_MODULES = ("matplotlib", "matplotlib.pyplot")
+
+_load_lock = threading.RLock()
+
+
+class _LazyModule(types.ModuleType):
+    # A module whose code has not run yet; any attribute it does not have yet loads it
+
+    def __getattr__(self, name: str):
+        if name == "__version__" and "." not in self.__name__:
+            # AutoGen checks the versions of optional packages at import time; the installed
+            # distribution answers that without running the package
+            try:
+                return importlib.metadata.version(self.__name__)
+            except importlib.metadata.PackageNotFoundError:
+                pass
+        _load(self)
+        return getattr(self, name)
+
+
+def _load(module: types.ModuleType) -> None:
+    with _load_lock:
+        if type(module) is not _LazyModule:
+            return  # Loaded by another thread meanwhile
+        deferred = module.__spec__.loader
+        module.__class__ = types.ModuleType
+        module.__spec__.loader = module.__loader__ = deferred.loader
+        deferred.loader.exec_module(module)
+
+
+class _DeferredLoader(importlib.abc.Loader):
+    # Creates the module object with the usual attributes (__path__, __file__, ...) but runs no code
+
+    def __init__(self, loader: importlib.abc.Loader):
+        self.loader = loader
+
+    def create_module(self, spec):
+        return None  # The default module object
+
+    def exec_module(self, module: types.ModuleType) -> None:
+        module.__class__ = _LazyModule
+
+
+class LazyFinder(importlib.abc.MetaPathFinder):
+    """Meta path finder that hands out lazy modules for the names in `modules`."""
+
+    def __init__(self, modules: tuple[str, ...]):
+        self.modules = set(modules)
+        self.deferred: list[str] = []  # Modules that were imported lazily
+
+    def find_spec(self, name: str, path=None, target=None):
+        if name not in self.modules:
+            return None
+        # Locate the module like the import system would, without running it (or its parent)
+        spec = importlib.machinery.PathFinder.find_spec(name, path)
+        if spec is None or spec.loader is None or not hasattr(spec.loader, "exec_module"):
+            return None  # Not installed or not loadable lazily: import it normally
+        spec.loader = _DeferredLoader(spec.loader)
+        self.deferred.append(name)
+        return spec
+
+
+_finder: LazyFinder | None = None
+
+
+def install_lazy_imports(modules: tuple[str, ...] = DEFAULT_LAZY_MODULES) -> LazyFinder:
+    """Make `modules` lazy for the rest of the process (modules already imported stay as they are)."""
+    global _finder
+    if _finder is None:
+        _finder = LazyFinder(tuple(name for name in modules if name not in sys.modules))
+        sys.meta_path.insert(0, _finder)
+    else:
+        _finder.modules.update(name for name in modules if name not in sys.modules)
+    return _finder
+
+
+def is_loaded(name: str) -> bool:
+    """True when `name` has been imported and its code has run."""
+    module = sys.modules.get(name)
+    return module is not None and type(module) is not _LazyModule
@@ -0,0 +1,178 @@
+# -----------------------------
+# SHARED LLM CONFIGURATION AND HTTP CONNECTION POOL
+# -----------------------------
+# Every example script used to build its own `llm_config` dict, so each
+# ConversableAgent created its own OpenAI client and its own HTTP connection
+# pool. This module gives all agents in a process one keep-alive connection pool
+# (HTTP/2 when the `h2` package is installed) and one place to build llm_config.
+# Requests through the pool are scheduled per model (adaptive concurrency, 429
+# backoff, priorities; see shared/llm_scheduler.py), identical requests in
+# flight at the same time share one upstream call (see shared/request_coalescing.py),
+# and request bodies are sent in a prefix-stable layout with provider prompt-cache
+# hits recorded per call (see shared/prompt_prefix.py).
+#
+# Usage:
+#     from shared.llm_client import get_llm_config
+#     llm_config = get_llm_config(temperature=0.4)
+#     agent = ConversableAgent(name="Writer", llm_config=llm_config)
+
+import importlib.util  # For checking whether the optional HTTP/2 dependency is installed
+import os  # For reading the API key and endpoint from environment variables
+import threading  # For creating the shared client safely from several threads
+
+import httpx  # HTTP library used by the OpenAI SDK under the hood
+from dotenv import load_dotenv  # For loading environment variables from a .env file
+
+from shared.llm_scheduler import PRIORITY_HEADER, SchedulingTransport  # Per-model adaptive concurrency and 429 handling
+from shared.prompt_prefix import PrefixStats, PromptPrefixTransport  # Canonical request layout, cached-token accounting
+from shared.request_coalescing import COALESCE_HEADER, CoalescingTransport  # One upstream call for identical concurrent requests
+
+# Load environment variables from the .env file once for every script that uses this module
+load_dotenv()
+
+# TELEMETRY_PATH=spans.jsonl records per-turn spans (LLM calls, tools, speaker selection,
+# nested chats) for any script that uses this module; see shared/telemetry.py
+if os.environ.get("TELEMETRY_PATH"):
+    from shared.telemetry import start_telemetry
+
+    start_telemetry(jsonl_path=os.environ["TELEMETRY_PATH"], otlp_path=os.environ.get("TELEMETRY_OTLP_PATH"))
+
+# Default model used by all the examples in this repository
+MODEL = "gpt-4o-mini"
+
+# Connection pool sizing for the shared HTTP client
+# - MAX_CONNECTIONS: upper bound of open sockets to the model endpoint
+# - MAX_KEEPALIVE_CONNECTIONS: idle sockets kept open for reuse between turns
+# - KEEPALIVE_EXPIRY: seconds an idle socket is kept before it is closed
+MAX_CONNECTIONS = int(os.environ.get("LLM_MAX_CONNECTIONS", "20"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("LLM_MAX_KEEPALIVE_CONNECTIONS", "10"))
+KEEPALIVE_EXPIRY = float(os.environ.get("LLM_KEEPALIVE_EXPIRY", "30"))
+
+# Request scheduling (see shared/llm_scheduler.py)
+# - MAX_CONCURRENCY: per-model requests in flight; the adaptive limit starts here and shrinks on 429s
+# - LATENCY_TARGET: seconds; slower replies also shrink the limit (unset = only 429/503 do)
+# - PRIORITY: default priority class of this process's requests ("interactive" or "batch")
+# - LLM_SCHEDULER=off sends requests straight to the connection pool
+MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", str(MAX_CONNECTIONS)))
+LATENCY_TARGET = float(os.environ["LLM_LATENCY_TARGET"]) if os.environ.get("LLM_LATENCY_TARGET") else None
+PRIORITY = os.environ.get("LLM_PRIORITY", "interactive")
+SCHEDULER_ENABLED = os.environ.get("LLM_SCHEDULER", "on").lower() not in ("0", "off", "false", "no")
+
+# Request coalescing: "deterministic" (temperature 0 and opted-in agents), "all" or "off"
+COALESCE_MODE = os.environ.get("LLM_COALESCE", "deterministic").lower()
+
+# LLM_CANONICAL_PROMPTS=off sends request bodies as the OpenAI SDK wrote them (cached tokens are still recorded)
+CANONICAL_PROMPTS = os.environ.get("LLM_CANONICAL_PROMPTS", "on").lower() not in ("0", "off", "false", "no")
+
+
+class SharedHTTPClient(httpx.Client):
+    """An httpx.Client that is shared, never copied, by every agent.
+
+    AutoGen deep-copies `llm_config` for every agent it creates. Returning `self`
+    from `__deepcopy__` keeps one connection pool for the whole process instead
+    of one pool per agent.
+    """
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+# The process-wide client and the lock guarding its creation
+_http_client = None
+_http_client_lock = threading.Lock()
+
+
+def http2_available() -> bool:
+    # HTTP/2 support in httpx needs the optional `h2` package (pip install httpx[http2])
+    return importlib.util.find_spec("h2") is not None
+
+
+def get_http_client() -> SharedHTTPClient:
+    """Return the process-wide pooled HTTP client, creating it on first use."""
+    global _http_client
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                transport = httpx.HTTPTransport(
+                    http2=http2_available(),  # Multiplex requests over one socket when possible
+                    limits=httpx.Limits(
+                        max_connections=MAX_CONNECTIONS,
+                        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                        keepalive_expiry=KEEPALIVE_EXPIRY,
+                    ),
+                )
+                if SCHEDULER_ENABLED:
+                    transport = SchedulingTransport(transport, MAX_CONCURRENCY, LATENCY_TARGET)
+                # Inside the coalescer, so only calls that reach the endpoint are counted
+                transport = PromptPrefixTransport(transport, CANONICAL_PROMPTS)
+                # Outermost, so requests that wait for an identical one do not take a scheduler slot
+                transport = CoalescingTransport(transport, COALESCE_MODE)
+                _http_client = SharedHTTPClient(transport=transport)
+    return _http_client
+
+
+def get_coalescer() -> CoalescingTransport:
+    """The request coalescer of the shared client (for `stats()`)."""
+    return get_http_client()._transport
+
+
+def get_prefix_stats() -> PrefixStats:
+    """Cached vs uncached prompt tokens of the calls made through the shared client."""
+    return get_coalescer()._transport.prefix_stats
+
+
+def get_scheduler() -> SchedulingTransport | None:
+    """The scheduler of the shared client (for `stats()`), or None when LLM_SCHEDULER=off."""
+    transport = get_coalescer()._transport._transport
+    return transport if isinstance(transport, SchedulingTransport) else None
+
+
+def close_http_client() -> None:
+    """Close the shared client and its sockets (a new one is created on next use)."""
+    global _http_client
+    with _http_client_lock:
+        if _http_client is not None:
+            _http_client.close()
+            _http_client = None
+
+
+def get_llm_config(
+    model: str = MODEL,
+    temperature: float | None = None,
+    priority: str | None = None,
+    coalesce: bool = False,
+    **overrides,
+) -> dict:
+    """Build an llm_config dict that uses the shared connection pool.
+
+    Args:
+        model: The model name, "gpt-4o-mini" by default.
+        temperature: Sampling temperature; left to the API default when None.
+        priority: Scheduling class of the agent's requests, "interactive" or "batch"
+            (defaults to LLM_PRIORITY, else "interactive"). Waiting interactive requests go first.
+        coalesce: Let identical concurrent requests of this agent share one reply even when
+            sampling (temperature > 0); requests with temperature 0 always may.
+        **overrides: Any other llm_config keys (for example `max_tokens`).
+    """
+    llm_config = {
+        "model": model,
+        "api_key": os.environ.get("OPENAI_API_KEY"),  # Retrieve the API key from environment variables
+        "http_client": get_http_client(),  # Reuse one keep-alive connection pool for all agents
+    }
+    # OPENAI_BASE_URL lets every script talk to another OpenAI-compatible endpoint
+    base_url = os.environ.get("OPENAI_BASE_URL")
+    if base_url:
+        llm_config["base_url"] = base_url
+    if temperature is not None:
+        llm_config["temperature"] = temperature
+    # Scheduling hints travel as request headers that the shared transports read and remove
+    headers = {}
+    priority = priority or PRIORITY
+    if priority != "interactive":
+        headers[PRIORITY_HEADER] = priority
+    if coalesce:
+        headers[COALESCE_HEADER] = "1"
+    if headers:
+        llm_config["default_headers"] = headers
+    llm_config.update(overrides)
+    return llm_config
@@ -0,0 +1,239 @@
+# -----------------------------
+# ADAPTIVE REQUEST SCHEDULER FOR THE MODEL ENDPOINT
+# -----------------------------
+# Every agent in a process sends its completions through the one pooled HTTP
+# client of llm_client.py, but nothing coordinated them: a burst from one
+# conversation could take every connection, and 429 errors went straight back
+# to the caller. SchedulingTransport sits inside that client and schedules
+# every request before it is sent:
+#   - a concurrency limit per model; requests over the limit wait in a queue
+#   - the limit adapts AIMD-style: +1 per limit's worth of successful requests,
+#     halved on 429/503 (or on replies slower than a latency target)
+#   - Retry-After (and OpenAI's retry-after-ms) pauses the whole model, not only
+#     the refused request, which is then retried here instead of failing
+#   - priority classes: waiting "interactive" requests are always sent before
+#     waiting "batch" requests
+#
+# llm_client.py installs it automatically. The priority of an agent's requests is
+# set with `get_llm_config(priority="batch")` (or LLM_PRIORITY=batch for a whole
+# script), which sends it as a request header that is removed here.
+#
+# Usage:
+#     from shared.llm_client import get_llm_config, get_scheduler
+#     llm_config = get_llm_config(priority="batch")
+#     ...run agents...
+#     print(get_scheduler().stats())
+
+import email.utils  # For Retry-After given as an HTTP date
+import heapq  # Waiting requests, by priority and arrival
+import itertools  # For arrival order
+import json  # For reading the model from a request body
+import threading  # Requests come from many threads (AutoGen runs async LLM calls in a thread pool)
+import time  # For latency and pauses
+
+import httpx  # The transport interface of the shared client
+
+# Request header carrying the priority class from llm_config to the scheduler
+PRIORITY_HEADER = "X-LLM-Priority"
+
+# Priority classes; lower values are sent first
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+# Status codes that mean "slow down"
+_THROTTLED = (429, 503)
+
+
+def _retry_after(headers: httpx.Headers) -> float | None:
+    # Seconds to wait from retry-after-ms (OpenAI), Retry-After in seconds or as an HTTP date
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if value is None:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _model_of(request: httpx.Request) -> str:
+    try:
+        return json.loads(request.content).get("model") or "default"
+    except (ValueError, AttributeError, httpx.RequestNotRead):
+        return "default"
+
+
+class ModelLimit:
+    """AIMD concurrency limit and priority queue for the requests of one model.
+
+    Args:
+        model: Model name (for stats).
+        max_limit: Highest concurrency the limit can grow to (and its starting value).
+        min_limit: Lowest concurrency it can shrink to.
+        latency_target: Seconds; a reply slower than this counts as a congestion signal (None = only 429/503).
+    """
+
+    def __init__(self, model: str, max_limit: int, min_limit: int = 1, latency_target: float | None = None):
+        self.model = model
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.latency_target = latency_target
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._last_decrease = 0.0
+        self._latency = 1.0  # Smoothed request latency, also the cool-down between two decreases
+        self._cond = threading.Condition()
+        self._queue: list[tuple[int, int]] = []
+        self._arrivals = itertools.count()
+        self._stats = {"requests": 0, "throttled": 0, "retries": 0, "decreases": 0, "peak_in_flight": 0, "wait_seconds": 0.0}
+        self._waited = {name: 0 for name in PRIORITIES}
+
+    def acquire(self, priority: str) -> None:
+        """Block until this request may be sent: it is first in line, under the limit and not paused."""
+        ticket = (PRIORITIES[priority], next(self._arrivals))
+        started = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._queue, ticket)
+            while True:
+                now = time.monotonic()
+                if self._queue[0] == ticket and self.in_flight < int(self.limit) and now >= self.paused_until:
+                    break
+                self._cond.wait(self.paused_until - now if now < self.paused_until else None)
+            heapq.heappop(self._queue)
+            self.in_flight += 1
+            self._stats["requests"] += 1
+            self._stats["peak_in_flight"] = max(self._stats["peak_in_flight"], self.in_flight)
+            waited = time.monotonic() - started
+            self._stats["wait_seconds"] += waited
+            if waited > 0.001:
+                self._waited[priority] += 1
+            self._cond.notify_all()  # The next request in line may fit as well
+
+    def release(self, latency: float, status: int | None, retry_after: float | None = None, retrying: bool = False) -> None:
+        """Give the slot back and adapt the limit to how the request went."""
+        with self._cond:
+            self._stats["retries"] += retrying
+            used = self.in_flight >= int(self.limit)  # Only a limit that was reached has been tested
+            self.in_flight -= 1
+            now = time.monotonic()
+            if status in _THROTTLED:
+                self._stats["throttled"] += 1
+                self._decrease(now)
+                self.paused_until = max(self.paused_until, now + (retry_after if retry_after is not None else self._latency))
+            elif status is not None and status < 400:
+                self._latency = 0.8 * self._latency + 0.2 * latency
+                if self.latency_target is not None and latency > self.latency_target:
+                    self._decrease(now)
+                elif used:
+                    self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+    def _decrease(self, now: float) -> None:
+        # Many requests in flight see the same overload; halve once per round trip, not once per request
+        if now - self._last_decrease >= self._latency:
+            self.limit = max(float(self.min_limit), self.limit / 2)
+            self._last_decrease = now
+            self._stats["decreases"] += 1
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "waiting": len(self._queue),
+                **self._stats,
+                "wait_seconds": round(self._stats["wait_seconds"], 3),
+                "waited": dict(self._waited),
+            }
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    # The response body; the request keeps its slot until the body is read and closed
+    # (a streamed reply can take many seconds after its headers arrived)
+
+    def __init__(self, stream: httpx.SyncByteStream, release):
+        self._stream = stream
+        self._release = release
+
+    def __iter__(self):
+        yield from self._stream
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            release, self._release = self._release, None
+            if release is not None:
+                release()
+
+
+class SchedulingTransport(httpx.BaseTransport):
+    """httpx transport that schedules requests per model before handing them to `transport`.
+
+    Args:
+        transport: The transport that sends requests (an httpx.HTTPTransport with the connection pool).
+        max_concurrency: Per-model concurrency the AIMD limit starts at and never exceeds.
+        latency_target: Seconds above which a reply counts as congestion (None = only 429/503 count).
+        max_retries: Times a throttled request is retried here before its 429 is returned to the caller.
+        default_priority: Priority class of requests without the priority header.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.BaseTransport,
+        max_concurrency: int = 20,
+        latency_target: float | None = None,
+        max_retries: int = 4,
+        default_priority: str = "interactive",
+    ):
+        self._transport = transport
+        self.max_concurrency = max_concurrency
+        self.latency_target = latency_target
+        self.max_retries = max_retries
+        self.default_priority = default_priority
+        self._limits: dict[str, ModelLimit] = {}
+        self._limits_lock = threading.Lock()
+
+    def limit_for(self, model: str) -> ModelLimit:
+        with self._limits_lock:
+            if model not in self._limits:
+                self._limits[model] = ModelLimit(model, self.max_concurrency, latency_target=self.latency_target)
+            return self._limits[model]
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        priority = (request.headers.pop(PRIORITY_HEADER, None) or self.default_priority).lower()
+        priority = priority if priority in PRIORITIES else "interactive"
+        limit = self.limit_for(_model_of(request))
+
+        attempt = 0
+        while True:
+            limit.acquire(priority)
+            started = time.monotonic()
+            try:
+                response = self._transport.handle_request(request)
+            except BaseException:
+                limit.release(time.monotonic() - started, None)
+                raise
+            if response.status_code in _THROTTLED and attempt < self.max_retries:
+                # Read the error body so the connection goes back to the pool, then wait for our turn again
+                response.read()
+                response.close()
+                limit.release(time.monotonic() - started, response.status_code, _retry_after(response.headers), retrying=True)
+                attempt += 1
+                continue
+            status = response.status_code
+            response.stream = _ReleasingStream(response.stream, lambda: limit.release(time.monotonic() - started, status, _retry_after(response.headers)))
+            return response
+
+    def close(self) -> None:
+        self._transport.close()
+
+    def stats(self) -> dict:
+        """Per-model limit, queue and throttling counters."""
+        with self._limits_lock:
+            limits = list(self._limits.values())
+        return {limit.model: limit.stats() for limit in limits}
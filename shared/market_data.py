@@ -0,0 +1,275 @@
+# -----------------------------
+# LOCAL MARKET-DATA CACHE
+# -----------------------------
+# Generated analysis code such as code_executors/codes/plot_stock_prices.py calls
+# `yf.download(...)` on every run, downloading years of prices again for each
+# retry of the agent loop. `download(...)` is a drop-in replacement that keeps
+# daily prices on disk, one columnar file per ticker, and remembers which date
+# ranges are already stored, so only the missing ranges are fetched.
+#
+#   - Parquet files when pyarrow (or fastparquet) is installed, pickled DataFrames otherwise
+#   - manifest.json lists the covered [start, end) ranges per ticker
+#   - file locks let several processes (e.g. parallel code executors) share one cache dir
+#   - offline mode (MARKET_DATA_OFFLINE=1) serves a deterministic synthetic price
+#     series instead of calling Yahoo Finance, for tests and demos without network
+#
+# Usage (also from code run by the code executor, with the repository root on PYTHONPATH):
+#     from shared.market_data import download
+#     data = download(["META", "TSLA"], start="2020-01-01", end="2023-10-01")["Close"]
+
+import contextlib  # For the file lock context manager
+import json  # For the manifest of covered ranges
+import os  # For paths, settings and atomic file replacement
+import threading  # Several agents may read and fill the cache at once
+import warnings  # For the pickle fallback without a Parquet engine
+import zlib  # For a stable per-ticker seed in offline mode
+from datetime import date
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl  # File locks on POSIX
+
+    msvcrt = None
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+DEFAULT_CACHE_DIR = os.environ.get("MARKET_DATA_CACHE_DIR", os.path.join(".cache", "market_data"))
+OFFLINE = os.environ.get("MARKET_DATA_OFFLINE", "").lower() in ("1", "true", "yes")
+FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Instructions for an assistant whose code runs with the repository root on PYTHONPATH
+MARKET_DATA_PROMPT = (
+    "To get historical stock prices, do not call yfinance directly. Use the local cache instead:\n"
+    "    from shared.market_data import download\n"
+    '    data = download(["META", "TSLA"], start="2020-01-01", end="2023-10-01")["Close"]\n'
+    "It returns the same layout as yfinance.download and only downloads dates that are not cached yet."
+)
+
+
+def _parquet_available() -> bool:
+    try:
+        pd.io.parquet.get_engine("auto")
+        return True
+    except ImportError:
+        return False
+
+
+@contextlib.contextmanager
+def _file_lock(path: str):
+    # Exclusive lock shared by every process using the cache dir (threads are serialized separately)
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def yahoo_fetcher(ticker: str, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+    """Fetch daily prices for [start, end) from Yahoo Finance (needs the yfinance package)."""
+    import yfinance as yf
+
+    frame = yf.download(ticker, start=start, end=end, progress=False, auto_adjust=True, multi_level_index=False)
+    return frame[[c for c in FIELDS if c in frame.columns]]
+
+
+def synthetic_fetcher(ticker: str, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+    """Deterministic fake daily prices for offline runs: the same ticker and day always give the same row."""
+    origin = pd.Timestamp("2000-01-03")
+    days = pd.bdate_range(origin, max(end, origin), inclusive="left")
+    rng = np.random.default_rng(zlib.crc32(ticker.upper().encode()))
+    returns = rng.normal(0.0003, 0.02, len(days))
+    close = (50 + rng.random() * 200) * np.exp(np.cumsum(returns))
+    spread = np.abs(rng.normal(0, 0.01, len(days))) * close
+    frame = pd.DataFrame(
+        {
+            "Open": close * (1 + rng.normal(0, 0.005, len(days))),
+            "High": close + spread,
+            "Low": close - spread,
+            "Close": close,
+            "Volume": rng.integers(1_000_000, 50_000_000, len(days)),
+        },
+        index=pd.DatetimeIndex(days, name="Date"),
+    )
+    return frame[(frame.index >= start) & (frame.index < end)]
+
+
+def _merge_ranges(ranges: list[list[str]]) -> list[list[str]]:
+    merged: list[list[str]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def missing_ranges(covered: list[list[str]], start: str, end: str) -> list[tuple[str, str]]:
+    """Parts of [start, end) not inside any covered [start, end) range (ISO dates)."""
+    gaps, cursor = [], start
+    for covered_start, covered_end in _merge_ranges(covered):
+        if covered_end <= cursor:
+            continue
+        if covered_start >= end:
+            break
+        if covered_start > cursor:
+            gaps.append((cursor, covered_start))
+        cursor = max(cursor, covered_end)
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+class MarketDataCache:
+    """Daily OHLCV prices per ticker, stored on disk and filled range by range.
+
+    Args:
+        cache_dir: Directory for the per-ticker files and manifest.json.
+        offline: Use the synthetic series instead of Yahoo Finance (stored in a separate "offline" folder).
+        fetcher: Custom function (ticker, start, end) -> DataFrame, overrides the two above.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, offline: bool = OFFLINE, fetcher: Callable | None = None):
+        self.cache_dir = os.path.join(cache_dir, "offline") if offline and fetcher is None else cache_dir
+        self.fetcher = fetcher or (synthetic_fetcher if offline else yahoo_fetcher)
+        self.offline = offline
+        self.extension = "parquet" if _parquet_available() else "pkl"
+        if self.extension == "pkl":
+            warnings.warn(
+                "No Parquet engine installed (pip install pyarrow); market data is cached as pickled DataFrames.",
+                UserWarning,
+            )
+        self._lock = threading.Lock()  # Guards the per-ticker locks and the stats
+        self._ticker_locks: dict[str, threading.Lock] = {}
+        self.stats = {"requests": 0, "fetches": 0, "rows_fetched": 0}
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    # ---- storage ----------------------------------------------------------------------
+
+    @property
+    def _manifest_path(self) -> str:
+        return os.path.join(self.cache_dir, "manifest.json")
+
+    def _path(self, ticker: str) -> str:
+        return os.path.join(self.cache_dir, f"{ticker}.{self.extension}")
+
+    def _lock_path(self, name: str) -> str:
+        return os.path.join(self.cache_dir, f".{name}.lock")
+
+    def _read_manifest(self) -> dict:
+        if not os.path.exists(self._manifest_path):
+            return {}
+        with open(self._manifest_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _update_manifest(self, ticker: str, ranges: list[list[str]]) -> None:
+        # Re-read under the manifest lock and change only this ticker, so entries written by
+        # other processes since we last read it are kept
+        with _file_lock(self._lock_path("manifest")):
+            manifest = self._read_manifest()
+            manifest[ticker] = ranges
+            self._write_atomic(self._manifest_path, lambda path: self._write_json(path, manifest))
+
+    def _write_atomic(self, path: str, write: Callable[[str], None]) -> None:
+        # Write to a temporary file first so readers never see half a file
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        write(tmp)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def _write_json(path: str, data: dict) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+
+    def _read_frame(self, ticker: str) -> pd.DataFrame | None:
+        path = self._path(ticker)
+        if not os.path.exists(path):
+            return None
+        return pd.read_parquet(path) if self.extension == "parquet" else pd.read_pickle(path)
+
+    def _ticker_lock(self, ticker: str) -> threading.Lock:
+        with self._lock:
+            return self._ticker_locks.setdefault(ticker, threading.Lock())
+
+    def _count(self, **increments: int) -> None:
+        with self._lock:
+            for name, amount in increments.items():
+                self.stats[name] += amount
+
+    def _write_frame(self, ticker: str, frame: pd.DataFrame) -> None:
+        if self.extension == "parquet":
+            self._write_atomic(self._path(ticker), frame.to_parquet)
+        else:
+            self._write_atomic(self._path(ticker), frame.to_pickle)
+
+    # ---- queries ----------------------------------------------------------------------
+
+    def history(self, ticker: str, start, end) -> pd.DataFrame:
+        """Daily prices of one ticker for [start, end), fetching only the dates not cached yet."""
+        ticker = ticker.upper()
+        start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+        # One filler per ticker across threads and processes: the others wait and then read its result,
+        # while other tickers are fetched at the same time
+        self._count(requests=1)
+        with self._ticker_lock(ticker), _file_lock(self._lock_path(ticker)):
+            frame = self._read_frame(ticker)
+            # Without its file (deleted, or written with the other format before pyarrow was
+            # installed) the manifest's ranges for the ticker mean nothing: fetch them again
+            covered = self._read_manifest().get(ticker, []) if frame is not None else []
+            gaps = missing_ranges(covered, start.date().isoformat(), end.date().isoformat())
+            if gaps:
+                # Days after today can still change, so they are never marked as covered
+                today = date.today().isoformat()
+                parts = [] if frame is None else [frame]
+                for gap_start, gap_end in gaps:
+                    fetched = self.fetcher(ticker, pd.Timestamp(gap_start), pd.Timestamp(gap_end))
+                    fetched.index = pd.DatetimeIndex(fetched.index).tz_localize(None).normalize()
+                    fetched.index.name = "Date"
+                    parts.append(fetched)
+                    self._count(fetches=1, rows_fetched=len(fetched))
+                    covered.append([gap_start, min(gap_end, today) if not self.offline else gap_end])
+                frame = pd.concat(parts)
+                frame = frame[~frame.index.duplicated(keep="last")].sort_index()
+                self._write_frame(ticker, frame)
+                self._update_manifest(ticker, _merge_ranges([r for r in covered if r[0] < r[1]]))
+        if frame is None:
+            return pd.DataFrame(columns=FIELDS, index=pd.DatetimeIndex([], name="Date"))
+        return frame[(frame.index >= start) & (frame.index < end)]
+
+    def download(self, tickers: str | list[str], start, end) -> pd.DataFrame:
+        """Same layout as `yfinance.download`: columns (field, ticker), e.g. data["Close"]["META"]."""
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        frames = {ticker.upper(): self.history(ticker, start, end) for ticker in tickers}
+        data = pd.concat(frames, axis=1, names=["Ticker", "Price"])
+        return data.swaplevel(axis=1).sort_index(axis=1, level=0, sort_remaining=False)
+
+
+# One cache per process for the module-level helper
+_default_cache: MarketDataCache | None = None
+_default_cache_lock = threading.Lock()
+
+
+def get_market_data_cache() -> MarketDataCache:
+    """Return the shared cache configured by MARKET_DATA_CACHE_DIR / MARKET_DATA_OFFLINE."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = MarketDataCache()
+        return _default_cache
+
+
+def download(tickers: str | list[str], start, end) -> pd.DataFrame:
+    """Cached replacement for `yfinance.download(tickers, start=..., end=...)`."""
+    return get_market_data_cache().download(tickers, start, end)
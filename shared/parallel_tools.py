@@ -0,0 +1,148 @@
+# -----------------------------
+# PARALLEL EXECUTION OF TOOL CALLS
+# -----------------------------
+# When the model asks for several tools in one message (for example hotel info
+# AND flight status), AutoGen's executor agent runs them one after another, so a
+# turn takes the sum of all tool latencies. ParallelToolCalls replaces the
+# agent's tool-call reply functions with versions that run the calls at the same
+# time (a thread pool for normal functions, asyncio for async functions), keep
+# the results in the order the model asked for them, and apply a timeout to each
+# tool, so a turn takes about as long as its slowest tool.
+#
+# Usage:
+#     ParallelToolCalls(max_workers=8, timeout=10).add_to_agent(user_proxy)
+
+import asyncio  # For running async tools concurrently
+import time  # For per-tool deadlines
+from concurrent.futures import ThreadPoolExecutor  # For running normal (sync) tools concurrently
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any
+
+from autogen import Agent, ConversableAgent  # The executor agent and the sender type
+from autogen.fast_depends.utils import is_coroutine_callable  # Same async check AutoGen uses
+
+
+class ParallelToolCalls:
+    """Capability that makes an agent execute the tool calls of one message concurrently.
+
+    Args:
+        max_workers: Threads available for sync tools (shared by every agent this capability is added to).
+        timeout: Default seconds a single tool may run before its result is replaced by an error.
+        timeouts: Optional per-tool timeouts, e.g. {"get_flight_status": 5}.
+    """
+
+    def __init__(self, max_workers: int = 8, timeout: float | None = 30.0, timeouts: dict[str, float] | None = None):
+        self.timeout = timeout
+        self.timeouts = timeouts or {}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+
+    def add_to_agent(self, agent: ConversableAgent) -> None:
+        """Swap the agent's built-in sequential tool-call replies for the parallel ones."""
+
+        def generate_tool_calls_reply(recipient, messages=None, sender=None, config=None):
+            return self._reply(recipient, messages, sender)
+
+        async def a_generate_tool_calls_reply(recipient, messages=None, sender=None, config=None):
+            return await self._a_reply(recipient, messages, sender)
+
+        agent.replace_reply_func(ConversableAgent.generate_tool_calls_reply, generate_tool_calls_reply)
+        agent.replace_reply_func(ConversableAgent.a_generate_tool_calls_reply, a_generate_tool_calls_reply)
+
+    def _timeout_for(self, name: str) -> float | None:
+        return self.timeouts.get(name, self.timeout)
+
+    # ---- shared helpers -----------------------------------------------------------
+
+    @staticmethod
+    def _prepare(agent: ConversableAgent, tool_call: dict) -> dict:
+        # Same input hook AutoGen runs before executing a tool
+        processed_call = agent._process_tool_input(tool_call.get("function", {}))
+        if processed_call is None:
+            raise ValueError("safeguard_tool_inputs hook returned None")
+        return processed_call
+
+    @staticmethod
+    def _timed_out(name: str, seconds: float) -> dict:
+        return {"name": name, "role": "function", "content": f"Error: Tool {name} timed out after {seconds} seconds."}
+
+    @staticmethod
+    def _assemble(agent: ConversableAgent, tool_calls: list[dict], func_returns: list[dict]) -> tuple[bool, dict]:
+        # Build the same reply message AutoGen builds, in the order the model asked for the tools
+        tool_returns = []
+        for tool_call, func_return in zip(tool_calls, func_returns):
+            processed_return = agent._process_tool_output(func_return)
+            if processed_return is None:
+                raise ValueError("safeguard_tool_outputs hook returned None")
+            response = {"role": "tool", "content": processed_return.get("content", "") or ""}
+            if tool_call.get("id") is not None:
+                response = {"tool_call_id": tool_call["id"], **response}
+            tool_returns.append(response)
+        return True, {
+            "role": "tool",
+            "tool_responses": tool_returns,
+            "content": "\n\n".join(agent._str_for_tool_response(r) for r in tool_returns),
+        }
+
+    # ---- sync conversations ---------------------------------------------------------
+
+    def _reply(self, agent: ConversableAgent, messages: list[dict] | None, sender: Agent | None) -> tuple[bool, Any]:
+        if messages is None:
+            messages = agent._oai_messages[sender]
+        tool_calls = messages[-1].get("tool_calls", []) if messages else []
+        if not tool_calls:
+            return False, None
+        for tool_call in tool_calls:
+            if tool_call.get("function", {}).get("name") == "__structured_output":
+                return True, tool_call["function"].get("arguments", {})
+
+        started = time.monotonic()
+        futures = []
+        for tool_call in tool_calls:
+            call = self._prepare(agent, tool_call)
+            if is_coroutine_callable(agent.function_map.get(call.get("name"))):
+                # Each async tool gets its own event loop inside a pool thread
+                futures.append(self._pool.submit(asyncio.run, agent.a_execute_function(call, call_id=tool_call.get("id"))))
+            else:
+                futures.append(self._pool.submit(agent.execute_function, call, call_id=tool_call.get("id")))
+
+        func_returns = []
+        for tool_call, future in zip(tool_calls, futures):
+            name = tool_call.get("function", {}).get("name", "")
+            timeout = self._timeout_for(name)
+            remaining = None if timeout is None else max(0.0, started + timeout - time.monotonic())
+            try:
+                func_returns.append(future.result(timeout=remaining)[1])
+            except FutureTimeoutError:
+                # The thread keeps running in the background; the conversation moves on
+                func_returns.append(self._timed_out(name, timeout))
+        return self._assemble(agent, tool_calls, func_returns)
+
+    # ---- async conversations --------------------------------------------------------
+
+    async def _a_reply(self, agent: ConversableAgent, messages: list[dict] | None, sender: Agent | None) -> tuple[bool, Any]:
+        if messages is None:
+            messages = agent._oai_messages[sender]
+        tool_calls = messages[-1].get("tool_calls", []) if messages else []
+        if not tool_calls:
+            return False, None
+        for tool_call in tool_calls:
+            if tool_call.get("function", {}).get("name") == "__structured_output":
+                return True, tool_call["function"].get("arguments", {})
+
+        loop = asyncio.get_running_loop()
+
+        async def run_one(tool_call: dict) -> dict:
+            call = self._prepare(agent, tool_call)
+            name = call.get("name", "")
+            if is_coroutine_callable(agent.function_map.get(name)):
+                pending = agent.a_execute_function(call, call_id=tool_call.get("id"))
+            else:
+                # Sync tools must not block the event loop
+                pending = loop.run_in_executor(self._pool, lambda: agent.execute_function(call, call_id=tool_call.get("id")))
+            try:
+                return (await asyncio.wait_for(pending, self._timeout_for(name)))[1]
+            except asyncio.TimeoutError:
+                return self._timed_out(name, self._timeout_for(name))
+
+        func_returns = await asyncio.gather(*(run_one(tool_call) for tool_call in tool_calls))
+        return self._assemble(agent, tool_calls, list(func_returns))
@@ -0,0 +1,203 @@
+# -----------------------------
+# PREFIX-STABLE REQUESTS AND CACHED-TOKEN ACCOUNTING
+# -----------------------------
+# Providers cache the longest prompt prefix they have seen recently (OpenAI from
+# 1024 tokens, in 128-token steps) and bill cached tokens at a discount, but
+# only when the prefix is byte-for-byte identical. Agents resend long, stable
+# prefixes every turn: the system message, the tool schemas registered with
+# `register_for_llm`, group-chat introductions. PromptPrefixTransport sits in the
+# shared HTTP client (llm_client.py) and:
+#   - writes every completion request in one canonical layout: tools sorted by
+#     name, every JSON object with sorted keys, no insignificant whitespace, so
+#     agents and processes that register the same tools in another order or
+#     build schemas with another key order still share a prefix
+#   - reads `usage.prompt_tokens_details.cached_tokens` from every response
+#     (plain and streamed) and records cached vs uncached prompt tokens per call
+#
+# Keeping the message part of the prefix stable is up to the history: see
+# `RollingHistoryCompactor(keep_first=..., prefix_stable=True)` in history_compaction.py.
+#
+# Usage:
+#     from shared.llm_client import get_prefix_stats
+#     ...run agents...
+#     print(get_prefix_stats().stats())       # Per model: calls, prompt tokens, cached tokens, ratio
+#     print(get_prefix_stats().calls[-1])     # The last call: model, prefix hash, prompt and cached tokens
+
+import hashlib  # For prefix fingerprints
+import json  # For canonical request bodies
+import threading  # Requests come from many threads
+import zlib  # For reading compressed response bodies
+from collections import deque
+
+import httpx  # The transport interface of the shared client
+
+
+def _sorted(value):
+    # Recursively sort object keys, so equal schemas serialize to equal bytes
+    if isinstance(value, dict):
+        return {key: _sorted(value[key]) for key in sorted(value)}
+    if isinstance(value, list):
+        return [_sorted(item) for item in value]
+    return value
+
+
+def _tool_name(tool: dict) -> str:
+    return (tool.get("function") or {}).get("name") or tool.get("name") or ""
+
+
+def canonical_body(body: dict) -> dict:
+    """The request body in canonical layout: sorted tools and functions, sorted keys everywhere.
+
+    Message order is never changed; the agent's system message already comes first.
+    """
+    body = _sorted(body)
+    for key in ("tools", "functions"):
+        if isinstance(body.get(key), list):
+            body[key] = sorted(body[key], key=_tool_name)
+    return body
+
+
+def prefix_fingerprint(body: dict) -> str:
+    """Short hash of the stable prefix: model, tools and the leading system messages."""
+    messages = body.get("messages") or []
+    leading = []
+    for message in messages:
+        if message.get("role") not in ("system", "developer"):
+            break
+        leading.append(message)
+    prefix = {"model": body.get("model"), "tools": body.get("tools") or body.get("functions"), "system": leading}
+    return hashlib.sha1(json.dumps(prefix, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+def _decode(raw: bytes, encoding: str) -> bytes | None:
+    encoding = encoding.lower().strip()
+    if encoding in ("", "identity"):
+        return raw
+    if encoding in ("gzip", "deflate"):
+        try:
+            return zlib.decompress(raw, 47)  # 47 = accept zlib and gzip headers
+        except zlib.error:
+            return None
+    return None  # e.g. brotli: not measured
+
+
+def _usage(body: bytes, content_type: str) -> dict | None:
+    # The usage report of a JSON response or of the last usage chunk of a server-sent event stream
+    try:
+        if "text/event-stream" in content_type:
+            for line in reversed(body.decode("utf-8", errors="replace").splitlines()):
+                if line.startswith("data:") and '"usage"' in line:
+                    usage = json.loads(line[5:]).get("usage")
+                    if usage:
+                        return usage
+            return None
+        return json.loads(body).get("usage")
+    except (ValueError, AttributeError):
+        return None
+
+
+class PrefixStats:
+    """Cached vs uncached prompt tokens, per model and for the most recent calls."""
+
+    def __init__(self, keep_calls: int = 1000):
+        self._lock = threading.Lock()
+        self._models: dict[str, dict] = {}
+        self.calls: deque[dict] = deque(maxlen=keep_calls)
+
+    def record(self, model: str, prefix: str, usage: dict | None) -> None:
+        with self._lock:
+            totals = self._models.setdefault(model, {"calls": 0, "measured": 0, "prompt_tokens": 0, "cached_tokens": 0, "prefixes": set()})
+            totals["calls"] += 1
+            totals["prefixes"].add(prefix)
+            if usage is None:
+                return  # Stopped streams and undecodable bodies report no usage
+            prompt = usage.get("prompt_tokens") or 0
+            cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+            totals["measured"] += 1
+            totals["prompt_tokens"] += prompt
+            totals["cached_tokens"] += cached
+            self.calls.append({"model": model, "prefix": prefix, "prompt_tokens": prompt, "cached_tokens": cached, "uncached_tokens": prompt - cached})
+
+    def stats(self) -> dict:
+        """Per model: calls, calls with a usage report, prompt/cached/uncached tokens, cached ratio, distinct prefixes."""
+        with self._lock:
+            return {
+                model: {
+                    "calls": totals["calls"],
+                    "measured": totals["measured"],
+                    "prompt_tokens": totals["prompt_tokens"],
+                    "cached_tokens": totals["cached_tokens"],
+                    "uncached_tokens": totals["prompt_tokens"] - totals["cached_tokens"],
+                    "cached_ratio": round(totals["cached_tokens"] / totals["prompt_tokens"], 3) if totals["prompt_tokens"] else 0.0,
+                    "prefixes": len(totals["prefixes"]),
+                }
+                for model, totals in self._models.items()
+            }
+
+
+class _RecordingStream(httpx.SyncByteStream):
+    # Passes the response body through and records its usage report once it is closed
+
+    def __init__(self, stream: httpx.SyncByteStream, on_close):
+        self._stream = stream
+        self._on_close = on_close
+        self._body = bytearray()
+
+    def __iter__(self):
+        for chunk in self._stream:
+            self._body.extend(chunk)
+            yield chunk
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            on_close, self._on_close = self._on_close, None
+            if on_close is not None:
+                on_close(bytes(self._body))
+
+
+class PromptPrefixTransport(httpx.BaseTransport):
+    """httpx transport that sends completion requests in canonical layout and records prompt-cache use.
+
+    Args:
+        transport: The transport that sends requests.
+        canonicalize: Rewrite request bodies into the canonical layout (False = only measure).
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, canonicalize: bool = True):
+        self._transport = transport
+        self.canonicalize = canonicalize
+        self.prefix_stats = PrefixStats()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != "POST" or not request.url.path.endswith("/chat/completions"):
+            return self._transport.handle_request(request)
+        try:
+            body = json.loads(request.content)
+        except (ValueError, httpx.RequestNotRead):
+            return self._transport.handle_request(request)
+
+        if self.canonicalize:
+            body = canonical_body(body)
+            headers = request.headers.copy()
+            del headers["content-length"]  # Recomputed for the new body
+            content = json.dumps(body, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+            request = httpx.Request(request.method, request.url, headers=headers, content=content, extensions=request.extensions)
+        model = body.get("model") or "default"
+        prefix = prefix_fingerprint(body)
+
+        response = self._transport.handle_request(request)
+        if response.status_code >= 400:
+            return response
+
+        def record(raw: bytes) -> None:
+            decoded = _decode(raw, response.headers.get("content-encoding", ""))
+            usage = _usage(decoded, response.headers.get("content-type", "")) if decoded is not None else None
+            self.prefix_stats.record(model, prefix, usage)
+
+        response.stream = _RecordingStream(response.stream, record)
+        return response
+
+    def close(self) -> None:
+        self._transport.close()
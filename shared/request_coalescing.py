@@ -0,0 +1,156 @@
+# -----------------------------
+# IN-FLIGHT REQUEST COALESCING ("SINGLEFLIGHT")
+# -----------------------------
+# The response cache only helps once a reply has been stored. When many sessions
+# of the same pattern run at once (the same opening task, the same group-chat
+# introductions), identical completion requests are sent at the same moment and
+# every one of them is paid for. CoalescingTransport sits in the shared HTTP
+# client (llm_client.py) and sends only the first of a set of identical requests
+# in flight; the others wait for it and get a copy of its response.
+#
+# Requests are identical when their canonical JSON bodies are equal (same model,
+# messages, temperature, tools, ... regardless of key order) and they go to the
+# same URL. Only requests whose answer may be shared are coalesced:
+#   - "deterministic" (default): requests with temperature 0, and requests of
+#     agents built with `get_llm_config(coalesce=True)`
+#   - "all": every non-streaming completion request
+#   - "off": none
+# Streaming requests are never coalesced.
+#
+# Only the caller whose request was sent pays for it. The copies handed to the
+# waiting callers carry an `X-LLM-Coalesced: 1` header and report zero usage, so
+# `chat_result.cost`, `gather_usage_summary` and the batch runner's token budget
+# count one call, not one per caller (stats()["shared_tokens"] has what they saved).
+#
+# Usage:
+#     llm_config = get_llm_config(temperature=0.9, coalesce=True)   # Opt in a sampled agent
+#     LLM_COALESCE=all python Input_modes/never_mode_server.py --sessions 200
+#     print(get_coalescer().stats())
+
+import json  # For canonical request bodies
+import threading  # Requests come from many threads
+
+import httpx  # The transport interface of the shared client
+
+# Request header marking an agent's requests as shareable (removed before sending)
+COALESCE_HEADER = "X-LLM-Coalesce"
+
+# Response header marking a copy of another caller's response
+COALESCED_HEADER = "X-LLM-Coalesced"
+
+MODES = ("deterministic", "all", "off")
+
+
+class _Flight:
+    # One upstream request and the callers waiting for its response
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response: tuple[int, list, bytes] | None = None  # Status, raw headers, raw body
+        self.waiters = 0
+
+
+def _shared_copy(status: int, headers: list, raw: bytes, request: httpx.Request) -> tuple[httpx.Response, int]:
+    # A waiter's copy of the response: marked, and with its usage set to zero because the
+    # leader's caller already books it. Returns the copy and the tokens it did not count.
+    original = httpx.Response(status, headers=headers, content=raw)  # Decodes gzip, br, ... on read
+    try:
+        body = json.loads(original.content)
+    except (ValueError, httpx.DecodingError):
+        body = None
+    marked = httpx.Headers(headers)
+    marked[COALESCED_HEADER] = "1"
+    if not isinstance(body, dict) or not isinstance(body.get("usage"), dict):
+        return httpx.Response(status, headers=marked, content=raw, request=request), 0
+    shared_tokens = body["usage"].get("total_tokens") or 0
+    body["usage"] = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+    # The new body is sent as plain JSON
+    marked.pop("content-encoding", None)
+    marked.pop("content-length", None)
+    content = json.dumps(body, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return httpx.Response(status, headers=marked, content=content, request=request), shared_tokens
+
+
+class CoalescingTransport(httpx.BaseTransport):
+    """httpx transport that shares one upstream call among identical concurrent requests.
+
+    Args:
+        transport: The transport that really sends requests (e.g. the SchedulingTransport).
+        mode: "deterministic", "all" or "off" (see the module comment).
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, mode: str = "deterministic"):
+        if mode not in MODES:
+            raise ValueError(f"Unknown coalescing mode {mode!r}; expected one of {MODES}.")
+        self._transport = transport
+        self.mode = mode
+        self._flights: dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "upstream": 0, "coalesced": 0, "peak_waiters": 0, "shared_tokens": 0}
+
+    def _key(self, request: httpx.Request, opted_in: bool) -> str | None:
+        # The canonical body, or None when this request must be sent on its own
+        if self.mode == "off" or request.method != "POST":
+            return None
+        try:
+            body = json.loads(request.content)
+        except (ValueError, httpx.RequestNotRead):
+            return None
+        if not isinstance(body, dict) or body.get("stream"):
+            return None
+        if self.mode == "deterministic" and not opted_in and body.get("temperature") != 0:
+            return None
+        return f"{request.url}\n" + json.dumps(body, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        opted_in = request.headers.pop(COALESCE_HEADER, "").lower() in ("1", "true", "yes")
+        key = self._key(request, opted_in)
+        if key is None:
+            return self._transport.handle_request(request)
+
+        with self._lock:
+            self._stats["requests"] += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self._stats["upstream"] += 1
+            else:
+                flight.waiters += 1
+                self._stats["coalesced"] += 1
+                self._stats["peak_waiters"] = max(self._stats["peak_waiters"], flight.waiters)
+
+        if leader:
+            try:
+                response = self._transport.handle_request(request)
+                try:
+                    # The raw (still encoded) body, so every copy is decoded by its own client
+                    raw = b"".join(response.stream)
+                finally:
+                    response.close()
+                flight.response = (response.status_code, response.headers.raw, raw)
+            finally:
+                # New identical requests start a new flight; waiters of a failed flight send their own
+                with self._lock:
+                    del self._flights[key]
+                flight.done.set()
+        else:
+            flight.done.wait()
+            if flight.response is None:
+                return self._transport.handle_request(request)
+
+        status, headers, raw = flight.response
+        if leader:
+            return httpx.Response(status, headers=headers, content=raw, request=request)
+        response, shared_tokens = _shared_copy(status, headers, raw, request)
+        with self._lock:
+            self._stats["shared_tokens"] += shared_tokens
+        return response
+
+    def close(self) -> None:
+        self._transport.close()
+
+    def stats(self) -> dict:
+        """Coalescable requests, upstream calls, requests that shared a call and the tokens those copies did not count."""
+        with self._lock:
+            return dict(self._stats)
@@ -0,0 +1,174 @@
+# -----------------------------
+# BOUNDED, INSTRUMENTED LLM RESPONSE CACHE
+# -----------------------------
+# `Cache.disk(...)` keeps every response forever, lives next to one script and
+# says nothing about how often it helps. ResponseCache is a drop-in cache for
+# `initiate_chat(..., cache=...)` backed by one SQLite file that every pattern
+# (and every process) can share:
+#   - a size cap in bytes with least-recently-used eviction
+#   - an optional time-to-live for entries
+#   - safe concurrent access from many processes (SQLite WAL mode)
+#   - hit / miss / bytes-saved counters, stored in the same file
+#
+# Usage:
+#     with get_response_cache() as cache:
+#         agent.initiate_chat(other, message="...", cache=cache)
+#     print(get_response_cache().stats())
+#
+# Note: values are pickled (like AutoGen's disk cache). Only point the cache at
+# files you created yourself.
+
+import hashlib  # For short, stable cache keys
+import json  # For turning request parameters into a canonical string
+import os  # For the default cache location
+import pickle  # For storing response objects
+import sqlite3  # For a file-based store that several processes can share
+import threading  # For one connection per thread
+import time  # For TTL and LRU timestamps
+
+# Default location and limits, overridable with environment variables
+DEFAULT_CACHE_PATH = os.environ.get("LLM_CACHE_PATH", os.path.join(".cache", "responses.sqlite"))
+DEFAULT_MAX_BYTES = int(os.environ.get("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))  # 256 MB
+DEFAULT_TTL_SECONDS = float(os.environ.get("LLM_CACHE_TTL_SECONDS", "0")) or None  # 0 = never expire
+
+
+def make_key(key) -> str:
+    # AutoGen passes the request parameters (a dict) as the key; hash a canonical JSON form of it
+    if not isinstance(key, str):
+        key = json.dumps(key, sort_keys=True, default=str)
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed LRU/TTL cache implementing AutoGen's AbstractCache protocol.
+
+    Args:
+        path: SQLite file, shared by every process that uses the same path.
+        max_bytes: Size cap for stored values; least recently used entries are evicted beyond it.
+        ttl_seconds: Entries older than this are treated as missing (None = keep until evicted).
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES, ttl_seconds: float | None = DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()  # SQLite connections must not be shared between threads
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")  # Readers do not block the writer
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL,"
+                " created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+            db.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            # `timeout` makes writers wait for each other instead of failing with "database is locked"
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def _count(self, db: sqlite3.Connection, **increments: int) -> None:
+        for name, amount in increments.items():
+            db.execute(
+                "INSERT INTO counters (name, value) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + ?",
+                (name, amount, amount),
+            )
+
+    # ---- AbstractCache protocol ---------------------------------------------------
+
+    def get(self, key, default=None):
+        db = self._connect()
+        digest = make_key(key)
+        row = db.execute("SELECT value, size, created FROM entries WHERE key = ?", (digest,)).fetchone()
+        now = time.time()
+        if row is None or (self.ttl_seconds is not None and now - row[2] > self.ttl_seconds):
+            self._count(db, misses=1)
+            return default
+        db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, digest))
+        self._count(db, hits=1, bytes_saved=row[1])
+        return pickle.loads(row[0])
+
+    def set(self, key, value) -> None:
+        db = self._connect()
+        blob = pickle.dumps(value)
+        now = time.time()
+        db.execute("BEGIN IMMEDIATE")  # One writer at a time across processes
+        try:
+            db.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (make_key(key), blob, len(blob), now, now),
+            )
+            self._count(db, writes=1)
+            self._evict(db, now)
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def close(self) -> None:
+        # AutoGen enters and exits the cache around every request, so closing only drops
+        # this thread's connection; the next call opens a new one
+        db = getattr(self._local, "db", None)
+        if db is not None:
+            db.close()
+            self._local.db = None
+
+    def __enter__(self) -> "ResponseCache":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    # ---- eviction and statistics ------------------------------------------------
+
+    def _evict(self, db: sqlite3.Connection, now: float) -> None:
+        if self.ttl_seconds is not None:
+            expired = db.execute("DELETE FROM entries WHERE created < ?", (now - self.ttl_seconds,)).rowcount
+            self._count(db, evictions=max(expired, 0))
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Remove least recently used entries until the cache fits under the cap again
+        victims = []
+        for key, size in db.execute("SELECT key, size FROM entries ORDER BY accessed"):
+            if total <= self.max_bytes:
+                break
+            victims.append((key,))
+            total -= size
+        db.executemany("DELETE FROM entries WHERE key = ?", victims)
+        self._count(db, evictions=len(victims))
+
+    def stats(self) -> dict:
+        """Return counters (hits, misses, writes, evictions, bytes_saved), hit rate and current size."""
+        db = self._connect()
+        stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0, "bytes_saved": 0}
+        stats.update(dict(db.execute("SELECT name, value FROM counters").fetchall()))
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["entries"], stats["bytes"] = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return stats
+
+    def clear(self) -> None:
+        """Remove every entry and reset the counters."""
+        db = self._connect()
+        db.execute("DELETE FROM entries")
+        db.execute("DELETE FROM counters")
+
+
+# One cache object per path, shared by every agent in the process
+_caches: dict[str, ResponseCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_response_cache(path: str = DEFAULT_CACHE_PATH) -> ResponseCache:
+    """Return the shared ResponseCache for `path` (created on first use with the default limits)."""
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = ResponseCache(path)
+        return _caches[path]
@@ -0,0 +1,390 @@
+# -----------------------------
+# PRE-FORKED SANDBOX POOL FOR CODE EXECUTION (LINUX)
+# -----------------------------
+# `code_execution_config={"work_dir": "my_code", "use_docker": False}` runs every
+# conversation's code in one shared folder and starts a new Python process per
+# code block. That is fine for one chat, but many chats at once would overwrite
+# each other's files and pay the start-up cost again and again.
+#
+# SandboxPool starts a few warm worker processes once. For every code block a
+# worker forks a short-lived child (fast: imports are already loaded), which
+#   - runs in the session's own scratch directory
+#   - gets CPU-time, memory and file-size limits (setrlimit)
+#   - is killed with its whole process group when it exceeds the wall-clock timeout
+# Jobs wait in a bounded queue; when it is full, new jobs are rejected right away.
+#
+# Usage:
+#     pool = get_sandbox_pool()                                   # shared by every agent in the process
+#     user_proxy = UserProxyAgent(..., code_execution_config={"executor": PooledCodeExecutor(pool)})
+#
+# The limits protect the machine from runaway code; they are not a security
+# boundary like Docker. Requires a POSIX system with fork (Linux, macOS).
+
+import json  # Jobs and results are exchanged as JSON lines
+import os  # For folders, environment and fork checks
+import queue  # For the bounded job queue
+import shutil  # For removing session folders
+import subprocess  # For the worker processes
+import sys  # For the current Python interpreter
+import threading  # One dispatcher thread per worker
+import uuid  # For session ids
+from concurrent.futures import Future
+from hashlib import md5  # Same file naming as AutoGen's local executor
+from pathlib import Path
+
+from autogen.code_utils import PYTHON_VARIANTS, TIMEOUT_MSG
+from autogen.coding import CodeBlock, CodeExtractor, MarkdownCodeExtractor
+from autogen.coding.base import CommandLineCodeResult
+from autogen.coding.utils import _get_file_name_from_content
+
+DEFAULT_BASE_DIR = os.environ.get("SANDBOX_BASE_DIR", os.path.join(".cache", "sandboxes"))
+SHELL_LANGUAGES = ["bash", "shell", "sh"]
+
+# Program run by every worker. It reads one JSON job per line, forks a child per
+# job, and answers with the child's exit code and output.
+WORKER_SOURCE = r"""
+import importlib, json, os, resource, signal, sys, tempfile, time, traceback
+
+answers = os.fdopen(os.dup(1), "w", encoding="utf-8", buffering=1)
+devnull = os.open(os.devnull, os.O_RDWR)
+os.dup2(devnull, 1)
+os.dup2(devnull, 2)
+for module in json.loads(sys.argv[1]):
+    try:
+        importlib.import_module(module)
+    except Exception:
+        pass
+
+def limit(name, value, headroom=0):
+    # The soft limit triggers a catchable signal/error; the hard limit is the final stop
+    if value:
+        try:
+            resource.setrlimit(name, (value, value + headroom))
+        except (ValueError, OSError):
+            pass
+
+def run_child(job, capture):
+    os.setsid()  # Own process group, so the whole tree can be killed
+    os.chdir(job["dir"])
+    os.dup2(os.open(os.devnull, os.O_RDONLY), 0)  # Not the worker's job pipe: input() gets EOF instead of hanging
+    os.dup2(capture.fileno(), 1)
+    os.dup2(capture.fileno(), 2)
+    limit(resource.RLIMIT_CPU, job["cpu_seconds"], headroom=1)
+    limit(resource.RLIMIT_AS, job["memory_bytes"])
+    limit(resource.RLIMIT_FSIZE, job["file_bytes"])
+    if job["language"] != "python":
+        os.execvp("bash", ["bash", job["filename"]])
+    code = 0
+    try:
+        sys.argv = [job["filename"]]
+        sys.path.insert(0, job["dir"])
+        exec(compile(job["code"], job["filename"], "exec"), {"__name__": "__main__", "__file__": job["filename"]})
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except BaseException as e:
+        traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+        code = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    os._exit(code)
+
+for line in sys.stdin:
+    job = json.loads(line)
+    capture = tempfile.TemporaryFile()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            run_child(job, capture)
+        finally:
+            os._exit(1)
+    deadline = time.monotonic() + job["timeout"]
+    pause, timed_out = 0.001, False
+    while True:
+        done, status = os.waitpid(pid, os.WNOHANG)
+        if done:
+            break
+        if time.monotonic() > deadline:
+            timed_out = True
+            try:
+                os.killpg(pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass  # Exited just now; waitpid below still collects it
+            _, status = os.waitpid(pid, 0)
+            break
+        time.sleep(pause)
+        pause = min(pause * 2, 0.02)
+    try:
+        os.killpg(pid, signal.SIGKILL)  # Clean up anything the code left running in the background
+    except (ProcessLookupError, PermissionError):
+        pass
+    exit_code = os.waitstatus_to_exitcode(status)
+    capture.seek(0)
+    output = capture.read(job["max_output_bytes"]).decode("utf-8", errors="replace")
+    capture.close()
+    if timed_out:
+        exit_code = 124
+    elif exit_code == -signal.SIGXCPU:
+        exit_code, output = 124, output + "\nCPU time limit exceeded"
+    elif exit_code < 0:
+        output += f"\nKilled by signal {signal.Signals(-exit_code).name}"
+    answers.write(json.dumps({"exit_code": exit_code, "output": output, "timed_out": timed_out}) + "\n")
+"""
+
+
+class SandboxPoolFull(RuntimeError):
+    """Raised when a job is submitted while the pool's queue is full."""
+
+
+class _Worker:
+    """One warm worker process plus the dispatcher thread that feeds it jobs."""
+
+    def __init__(self, pool: "SandboxPool", index: int):
+        self.pool = pool
+        self.process: subprocess.Popen | None = None
+        self.thread = threading.Thread(target=self._serve, daemon=True, name=f"sandbox-worker-{index}")
+        self._start_process()
+        self.thread.start()
+
+    def _start_process(self) -> None:
+        self.process = subprocess.Popen(
+            [self.pool.python, "-u", "-c", WORKER_SOURCE, json.dumps(self.pool.preload)],
+            env=self.pool.env,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+        )
+
+    def _serve(self) -> None:
+        while True:
+            item = self.pool._jobs.get()
+            if item is None:  # Shutdown
+                break
+            job, future = item
+            if not future.set_running_or_notify_cancel():
+                self.pool._job_done()
+                continue
+            try:
+                if self.process.poll() is not None:
+                    self._start_process()
+                self.process.stdin.write(json.dumps(job) + "\n")
+                self.process.stdin.flush()
+                line = self.process.stdout.readline()
+                if not line:
+                    self._start_process()
+                    raise RuntimeError("Sandbox worker exited unexpectedly.")
+                future.set_result(json.loads(line))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                self.pool._job_done()
+
+    def stop(self) -> None:
+        if self.process is not None and self.process.poll() is None:
+            self.process.stdin.close()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+class SandboxPool:
+    """Pool of pre-forked workers that run code blocks with per-session folders and resource limits.
+
+    Args:
+        size: Number of warm workers, i.e. code blocks that can run at the same time.
+        max_queue: Jobs that may wait for a free worker; beyond that `submit` raises SandboxPoolFull.
+        base_dir: Folder holding one scratch directory per session.
+        timeout: Default wall-clock seconds per code block.
+        cpu_seconds: CPU-time limit per code block (RLIMIT_CPU).
+        memory_mb: Address-space limit per code block (RLIMIT_AS); None = unlimited.
+        file_mb: Largest file a code block may write (RLIMIT_FSIZE).
+        max_output_bytes: Output returned to the agent per block.
+        preload: Modules every worker imports once at start, so forked children get them for free.
+        env: Extra environment variables for the workers.
+    """
+
+    def __init__(
+        self,
+        size: int = 4,
+        max_queue: int = 32,
+        base_dir: str = DEFAULT_BASE_DIR,
+        timeout: float = 60,
+        cpu_seconds: int = 30,
+        memory_mb: int | None = 1024,
+        file_mb: int = 100,
+        max_output_bytes: int = 64 * 1024,
+        preload: list[str] | tuple[str, ...] = (),
+        env: dict[str, str] | None = None,
+        python: str | None = None,
+    ):
+        if not hasattr(os, "fork"):
+            raise RuntimeError("SandboxPool needs a POSIX system with fork(); use LocalCommandLineCodeExecutor instead.")
+        self.base_dir = Path(base_dir).resolve()
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        self.timeout = timeout
+        self.limits = {
+            "cpu_seconds": cpu_seconds,
+            "memory_bytes": memory_mb * 1024 * 1024 if memory_mb else 0,
+            "file_bytes": file_mb * 1024 * 1024,
+            "max_output_bytes": max_output_bytes,
+        }
+        self.preload = list(preload)
+        self.env = {**os.environ, **(env or {})}
+        self.python = python or sys.executable
+        self._jobs: queue.Queue = queue.Queue()
+        self._max_queue = max_queue
+        self._lock = threading.Lock()
+        self._pending = 0  # Jobs queued or running
+        self.stats = {"submitted": 0, "completed": 0, "rejected": 0, "timeouts": 0, "peak_pending": 0}
+        self._workers = [_Worker(self, i) for i in range(size)]
+        self._size = size
+
+    # ---- jobs -------------------------------------------------------------------------
+
+    def submit(self, session_id: str, language: str, code: str, filename: str, timeout: float | None = None) -> Future:
+        """Queue one code block; the Future resolves to {"exit_code", "output", "timed_out"}."""
+        directory = str(self.session_dir(session_id))  # Rejects invalid session ids before anything is counted
+        with self._lock:
+            if self._pending >= self._size + self._max_queue:
+                self.stats["rejected"] += 1
+                raise SandboxPoolFull(f"Sandbox queue is full ({self._max_queue} waiting jobs).")
+            self._pending += 1
+            self.stats["submitted"] += 1
+            self.stats["peak_pending"] = max(self.stats["peak_pending"], self._pending)
+        job = {
+            "dir": directory,
+            "language": "python" if language.lower() in [v.lower() for v in PYTHON_VARIANTS] else "bash",
+            "code": code,
+            "filename": filename,
+            "timeout": timeout or self.timeout,
+            **self.limits,
+        }
+        future: Future = Future()
+        future.add_done_callback(self._count_result)
+        self._jobs.put((job, future))
+        return future
+
+    def run(self, session_id: str, language: str, code: str, filename: str, timeout: float | None = None) -> dict:
+        """Run one code block and wait for its result."""
+        return self.submit(session_id, language, code, filename, timeout).result()
+
+    def _job_done(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def _count_result(self, future: Future) -> None:
+        with self._lock:
+            self.stats["completed"] += 1
+            if not future.cancelled() and future.exception() is None and future.result()["timed_out"]:
+                self.stats["timeouts"] += 1
+
+    # ---- sessions ---------------------------------------------------------------------
+
+    def _session_path(self, session_id: str) -> Path:
+        # A session id names one folder directly under base_dir; "../x" or "a/b" would leave the sandbox root
+        if not session_id or session_id in (".", "..") or os.path.basename(session_id) != session_id or "\\" in session_id:
+            raise ValueError(f"Invalid session id {session_id!r}: it must be a single plain folder name.")
+        return self.base_dir / session_id
+
+    def session_dir(self, session_id: str) -> Path:
+        """Scratch directory of a session (created on first use)."""
+        path = self._session_path(session_id)
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def close_session(self, session_id: str) -> None:
+        """Delete a session's scratch directory."""
+        shutil.rmtree(self._session_path(session_id), ignore_errors=True)
+
+    # ---- lifecycle --------------------------------------------------------------------
+
+    def shutdown(self) -> None:
+        for _ in self._workers:
+            self._jobs.put(None)
+        for worker in self._workers:
+            worker.thread.join(timeout=5)
+            worker.stop()
+
+    def __enter__(self) -> "SandboxPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
+
+
+class PooledCodeExecutor:
+    """AutoGen CodeExecutor that runs a conversation's code blocks in a SandboxPool session.
+
+    Args:
+        pool: The shared SandboxPool.
+        session_id: Name of the scratch directory; a new random one by default.
+        timeout: Wall-clock seconds per block (defaults to the pool's timeout).
+        cleanup: Delete the scratch directory when the executor is restarted or garbage collected.
+    """
+
+    def __init__(self, pool: SandboxPool, session_id: str | None = None, timeout: float | None = None, cleanup: bool = False):
+        self.pool = pool
+        self.session_id = session_id or uuid.uuid4().hex[:12]
+        self._timeout = timeout
+        self._cleanup = cleanup
+
+    @property
+    def code_extractor(self) -> CodeExtractor:
+        return MarkdownCodeExtractor()
+
+    @property
+    def work_dir(self) -> Path:
+        return self.pool.session_dir(self.session_id)
+
+    def execute_code_blocks(self, code_blocks: list[CodeBlock]) -> CommandLineCodeResult:
+        """Run the blocks one after another in this session's folder; stops at the first failure."""
+        output, exit_code, code_file = "", 0, None
+        work_dir = self.work_dir
+        for block in code_blocks:
+            language = block.language.lower()
+            if language not in [v.lower() for v in PYTHON_VARIANTS] + SHELL_LANGUAGES:
+                return CommandLineCodeResult(exit_code=1, output=output + f"\nunknown language {language}", code_file=code_file)
+            try:
+                filename = _get_file_name_from_content(block.code, work_dir)
+            except ValueError:
+                return CommandLineCodeResult(exit_code=1, output="Filename is not in the workspace")
+            extension = "py" if language in [v.lower() for v in PYTHON_VARIANTS] else "sh"
+            path = (work_dir / (filename or f"tmp_code_{md5(block.code.encode()).hexdigest()}.{extension}")).resolve()
+            path.write_text(block.code, encoding="utf-8")
+            code_file = code_file or str(path)
+            try:
+                result = self.pool.run(self.session_id, language, block.code, str(path), self._timeout)
+            except SandboxPoolFull as e:
+                return CommandLineCodeResult(exit_code=1, output=output + f"\n{e} Try again later.", code_file=code_file)
+            output += result["output"]
+            exit_code = result["exit_code"]
+            if result["timed_out"]:
+                output += "\n" + TIMEOUT_MSG
+            if exit_code != 0:
+                break
+        return CommandLineCodeResult(exit_code=exit_code, output=output, code_file=code_file)
+
+    def restart(self) -> None:
+        """Start over with an empty scratch directory."""
+        self.pool.close_session(self.session_id)
+
+    def __del__(self):
+        if getattr(self, "_cleanup", False):
+            self.pool.close_session(self.session_id)
+
+
+# One pool per process, shared by every agent that executes code
+_default_pool: SandboxPool | None = None
+_default_pool_lock = threading.Lock()
+
+
+def get_sandbox_pool(**kwargs) -> SandboxPool:
+    """Return the shared SandboxPool, creating it with `kwargs` on first use."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = SandboxPool(**kwargs)
+        return _default_pool
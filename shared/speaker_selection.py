@@ -0,0 +1,134 @@
+# -----------------------------
+# LLM-FREE SPEAKER SELECTION FOR GROUP CHATS
+# -----------------------------
+# With speaker_selection_method="auto", the GroupChatManager asks the LLM who should
+# speak next on every round, so each round costs two model calls. DescriptionRouter
+# picks the next speaker locally by comparing the last message with each agent's
+# `description` (and system message) using a TF-IDF keyword index. Only when the
+# match is weak does it hand the decision back to the LLM ("auto").
+#
+# Usage:
+#     group_chat = GroupChat(agents=[...], messages=[], max_round=6,
+#                            speaker_selection_method=DescriptionRouter())
+
+import math  # For TF-IDF weights and vector norms
+import re  # For splitting text into words
+from collections import Counter, OrderedDict  # Word counts and the LRU routing table
+
+from autogen import Agent, GroupChat  # Types passed to custom speaker selection functions
+
+# Very common words that say nothing about which agent should answer
+STOP_WORDS = {
+    "a", "about", "also", "an", "and", "are", "as", "at", "be", "best", "by", "can", "do", "for", "from", "given",
+    "have", "help", "i", "in", "is", "it", "me", "my", "of", "on", "or", "please", "that", "the", "this", "to",
+    "will", "with", "you", "your",
+}
+
+
+def tokenize(text: str) -> list[str]:
+    """Lower-case words with a light stemming step ("hotels" -> "hotel", "suggests" -> "suggest")."""
+    words = []
+    for word in re.findall(r"[a-z]+", (text or "").lower()):
+        if word in STOP_WORDS or len(word) < 3:
+            continue
+        for suffix in ("ies", "ing", "es", "ed", "s"):
+            if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+                word = word[: -len(suffix)] + ("y" if suffix == "ies" else "")
+                break
+        words.append(word)
+    return words
+
+
+class DescriptionRouter:
+    """Custom `speaker_selection_method` that routes by agent descriptions.
+
+    Args:
+        threshold: Minimum cosine similarity for a local decision.
+        margin: Minimum lead of the best agent over the runner-up.
+        allow_repeat: Whether the last speaker may be chosen again.
+        include_system_message: Also index each agent's system message, not only its description.
+        extra_keywords: Optional {agent_name: [words]} to strengthen an agent's profile.
+        cache_size: Number of routing decisions remembered in the LRU routing table.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.1,
+        margin: float = 0.02,
+        allow_repeat: bool = False,
+        include_system_message: bool = True,
+        extra_keywords: dict[str, list[str]] | None = None,
+        cache_size: int = 1024,
+    ):
+        self.threshold = threshold
+        self.margin = margin
+        self.allow_repeat = allow_repeat
+        self.include_system_message = include_system_message
+        self.extra_keywords = extra_keywords or {}
+        self.cache_size = cache_size
+        self._index_key = None  # Names of the agents the index was built for
+        self._vectors: dict[str, dict[str, float]] = {}
+        self._idf: dict[str, float] = {}
+        self._routes: OrderedDict = OrderedDict()  # (candidates, query words) -> agent name or None
+        self.stats = {"local": 0, "cache_hits": 0, "llm_fallbacks": 0}
+
+    # ---- index ----------------------------------------------------------------
+
+    def _profile(self, agent: Agent) -> list[str]:
+        text = f"{agent.name.replace('_', ' ')} {agent.description}"
+        if self.include_system_message and getattr(agent, "system_message", None):
+            text += " " + agent.system_message
+        return tokenize(text) + tokenize(" ".join(self.extra_keywords.get(agent.name, [])))
+
+    def _build_index(self, agents: list[Agent]) -> None:
+        profiles = {agent.name: Counter(self._profile(agent)) for agent in agents}
+        # Words found in every profile get a weight of zero
+        document_frequency = Counter(word for counts in profiles.values() for word in counts)
+        self._idf = {word: math.log(len(profiles) / df) for word, df in document_frequency.items()}
+        self._vectors = {name: self._weigh(counts) for name, counts in profiles.items()}
+        self._index_key = tuple(agent.name for agent in agents)
+        self._routes.clear()
+
+    def _weigh(self, counts: Counter) -> dict[str, float]:
+        vector = {word: (1 + math.log(n)) * self._idf.get(word, 0.0) for word, n in counts.items()}
+        norm = math.sqrt(sum(w * w for w in vector.values())) or 1.0
+        return {word: w / norm for word, w in vector.items() if w}
+
+    # ---- selection ------------------------------------------------------------
+
+    def rank(self, text: str, candidates: list[Agent]) -> list[tuple[float, Agent]]:
+        """Return (similarity, agent) pairs for the candidates, best first."""
+        query = self._weigh(Counter(tokenize(text)))
+        scored = [(sum(w * self._vectors[a.name].get(word, 0.0) for word, w in query.items()), a) for a in candidates]
+        return sorted(scored, key=lambda pair: pair[0], reverse=True)
+
+    def __call__(self, last_speaker: Agent, groupchat: GroupChat) -> Agent | str:
+        if self._index_key != tuple(agent.name for agent in groupchat.agents):
+            self._build_index(groupchat.agents)
+
+        candidates = [a for a in groupchat.agents if self.allow_repeat or a is not last_speaker]
+        text = groupchat.messages[-1].get("content") if groupchat.messages else ""
+        text = text if isinstance(text, str) else str(text or "")
+
+        # Look the decision up in the routing table first
+        key = (tuple(a.name for a in candidates), tuple(sorted(set(tokenize(text)))))
+        if key in self._routes:
+            self._routes.move_to_end(key)
+            self.stats["cache_hits"] += 1
+            name = self._routes[key]
+        else:
+            ranked = self.rank(text, candidates)
+            best = ranked[0][0] if ranked else 0.0
+            runner_up = ranked[1][0] if len(ranked) > 1 else 0.0
+            confident = best >= self.threshold and best - runner_up >= self.margin
+            name = ranked[0][1].name if confident else None
+            self._routes[key] = name
+            if len(self._routes) > self.cache_size:
+                self._routes.popitem(last=False)
+
+        if name is None:
+            # Low confidence: let the GroupChatManager ask the LLM as usual
+            self.stats["llm_fallbacks"] += 1
+            return "auto"
+        self.stats["local"] += 1
+        return groupchat.agent_by_name(name)
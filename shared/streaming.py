@@ -0,0 +1,262 @@
+# -----------------------------
+# TOKEN STREAMING FOR AGENT REPLIES
+# -----------------------------
+# `agent.generate_reply(...)` returns only after the whole completion has been
+# generated, so a user-facing app shows nothing for seconds. StreamingConversableAgent
+# adds `stream_reply` (a normal iterator) and `a_stream_reply` (an async iterator)
+# that yield the reply text piece by piece as the model produces it, and measure
+# time-to-first-token and tokens per second.
+#
+# Usage:
+#     agent = StreamingConversableAgent(name="chatbot", llm_config=get_llm_config())
+#     stream = agent.stream_reply(messages=[{"role": "user", "content": "Tell me a joke."}])
+#     for text in stream:
+#         print(text, end="", flush=True)
+#     print(stream.metrics)           # TTFT 0.41 s, 38 tokens, 52.3 tokens/s
+#
+#     async for text in agent.a_stream_reply(messages=...):
+#         ...
+#
+# `stop_on` takes an incremental matcher (see termination.py): the stream is
+# closed as soon as it fires, which also stops the generation on the server.
+#
+# Streamed replies bypass OpenAIWrapper.create, so AutoGen's response cache
+# (`cache=`/`cache_seed`) is not used for them. Their usage and cost are added to
+# the agent's `client.total_usage_summary` when the stream ends, so `chat_result.cost`
+# and `gather_usage_summary` include streamed turns. A stream stopped early gets no
+# usage report from the API: only the received chunks are counted, no prompt tokens.
+
+import asyncio  # For the async iterator
+import threading  # For running the blocking HTTP stream next to the event loop
+import time  # For latency measurements
+import uuid  # Invocation ids for runtime logging
+from typing import Any, AsyncIterator, Iterator
+
+from autogen import Agent, ConversableAgent, OpenAIWrapper, runtime_logging
+from autogen.logger.logger_utils import get_current_ts
+from openai.types.chat import ChatCompletion
+
+
+class StreamMetrics:
+    """Latency figures of one streamed reply."""
+
+    def __init__(self):
+        self.time_to_first_token: float | None = None  # Seconds from the request to the first text
+        self.total_seconds: float = 0.0  # Seconds from the request to the last chunk
+        self.completion_tokens: int = 0  # From the API's usage report, else one per chunk
+        self.prompt_tokens: int = 0  # From the API's usage report (0 when the stream was stopped early)
+        self.cached_tokens: int = 0  # Prompt tokens served from the provider's prompt-prefix cache
+
+    @property
+    def tokens_per_second(self) -> float:
+        # Generation speed after the first token arrived
+        if self.time_to_first_token is None:
+            return 0.0
+        generating = self.total_seconds - self.time_to_first_token
+        return self.completion_tokens / generating if generating > 0 else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "time_to_first_token": self.time_to_first_token,
+            "total_seconds": self.total_seconds,
+            "completion_tokens": self.completion_tokens,
+            "tokens_per_second": self.tokens_per_second,
+        }
+
+    def __str__(self) -> str:
+        ttft = "n/a" if self.time_to_first_token is None else f"{self.time_to_first_token:.2f} s"
+        return f"TTFT {ttft}, {self.completion_tokens} tokens, {self.tokens_per_second:.1f} tokens/s"
+
+
+class ReplyStream:
+    """Iterator over the text of one streamed completion.
+
+    After iteration `text` holds the full reply, `message` the assembled assistant
+    message (including any tool calls) and `metrics` the latency figures.
+    With `stop_on` (an object whose `feed(text)` returns a rule name once it matches),
+    the stream ends right after the piece that matched and `stopped_by` holds the name.
+    """
+
+    def __init__(self, oai_client, params: dict[str, Any], stop_on=None, source: Agent | None = None, on_complete=None):
+        self._client = oai_client
+        self._params = params
+        self._source = source  # Agent reported to AutoGen's runtime logging
+        self._on_complete = on_complete  # Called with the assembled ChatCompletion, returns its cost
+        self._stop = threading.Event()  # Set to abandon the stream early
+        self._stop_on = stop_on
+        self.stopped_by: str | None = None
+        self.text = ""
+        self.message: dict[str, Any] = {"role": "assistant", "content": None}
+        self.metrics = StreamMetrics()
+
+    def __iter__(self) -> Iterator[str]:
+        started = time.perf_counter()
+        started_ts = get_current_ts()
+        pieces: list[str] = []
+        tool_calls: dict[int, dict] = {}
+        chunks = 0
+        stream = self._client.chat.completions.create(**self._params, stream=True, stream_options={"include_usage": True})
+        try:
+            for chunk in stream:
+                if self._stop.is_set():
+                    break
+                if chunk.usage is not None:
+                    self.metrics.completion_tokens = chunk.usage.completion_tokens
+                    self.metrics.prompt_tokens = chunk.usage.prompt_tokens
+                    details = chunk.usage.prompt_tokens_details
+                    self.metrics.cached_tokens = (details.cached_tokens if details is not None else 0) or 0
+                for choice in chunk.choices:
+                    delta = choice.delta
+                    for call in delta.tool_calls or []:
+                        # Tool call names and arguments arrive in fragments; join them per index
+                        entry = tool_calls.setdefault(call.index, {"id": None, "type": "function", "function": {"name": "", "arguments": ""}})
+                        entry["id"] = call.id or entry["id"]
+                        if call.function is not None:
+                            entry["function"]["name"] += call.function.name or ""
+                            entry["function"]["arguments"] += call.function.arguments or ""
+                    if delta.content:
+                        if self.metrics.time_to_first_token is None:
+                            self.metrics.time_to_first_token = time.perf_counter() - started
+                        chunks += 1
+                        pieces.append(delta.content)
+                        yield delta.content
+                        if self._stop_on is not None and self._stop_on.feed(delta.content):
+                            # Closing the response (below) cancels the rest of the generation
+                            self.stopped_by = self._stop_on.fired
+                            return
+            if self._stop_on is not None and hasattr(self._stop_on, "finish"):
+                self._stop_on.finish()  # The whole reply arrived: settle matches held back at its end
+        finally:
+            stream.close()
+            self.metrics.total_seconds = time.perf_counter() - started
+            self.metrics.completion_tokens = self.metrics.completion_tokens or chunks
+            self.text = "".join(pieces)
+            self.message = {"role": "assistant", "content": self.text or None}
+            if tool_calls:
+                self.message["tool_calls"] = [tool_calls[i] for i in sorted(tool_calls)]
+            response = self._as_completion()
+            cost = self._on_complete(response) if self._on_complete is not None else 0.0
+            if runtime_logging.logging_enabled():
+                # Report the streamed reply like a normal completion, so runtime loggers (SQLite, file,
+                # telemetry) see streamed turns too
+                runtime_logging.log_chat_completion(uuid.uuid4(), id(self._client), id(self), self._source or "stream", self._params, response, 0, cost, started_ts)
+
+    def _as_completion(self) -> ChatCompletion:
+        # The streamed reply as the ChatCompletion a non-streamed request would have returned
+        return ChatCompletion.model_validate({
+            "id": f"stream-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": self._params.get("model", ""),
+            "choices": [{"index": 0, "message": self.message, "finish_reason": "tool_calls" if self.message.get("tool_calls") else "stop"}],
+            "usage": {
+                "prompt_tokens": self.metrics.prompt_tokens,
+                "completion_tokens": self.metrics.completion_tokens,
+                "total_tokens": self.metrics.prompt_tokens + self.metrics.completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": self.metrics.cached_tokens},
+            },
+        })
+
+    def close(self) -> None:
+        self._stop.set()
+
+
+class AsyncReplyStream:
+    """Async iterator over a ReplyStream; the blocking HTTP stream runs in a helper thread."""
+
+    def __init__(self, stream: ReplyStream):
+        self._stream = stream
+
+    @property
+    def text(self) -> str:
+        return self._stream.text
+
+    @property
+    def message(self) -> dict[str, Any]:
+        return self._stream.message
+
+    @property
+    def metrics(self) -> StreamMetrics:
+        return self._stream.metrics
+
+    @property
+    def stopped_by(self) -> str | None:
+        return self._stream.stopped_by
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()  # Marks the end of the stream
+
+        def pump():
+            try:
+                for piece in self._stream:
+                    loop.call_soon_threadsafe(queue.put_nowait, piece)
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+            except BaseException as e:  # Hand errors to the consumer
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+
+        worker = threading.Thread(target=pump, daemon=True, name="reply-stream")
+        worker.start()
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            self._stream.close()  # Stops the helper thread if the consumer gave up early
+            await asyncio.to_thread(worker.join)
+
+
+def _usage_booker(wrapper: OpenAIWrapper, model_client, price: list[float] | None):
+    # Adds a streamed reply to the wrapper's usage summaries, the way OpenAIWrapper.create does for
+    # an uncached reply, and returns its cost
+    def book(response: ChatCompletion) -> float:
+        response.cost = wrapper._cost_with_customized_price(response, price) if price is not None else model_client.cost(response)
+        usage = model_client.get_usage(response)
+        wrapper._update_usage(actual_usage=usage, total_usage=usage)
+        return response.cost
+
+    return book
+
+
+def open_reply_stream(agent: ConversableAgent, messages: list[dict[str, Any]], stop_on=None, **overrides: Any) -> ReplyStream:
+    """Streamed LLM request of `agent` for already pre-processed `messages` (its system message is added).
+
+    The reply's usage is added to `agent.client`'s usage summaries when the stream ends.
+    """
+    if not isinstance(agent.client, OpenAIWrapper) or not agent.client._clients:
+        raise ValueError(f"Agent {agent.name} has no LLM configured, so it cannot stream a reply.")
+    model_client = agent.client._clients[0]
+    oai_client = getattr(model_client, "_oai_client", None)
+    if oai_client is None:
+        raise ValueError("Streaming is only supported for OpenAI-compatible clients.")
+    config = {k: v for k, v in agent.client._config_list[0].items() if k not in OpenAIWrapper.extra_kwargs}
+    config.pop("stream", None)
+    book = _usage_booker(agent.client, model_client, agent.client._config_list[0].get("price"))
+    return ReplyStream(oai_client, {**config, **overrides, "messages": agent._oai_system_message + messages}, stop_on, source=agent, on_complete=book)
+
+
+class StreamingConversableAgent(ConversableAgent):
+    """ConversableAgent that can also stream its LLM reply token by token."""
+
+    def _stream_request(self, messages: list[dict[str, Any]] | None, sender: Agent | None, overrides: dict[str, Any]) -> ReplyStream:
+        if messages is None:
+            messages = self._oai_messages[sender]
+        # Same pre-processing as generate_reply (e.g. history compaction)
+        return open_reply_stream(self, self.process_all_messages_before_reply(messages), **overrides)
+
+    def stream_reply(self, messages: list[dict[str, Any]] | None = None, sender: Agent | None = None, **overrides: Any) -> ReplyStream:
+        """Stream the LLM reply to `messages` (or to the conversation with `sender`).
+
+        Extra keyword arguments override request parameters such as `temperature`.
+        Like `generate_reply`, the reply is not added to the conversation history.
+        """
+        return self._stream_request(messages, sender, overrides)
+
+    def a_stream_reply(self, messages: list[dict[str, Any]] | None = None, sender: Agent | None = None, **overrides: Any) -> AsyncReplyStream:
+        """Async version of `stream_reply`, used as `async for text in agent.a_stream_reply(...)`."""
+        return AsyncReplyStream(self._stream_request(messages, sender, overrides))
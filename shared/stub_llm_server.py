@@ -0,0 +1,419 @@
+# -----------------------------
+# OFFLINE STAND-IN FOR THE OPENAI CHAT COMPLETIONS API
+# -----------------------------
+# A small OpenAI-compatible HTTP server with deterministic, scripted replies.
+# It lets every example run without an API key, so we can measure how much time
+# the agent framework itself spends per turn.
+#
+# Usage (in-process):
+#     with StubLLMServer() as server:
+#         os.environ["OPENAI_BASE_URL"] = server.base_url
+#         ...run agents...
+#         print(server.stats())
+#
+# Usage (standalone):
+#     python shared/stub_llm_server.py --port 8765 --latency 0.05
+#
+# Requests with "stream": true are answered as server-sent events, one chunk per
+# word, like the real API (`--token-latency` simulates the time between tokens).
+#     OPENAI_BASE_URL=http://127.0.0.1:8765/v1 python Tools/Travel_tools.py
+#
+# `--max-concurrent N` answers requests beyond N at a time with 429 and a
+# Retry-After header, like a rate-limited account.
+#
+# Prompt caching is simulated like OpenAI's: a prompt of at least
+# `--cache-min-tokens` (1024) whose leading bytes (tools, then messages, in
+# 128-token blocks) match a recent prompt reports those tokens in
+# usage.prompt_tokens_details.cached_tokens.
+
+import argparse  # For the standalone command line interface
+import hashlib  # For prompt-prefix cache keys
+import json  # For reading requests and writing responses
+import re  # For pulling names, numbers and places out of prompts
+import threading  # For serving requests in the background
+import time  # For timestamps and simulated latency
+import uuid  # For unique completion ids
+from collections import OrderedDict  # Prompt-prefix cache in LRU order
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # Standard library HTTP server
+
+# Phrase used by GroupChat when it asks the model to pick the next speaker
+SPEAKER_SELECTION_MARKER = "select the next role from"
+
+
+def approx_tokens(text: str) -> int:
+    # Rough token estimate (about four characters per token), good enough for a stand-in
+    return max(1, len(text) // 4)
+
+
+# Prompt caching: 128-token blocks (about 4 characters per token), like the real API
+CACHE_BLOCK_CHARS = 128 * 4
+
+
+def _content_text(message: dict) -> str:
+    # Message content can be a string, None, or a list of multimodal parts
+    content = message.get("content")
+    if content is None:
+        return ""
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return str(content)
+
+
+class ScriptedResponder:
+    """Turns a chat completion request into a deterministic reply.
+
+    Rules are checked in order:
+      1. User supplied `rules` (regex on the last message -> fixed reply or tool calls).
+      2. GroupChat speaker selection -> the next agent name, round robin.
+      3. Tools offered and not yet called for the latest user request -> tool calls.
+      4. After `final_after` non-system messages -> `final_reply` (ends most chats).
+      5. Otherwise a short echo reply.
+    """
+
+    def __init__(self, rules: list[dict] | None = None, final_after: int = 4, final_reply: str = "TERMINATE"):
+        self.rules = [dict(rule, pattern=re.compile(rule.get("match", ".*"), re.S)) for rule in (rules or [])]
+        self.final_after = final_after
+        self.final_reply = final_reply
+        self._speaker_turn = 0
+        self._lock = threading.Lock()
+
+    def respond(self, request: dict) -> dict:
+        """Return an assistant message dict: {"content": ...} or {"tool_calls": [...]}."""
+        messages = request.get("messages", [])
+        last_text = _content_text(messages[-1]) if messages else ""
+
+        # 1. Scripted rules
+        for rule in self.rules:
+            if rule.get("min_messages", 0) <= len(messages) and rule["pattern"].search(last_text):
+                if "tool_calls" in rule:
+                    return {"tool_calls": [self._tool_call(call["name"], call.get("arguments", {})) for call in rule["tool_calls"]]}
+                return {"content": rule["reply"]}
+
+        # 2. Speaker selection for GroupChat ("... select the next role from ['A', 'B'] to play ...")
+        for message in reversed(messages):
+            text = _content_text(message)
+            if SPEAKER_SELECTION_MARKER in text:
+                names = re.findall(r"'([^']+)'", text[text.index(SPEAKER_SELECTION_MARKER):].split("]")[0])
+                if names:
+                    with self._lock:
+                        name = names[self._speaker_turn % len(names)]
+                        self._speaker_turn += 1
+                    return {"content": name}
+
+        # 3. Tool calls for the latest user request, unless the tools already answered
+        tools = request.get("tools") or []
+        if tools and (not messages or messages[-1].get("role") != "tool"):
+            return {"tool_calls": self._pick_tool_calls(tools, messages)}
+
+        # 4. Wrap up long enough conversations so examples terminate
+        conversation = [m for m in messages if m.get("role") != "system"]
+        if messages and messages[-1].get("role") == "tool":
+            results = " ".join(_content_text(m) for m in messages if m.get("role") == "tool")
+            return {"content": f"{results} {self.final_reply}"}
+        if len(conversation) >= self.final_after:
+            return {"content": self.final_reply}
+
+        # 5. Deterministic echo
+        words = last_text.split()
+        return {"content": f"Stub reply {len(conversation)}: " + " ".join(words[:12])}
+
+    def _pick_tool_calls(self, tools: list[dict], messages: list[dict]) -> list[dict]:
+        # Call every tool whose name or description shares a word with the user request,
+        # falling back to the first tool. Arguments are derived from the parameter schema.
+        user_text = " ".join(_content_text(m) for m in messages if m.get("role") == "user")
+        user_words = {w.rstrip("s") for w in re.findall(r"[a-z]{4,}", user_text.lower())}
+        chosen = []
+        for tool in tools:
+            function = tool.get("function", {})
+            tool_words = re.findall(r"[a-z]{4,}", (function.get("name", "") + " " + function.get("description", "")).lower().replace("_", " "))
+            if user_words & {w.rstrip("s") for w in tool_words}:
+                chosen.append(function)
+        chosen = chosen or [tools[0].get("function", {})]
+        return [self._tool_call(f["name"], self._arguments(f.get("parameters", {}), user_text)) for f in chosen]
+
+    @staticmethod
+    def _arguments(schema: dict, user_text: str) -> dict:
+        numbers = [float(n) for n in re.findall(r"\b\d+(?:\.\d+)?\b", user_text)]
+        places = re.findall(r"\b(?:to|in|at|for)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)", user_text)
+        codes = re.findall(r"\b[A-Z]{2}\d{2,4}\b", user_text)
+        arguments = {}
+        for name, prop in schema.get("properties", {}).items():
+            kind = prop.get("type", "string")
+            if kind in ("integer", "number"):
+                value = numbers.pop(0) if numbers else 2
+                arguments[name] = int(value) if kind == "integer" else value
+            elif kind == "boolean":
+                arguments[name] = True
+            elif "flight" in name.lower():
+                arguments[name] = codes[0] if codes else "AA123"
+            else:
+                arguments[name] = places[0] if places else "sample"
+        return arguments
+
+    @staticmethod
+    def _tool_call(name: str, arguments: dict) -> dict:
+        return {
+            "id": f"call_{uuid.uuid4().hex[:12]}",
+            "type": "function",
+            "function": {"name": name, "arguments": json.dumps(arguments)},
+        }
+
+
+class StubLLMServer:
+    """Background HTTP server exposing `/v1/chat/completions`, `/stats` and `/stats/reset`."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        responder: ScriptedResponder | None = None,
+        latency: float = 0.0,
+        token_latency: float = 0.0,
+        max_concurrent: int | None = None,
+        retry_after: float = 1.0,
+        cache_min_tokens: int = 1024,
+        cache_entries: int = 100_000,
+    ):
+        self.responder = responder or ScriptedResponder()
+        self.latency = latency  # Simulated model latency per request (time to first token), in seconds
+        self.token_latency = token_latency  # Simulated time between streamed chunks, in seconds
+        self.max_concurrent = max_concurrent  # Requests served at once; more are refused with 429 (None = no limit)
+        self.retry_after = retry_after  # Seconds announced in the Retry-After header of a 429
+        self._in_flight = 0
+        self.cache_min_tokens = cache_min_tokens  # Shortest prompt whose prefix is cached (None = no prompt caching)
+        self.cache_entries = cache_entries  # Prefix blocks remembered, least recently used are forgotten
+        self._prefix_cache: OrderedDict[bytes, None] = OrderedDict()
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "StubLLMServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "StubLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def reset_stats(self) -> None:
+        with self._stats_lock:
+            self._stats = {"requests": 0, "messages": 0, "tool_calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "server_seconds": 0.0, "streamed_chunks": 0, "cancelled_streams": 0, "rate_limited": 0, "peak_concurrent": 0, "cached_tokens": 0}
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def admit(self) -> bool:
+        """Count a completion request in; False when it is over `max_concurrent` (answer 429)."""
+        with self._stats_lock:
+            if self.max_concurrent is not None and self._in_flight >= self.max_concurrent:
+                self._stats["rate_limited"] += 1
+                return False
+            self._in_flight += 1
+            self._stats["peak_concurrent"] = max(self._stats["peak_concurrent"], self._in_flight)
+            return True
+
+    def done(self) -> None:
+        with self._stats_lock:
+            self._in_flight -= 1
+
+    def cached_prefix_tokens(self, prompt: str) -> int:
+        """Tokens of `prompt` whose leading blocks were seen in a recent prompt; remembers this prompt's blocks."""
+        if self.cache_min_tokens is None or approx_tokens(prompt) < self.cache_min_tokens:
+            return 0
+        data = prompt.encode("utf-8")
+        digest = hashlib.sha256()
+        cached_blocks, hit = 0, True
+        with self._stats_lock:
+            for end in range(CACHE_BLOCK_CHARS, len(data) + 1, CACHE_BLOCK_CHARS):
+                digest.update(data[end - CACHE_BLOCK_CHARS : end])
+                key = digest.digest()  # Covers every byte up to `end`, so a block only matches after the same prefix
+                if hit and key in self._prefix_cache:
+                    cached_blocks += 1
+                    self._prefix_cache.move_to_end(key)
+                else:
+                    hit = False
+                    self._prefix_cache[key] = None
+            while len(self._prefix_cache) > self.cache_entries:
+                self._prefix_cache.popitem(last=False)
+        return cached_blocks * CACHE_BLOCK_CHARS // 4
+
+    def complete(self, request: dict) -> dict:
+        """Build a full chat.completion response body for a request body."""
+        started = time.perf_counter()
+        if self.latency:
+            time.sleep(self.latency)
+        message = {"role": "assistant", "content": None, **self.responder.respond(request)}
+        # The prompt as the model sees it: tool schemas, then the messages, in the order they were sent
+        prompt = json.dumps(request.get("tools") or []) + "".join(json.dumps(m) for m in request.get("messages", []))
+        prompt_tokens = approx_tokens(prompt)
+        cached_tokens = min(prompt_tokens, self.cached_prefix_tokens(prompt))
+        completion_tokens = approx_tokens(message.get("content") or json.dumps(message.get("tool_calls")))
+        with self._stats_lock:
+            self._stats["requests"] += 1
+            self._stats["messages"] += len(request.get("messages", []))
+            self._stats["tool_calls"] += len(message.get("tool_calls") or [])
+            self._stats["prompt_tokens"] += prompt_tokens
+            self._stats["completion_tokens"] += completion_tokens
+            self._stats["cached_tokens"] += cached_tokens
+            self._stats["server_seconds"] += time.perf_counter() - started
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stub"),
+            "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if message.get("tool_calls") else "stop"}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": cached_tokens},
+            },
+        }
+
+    def stream(self, request: dict):
+        """Yield chat.completion.chunk bodies for a streaming request."""
+        body = self.complete(request)
+        message = body["choices"][0]["message"]
+        base = {"id": body["id"], "object": "chat.completion.chunk", "created": body["created"], "model": body["model"]}
+
+        def chunk(delta: dict, finish_reason: str | None = None) -> dict:
+            return {**base, "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+
+        yield chunk({"role": "assistant", "content": ""})
+        for i, piece in enumerate(re.findall(r"\S+\s*|\s+", message.get("content") or "")):
+            if i and self.token_latency:
+                time.sleep(self.token_latency)
+            yield chunk({"content": piece})
+        for index, tool_call in enumerate(message.get("tool_calls") or []):
+            yield chunk({"tool_calls": [{"index": index, **tool_call}]})
+        yield chunk({}, body["choices"][0]["finish_reason"])
+        if (request.get("stream_options") or {}).get("include_usage"):
+            yield {**base, "choices": [], "usage": body["usage"]}
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, like the real API
+            disable_nagle_algorithm = True  # Headers and body are separate writes; avoid the 40 ms delayed-ACK stall
+
+            def handle(self):
+                try:
+                    super().handle()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # The client dropped a keep-alive connection (e.g. after closing a stream early)
+
+            def _send_json(self, status: int, body: dict, headers: dict | None = None) -> None:
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_events(self, events) -> None:
+                # Server-sent events over chunked transfer encoding, so the connection stays reusable
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                sent = 0
+                try:
+                    for event in events:
+                        self._write_chunk(f"data: {json.dumps(event)}\n\n".encode())
+                        sent += 1
+                    self._write_chunk(b"data: [DONE]\n\n")
+                    self._write_chunk(b"")  # Zero-length chunk ends the response
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client closed the stream early (e.g. a termination rule fired); stop generating
+                    self.close_connection = True
+                    with server._stats_lock:
+                        server._stats["cancelled_streams"] += 1
+                with server._stats_lock:
+                    server._stats["streamed_chunks"] += sent
+
+            def _write_chunk(self, data: bytes) -> None:
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def _read_json(self) -> dict:
+                length = int(self.headers.get("Content-Length", 0))
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def do_GET(self):
+                if self.path.rstrip("/") == "/stats":
+                    self._send_json(200, server.stats())
+                elif self.path.rstrip("/") == "/v1/models":
+                    self._send_json(200, {"object": "list", "data": [{"id": "gpt-4o-mini", "object": "model"}]})
+                else:
+                    self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+            def do_POST(self):
+                request = self._read_json()
+                if self.path.rstrip("/") == "/stats/reset":
+                    server.reset_stats()
+                    self._send_json(200, server.stats())
+                elif self.path.rstrip("/").endswith("/chat/completions"):
+                    if not server.admit():
+                        error = {"message": "Rate limit reached for requests", "type": "requests", "code": "rate_limit_exceeded"}
+                        self._send_json(429, {"error": error}, {"Retry-After": f"{server.retry_after:g}"})
+                        return
+                    try:
+                        if request.get("stream"):
+                            self._send_events(server.stream(request))
+                        else:
+                            self._send_json(200, server.complete(request))
+                    finally:
+                        server.done()
+                else:
+                    self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+            def log_message(self, format, *args):
+                pass  # Keep the console clean
+
+        return Handler
+
+
+def load_rules(path: str) -> list[dict]:
+    # A rules file is a JSON list such as [{"match": "guess", "reply": "Is it an elephant?"}]
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run an offline OpenAI-compatible stand-in server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated seconds per completion")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="Simulated seconds between streamed chunks")
+    parser.add_argument("--max-concurrent", type=int, default=None, help="Answer requests beyond this many at once with 429")
+    parser.add_argument("--cache-min-tokens", type=int, default=1024, help="Shortest prompt whose prefix is cached")
+    parser.add_argument("--rules", help="JSON file with scripted replies")
+    parser.add_argument("--final-after", type=int, default=4, help="Non-system messages before the final reply")
+    parser.add_argument("--final-reply", default="TERMINATE")
+    args = parser.parse_args()
+
+    responder = ScriptedResponder(load_rules(args.rules) if args.rules else None, args.final_after, args.final_reply)
+    stub = StubLLMServer(args.host, args.port, responder, args.latency, args.token_latency, args.max_concurrent, cache_min_tokens=args.cache_min_tokens)
+    print(f"Stub LLM server listening on {stub.base_url}")
+    try:
+        stub._httpd.serve_forever()
+    except KeyboardInterrupt:
+        stub.stop()
@@ -0,0 +1,415 @@
+# -----------------------------
+# PER-TURN TELEMETRY (SPANS)
+# -----------------------------
+# `chat_result.cost` says what a conversation cost, not where its time went.
+# SpanLogger records a tree of timed spans for every conversation:
+#   conversation  ->  invoke_agent (one per turn)  ->  chat <model> (LLM call)
+#                                                  ->  execute_tool <name>
+#                                                  ->  speaker_selection
+#                                                  ->  nested_chats  ->  conversation ...
+# LLM spans carry latency, prompt/completion tokens, cost and whether the response
+# came from the cache. Attribute names follow the OpenTelemetry GenAI conventions
+# used by `autogen.opentelemetry`, without needing the OpenTelemetry SDK.
+#
+#   - LLM calls arrive through AutoGen's runtime logging (SpanLogger is a BaseLogger)
+#   - turns, tools, speaker selection and nested chats are timed by wrapping the
+#     AutoGen methods while telemetry is running (restored by `stop_telemetry`)
+#   - spans are written as JSON lines while the program runs, and/or as one
+#     OTLP/JSON file (the format OpenTelemetry collectors import) at the end
+#   - `format_summary()` prints the slowest span kinds: count, total, mean and p95
+#
+# Usage (start before creating the agents):
+#     telemetry = start_telemetry(jsonl_path="spans.jsonl", otlp_path="trace.json")
+#     ... create agents, run chats ...
+#     print(telemetry.format_summary())
+#     stop_telemetry()
+#
+# Any example script: set TELEMETRY_PATH=spans.jsonl (shared.llm_client starts it).
+
+import asyncio  # For wrapping async methods
+import atexit  # For flushing the files when a script ends
+import contextvars  # The current span follows threads of control and asyncio tasks
+import functools  # For wrappers that keep the original names
+import json  # For the JSONL and OTLP/JSON files
+import os  # For the service name
+import secrets  # For trace and span ids
+import sqlite3
+import statistics  # For the summary
+import sys  # For the default service name
+import threading  # Spans arrive from many threads
+import time  # For timestamps
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+from autogen import Agent, ConversableAgent, GroupChat, runtime_logging
+from autogen.logger.base_logger import BaseLogger
+
+from shared.async_nested import AsyncNestedChats  # Concurrent nested chats get spans too
+
+_current_span: contextvars.ContextVar["Span | None"] = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """One timed operation in a conversation."""
+
+    def __init__(self, name: str, kind: str, trace_id: str, parent_id: str | None, attributes: dict[str, Any] | None = None, start_ns: int | None = None):
+        self.name = name
+        self.kind = kind  # conversation, agent, llm, tool, speaker_selection, nested_chats
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.start_ns = start_ns or time.time_ns()
+        self.end_ns: int | None = None
+        self.error: str | None = None
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def as_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "status": "ERROR" if self.error else "OK",
+            **({"error": self.error} if self.error else {}),
+        }
+
+    def as_otlp(self) -> dict:
+        # OTLP/JSON span: ids in hex, times as strings, typed attribute values
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 3 if self.kind == "llm" else 1,  # SPAN_KIND_CLIENT for model calls, INTERNAL otherwise
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in {"ag2.span.type": self.kind, **self.attributes}.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": value if isinstance(value, str) else json.dumps(value, default=str)}
+
+
+def _name(agent: Any) -> str:
+    return getattr(agent, "name", None) or str(agent or "")
+
+
+def _parse_ts(text: str) -> int:
+    # AutoGen's runtime logging timestamps: "%Y-%m-%d %H:%M:%S.%f" in UTC
+    moment = datetime.strptime(text, "%Y-%m-%d %H:%M:%S.%f").replace(tzinfo=timezone.utc)
+    return int(moment.timestamp() * 1e9)
+
+
+class SpanLogger(BaseLogger):
+    """AutoGen runtime logger that records spans; see `start_telemetry`.
+
+    Args:
+        jsonl_path: Append every finished span to this file as one JSON line.
+        otlp_path: Write all spans as one OTLP/JSON document on `stop()`.
+        service_name: `service.name` of the OTLP resource (defaults to the script name).
+        keep_spans: Keep finished spans in memory for `spans` and `format_summary()`.
+    """
+
+    def __init__(self, jsonl_path: str | None = None, otlp_path: str | None = None, service_name: str | None = None, keep_spans: bool = True):
+        self.jsonl_path = jsonl_path
+        self.otlp_path = otlp_path
+        self.service_name = service_name or os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0]
+        self.keep_spans = keep_spans or bool(otlp_path)
+        self.spans: list[Span] = []
+        self._lock = threading.Lock()
+        self._jsonl = None
+        self._agent_spans: dict[int, list[Span]] = {}  # Open turn spans per agent, for work done on other threads
+        self._patches: list[tuple[Any, str, Any]] = []
+        self.session_id = str(uuid.uuid4())
+
+    # ---- spans ------------------------------------------------------------------------
+
+    def _parent(self, agent: Any = None) -> Span | None:
+        # The current span of this thread/task, else the agent's open turn (LLM calls and
+        # tools may run on worker threads that do not inherit the current span)
+        parent = _current_span.get()
+        if parent is None and agent is not None:
+            stack = self._agent_spans.get(id(agent))
+            parent = stack[-1] if stack else None
+        return parent
+
+    def _new_span(self, name: str, kind: str, agent: Any = None, attributes: dict | None = None, start_ns: int | None = None) -> Span:
+        parent = self._parent(agent)
+        trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        return Span(name, kind, trace_id, parent.span_id if parent else None, attributes, start_ns)
+
+    def _finish(self, span: Span) -> None:
+        span.end_ns = span.end_ns or time.time_ns()
+        with self._lock:
+            if self.keep_spans:
+                self.spans.append(span)
+            if self._jsonl is not None:
+                self._jsonl.write(json.dumps(span.as_dict(), default=str) + "\n")
+                self._jsonl.flush()
+
+    @contextmanager
+    def span(self, name: str, kind: str, agent: Any = None, **attributes: Any):
+        """Time a block as a child of the current span: `with telemetry.span("load", "tool"): ...`"""
+        span = self._new_span(name, kind, agent, attributes)
+        token = _current_span.set(span)
+        stack = self._agent_spans.setdefault(id(agent), []) if kind == "agent" else None
+        if stack is not None:
+            stack.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            if stack is not None:
+                stack.remove(span)
+            _current_span.reset(token)
+            self._finish(span)
+
+    # ---- method wrappers --------------------------------------------------------------
+
+    def _wrap(self, func: Callable, describe: Callable, finish: Callable | None = None) -> Callable:
+        # describe(*args, **kwargs) -> (name, kind, agent, attributes); finish(span, result) adds result attributes
+        if asyncio.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                name, kind, agent, attributes = describe(*args, **kwargs)
+                with self.span(name, kind, agent, **attributes) as span:
+                    result = await func(*args, **kwargs)
+                    if finish is not None:
+                        finish(span, result)
+                    return result
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            name, kind, agent, attributes = describe(*args, **kwargs)
+            with self.span(name, kind, agent, **attributes) as span:
+                result = func(*args, **kwargs)
+                if finish is not None:
+                    finish(span, result)
+                return result
+
+        return wrapper
+
+    def _patch(self, owner: type, attr: str, describe: Callable, finish: Callable | None = None) -> None:
+        original = owner.__dict__[attr]
+        is_static = isinstance(original, staticmethod)
+        wrapped = self._wrap(original.__func__ if is_static else original, describe, finish)
+        setattr(owner, attr, staticmethod(wrapped) if is_static else wrapped)
+        self._patches.append((owner, attr, original))
+
+    def _install(self) -> None:
+        def conversation(agent, recipient=None, *args, **kwargs):
+            return f"conversation {_name(agent)}", "conversation", None, {"gen_ai.operation.name": "conversation", "gen_ai.agent.name": _name(agent), "ag2.recipient": _name(recipient)}
+
+        def conversation_done(span, result):
+            span.attributes["gen_ai.conversation.turns"] = len(getattr(result, "chat_history", []) or [])
+            cost = (getattr(result, "cost", None) or {}).get("usage_including_cached_inference", {})
+            span.attributes["gen_ai.usage.cost"] = float(cost.get("total_cost", 0.0))
+
+        def turn(agent, messages=None, sender=None, *args, **kwargs):
+            return f"invoke_agent {_name(agent)}", "agent", agent, {"gen_ai.operation.name": "invoke_agent", "gen_ai.agent.name": _name(agent), "ag2.sender": _name(sender)}
+
+        def tool(agent, func_call, call_id=None, verbose=False, **kwargs):
+            name = (func_call or {}).get("name", "")
+            return f"execute_tool {name}", "tool", agent, {"gen_ai.operation.name": "execute_tool", "gen_ai.tool.name": name, "gen_ai.tool.call.id": call_id or "", "gen_ai.agent.name": _name(agent)}
+
+        def tool_done(span, result):
+            span.attributes["ag2.tool.success"] = bool(result and result[0])
+
+        def speaker(groupchat, last_speaker, selector, *args, **kwargs):
+            return "speaker_selection", "speaker_selection", selector, {"gen_ai.operation.name": "speaker_selection", "ag2.speaker_selection.last": _name(last_speaker), "ag2.speaker_selection.method": str(groupchat.speaker_selection_method)}
+
+        def speaker_done(span, result):
+            span.attributes["ag2.speaker_selection.selected"] = _name(result)
+
+        def nested(chat_queue, recipient, messages=None, sender=None, config=None):
+            return f"nested_chats {_name(recipient)}", "nested_chats", recipient, {"ag2.nested_chats.count": len(chat_queue)}
+
+        def nested_batch(nested_chats, agent, chats):
+            return f"nested_chats {_name(agent)}", "nested_chats", agent, {"ag2.nested_chats.count": len(chats), "ag2.nested_chats.concurrent": True}
+
+        self._patch(ConversableAgent, "initiate_chat", conversation, conversation_done)
+        self._patch(ConversableAgent, "a_initiate_chat", conversation, conversation_done)
+        self._patch(ConversableAgent, "generate_reply", turn)
+        self._patch(ConversableAgent, "a_generate_reply", turn)
+        self._patch(ConversableAgent, "execute_function", tool, tool_done)
+        self._patch(ConversableAgent, "a_execute_function", tool, tool_done)
+        self._patch(GroupChat, "select_speaker", speaker, speaker_done)
+        self._patch(GroupChat, "a_select_speaker", speaker, speaker_done)
+        # Nested chats registered after this point (register_nested_chats keeps a reference)
+        self._patch(ConversableAgent, "_summary_from_nested_chats", nested)
+        self._patch(ConversableAgent, "_a_summary_from_nested_chats", nested)
+        self._patch(AsyncNestedChats, "_run_batch", nested_batch)
+
+    def _uninstall(self) -> None:
+        while self._patches:
+            owner, attr, original = self._patches.pop()
+            setattr(owner, attr, original)
+
+    # ---- BaseLogger -------------------------------------------------------------------
+
+    def start(self) -> str:
+        if self.jsonl_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.jsonl_path)), exist_ok=True)
+            self._jsonl = open(self.jsonl_path, "a", encoding="utf-8")
+        self._install()
+        return self.session_id
+
+    def log_chat_completion(self, invocation_id, client_id, wrapper_id, source, request, response, is_cached, cost, start_time) -> None:
+        request = request if isinstance(request, dict) else {}
+        model = request.get("model") or getattr(response, "model", "") or ""
+        attributes = {
+            "gen_ai.operation.name": "chat",
+            "gen_ai.request.model": model,
+            "gen_ai.agent.name": _name(source),
+            "ag2.cache.hit": bool(is_cached),
+            "gen_ai.usage.cost": float(cost or 0.0),
+            "ag2.request.messages": len(request.get("messages") or []),
+        }
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            attributes["gen_ai.usage.input_tokens"] = usage.prompt_tokens or 0
+            attributes["gen_ai.usage.output_tokens"] = usage.completion_tokens or 0
+            # Prompt tokens the provider served from its prompt-prefix cache
+            details = getattr(usage, "prompt_tokens_details", None)
+            attributes["gen_ai.usage.cache_read.input_tokens"] = getattr(details, "cached_tokens", None) or 0
+        span = self._new_span(f"chat {model}".strip(), "llm", source if isinstance(source, Agent) else None, attributes, start_ns=_parse_ts(start_time))
+        if isinstance(response, str):
+            span.error = response  # AutoGen logs failed calls with an error string
+        self._finish(span)
+
+    def log_new_agent(self, agent: ConversableAgent, init_args: dict[str, Any]) -> None:
+        pass
+
+    def log_event(self, source: str | Agent, name: str, **kwargs: dict[str, Any]) -> None:
+        pass
+
+    def log_new_wrapper(self, wrapper, init_args) -> None:
+        pass
+
+    def log_new_client(self, client, wrapper, init_args) -> None:
+        pass
+
+    def log_function_use(self, source, function, args, returns) -> None:
+        pass  # Tool spans are timed around execute_function instead
+
+    def stop(self) -> None:
+        self._uninstall()
+        with self._lock:
+            if self._jsonl is not None:
+                self._jsonl.close()
+                self._jsonl = None
+        if self.otlp_path:
+            self.export_otlp(self.otlp_path)
+
+    def get_connection(self) -> None | sqlite3.Connection:
+        return None
+
+    # ---- export and summary -----------------------------------------------------------
+
+    def export_otlp(self, path: str) -> str:
+        """Write the recorded spans as an OTLP/JSON document (ExportTraceServiceRequest)."""
+        with self._lock:
+            spans = [span.as_otlp() for span in self.spans]
+        document = {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+                    "scopeSpans": [{"scope": {"name": "shared.telemetry"}, "spans": spans}],
+                }
+            ]
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(document, f)
+        return path
+
+    def summary(self) -> list[dict]:
+        """Per span name: count, total/mean/p95 milliseconds, tokens (prefix-cached input tokens too) and cache hits; slowest first."""
+        groups: dict[tuple[str, str], list[Span]] = {}
+        with self._lock:
+            for span in self.spans:
+                groups.setdefault((span.kind, span.name), []).append(span)
+        rows = []
+        for (kind, name), spans in groups.items():
+            durations = sorted(span.duration_ms for span in spans)
+            rows.append({
+                "kind": kind,
+                "name": name,
+                "count": len(spans),
+                "total_ms": sum(durations),
+                "mean_ms": statistics.fmean(durations),
+                "p95_ms": durations[min(len(durations) - 1, int(0.95 * len(durations)))],
+                "input_tokens": sum(span.attributes.get("gen_ai.usage.input_tokens", 0) for span in spans),
+                "output_tokens": sum(span.attributes.get("gen_ai.usage.output_tokens", 0) for span in spans),
+                "cached_input_tokens": sum(span.attributes.get("gen_ai.usage.cache_read.input_tokens", 0) for span in spans),
+                "cache_hits": sum(1 for span in spans if span.attributes.get("ag2.cache.hit")),
+                "errors": sum(1 for span in spans if span.error),
+            })
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+    def format_summary(self, limit: int = 20) -> str:
+        lines = [f"{'Span':<40} {'Count':>5} {'Total ms':>10} {'Mean ms':>9} {'p95 ms':>9} {'Tokens in/out':>15} {'Prefix-cached':>13} {'Cached':>6}"]
+        for row in self.summary()[:limit]:
+            llm = row["kind"] == "llm"
+            tokens = f"{row['input_tokens']}/{row['output_tokens']}" if llm else ""
+            prefix = str(row["cached_input_tokens"]) if llm else ""
+            cached = str(row["cache_hits"]) if llm else ""
+            lines.append(f"{row['name'][:40]:<40} {row['count']:>5} {row['total_ms']:>10.1f} {row['mean_ms']:>9.1f} {row['p95_ms']:>9.1f} {tokens:>15} {prefix:>13} {cached:>6}")
+        return "\n".join(lines)
+
+
+# The running telemetry logger, if any
+_telemetry: SpanLogger | None = None
+
+
+def start_telemetry(jsonl_path: str | None = None, otlp_path: str | None = None, service_name: str | None = None) -> SpanLogger:
+    """Start recording spans through AutoGen's runtime logging; returns the SpanLogger.
+
+    Start it before creating agents so nested chats registered afterwards are covered.
+    """
+    global _telemetry
+    if _telemetry is not None:
+        return _telemetry
+    _telemetry = SpanLogger(jsonl_path=jsonl_path, otlp_path=otlp_path, service_name=service_name)
+    runtime_logging.start(logger=_telemetry)
+    atexit.register(stop_telemetry)
+    return _telemetry
+
+
+def get_telemetry() -> SpanLogger | None:
+    return _telemetry
+
+
+def stop_telemetry() -> None:
+    """Stop recording, restore the wrapped methods and write the OTLP file (if configured)."""
+    global _telemetry
+    if _telemetry is None:
+        return
+    runtime_logging.stop()
+    _telemetry = None
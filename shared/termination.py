@@ -0,0 +1,260 @@
+# -----------------------------
+# DECLARATIVE TERMINATION RULES
+# -----------------------------
+# The examples end conversations with ad-hoc lambdas such as
+# `lambda msg: "TERMINATE" in msg["content"]`, which crash when a message has no
+# content (tool calls, empty human replies) and only run after the whole reply
+# has been generated. TerminationRules replaces them:
+#   - rules are declared once and compiled: one regular expression per text rule
+#     (substrings, regular expressions) plus a set of tool names
+#   - a rule set is a normal `is_termination_msg` callable and never fails on
+#     None, multimodal or plain-string content
+#   - `rules.matcher()` checks streamed text incrementally, and
+#     `register_early_termination(agent)` makes an agent stream its LLM replies and
+#     close the request as soon as the receiver's rules fire, so the tokens the model
+#     would write after "TERMINATE" are never generated or paid for
+#
+# Usage:
+#     rules = TerminationRules(contains("TERMINATE"))
+#     user_proxy = ConversableAgent("User", is_termination_msg=rules, ...)
+#     register_early_termination(assistant)   # Stops the assistant's replies once `rules` fire
+#
+#     TerminationRules.from_spec([{"contains": "elephant"}, {"regex": r"\bdone\b", "ignore_case": True}, {"tool_call": "finish"}])
+
+import re  # Text rules are compiled into regular expressions
+from typing import Any
+
+from autogen import Agent, ConversableAgent
+
+from shared.streaming import AsyncReplyStream, open_reply_stream  # Streamed LLM requests
+
+
+class Rule:
+    """One termination condition. Create rules with `contains`, `regex` or `tool_call`."""
+
+    def __init__(self, name: str, pattern: str | None = None, max_length: int = 0, tools: tuple[str, ...] = (), flags: int = 0):
+        self.name = name
+        self.pattern = pattern  # Regex source for text rules
+        self.flags = flags  # re flags the pattern is compiled with
+        self.max_length = max_length  # Longest text the pattern can match, for incremental matching
+        self.tools = tools  # Tool names for tool-call rules ("*" = any tool)
+
+    def __repr__(self) -> str:
+        return f"Rule({self.name!r})"
+
+
+def contains(text: str, ignore_case: bool = False, whole_word: bool = False, name: str | None = None) -> Rule:
+    """Fires when the message text contains `text`."""
+    pattern = re.escape(text)
+    if whole_word:
+        pattern = rf"\b{pattern}\b"
+    return Rule(name or f"contains:{text}", pattern, max_length=len(text) + (1 if whole_word else 0), flags=re.IGNORECASE if ignore_case else 0)
+
+
+def regex(pattern: str, ignore_case: bool = False, max_length: int = 256, name: str | None = None) -> Rule:
+    """Fires when the message text matches `pattern`.
+
+    `max_length` bounds how long a match can be; while streaming, only that much
+    already-checked text is searched again when new text arrives.
+    """
+    flags = re.IGNORECASE if ignore_case else 0
+    re.compile(pattern, flags)  # Fail on bad patterns when the rule is declared, not mid-conversation
+    return Rule(name or f"regex:{pattern}", pattern, max_length=max_length, flags=flags)
+
+
+def tool_call(*names: str, name: str | None = None) -> Rule:
+    """Fires when the message calls one of the given tools (any tool if no names are given)."""
+    return Rule(name or f"tool_call:{','.join(names) or '*'}", tools=names or ("*",))
+
+
+def _text(message: Any) -> str:
+    # Message text for every shape AutoGen produces: a string, a dict with None,
+    # string or multimodal (list of parts) content
+    if message is None:
+        return ""
+    if isinstance(message, str):
+        return message
+    content = message.get("content")
+    if content is None:
+        return ""
+    if isinstance(content, list):
+        return "\n".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return str(content)
+
+
+def _called_tools(message: Any) -> list[str]:
+    if not isinstance(message, dict):
+        return []
+    names = [(call.get("function") or {}).get("name", "") for call in message.get("tool_calls") or []]
+    if message.get("function_call"):
+        names.append(message["function_call"].get("name", ""))
+    return names
+
+
+class StreamMatcher:
+    """Checks streamed text against the text rules of a TerminationRules, one piece at a time."""
+
+    def __init__(self, rules: "TerminationRules"):
+        self._rules = rules
+        self._buffer = ""
+        self.fired: str | None = None  # Name of the rule that matched
+
+    def feed(self, piece: str) -> str | None:
+        """Add the next piece of text; return the name of the first rule that now matches, else None.
+
+        A match that reaches the end of the text so far is not accepted yet: `\\b` and `$` can
+        match there and stop matching once more text arrives ("done" in "done" + "ness").
+        """
+        if self.fired is not None or not self._rules._text_rules:
+            return self.fired
+        # Only text that could be part of a match ending in the new piece (or held back) is searched again
+        start = max(0, len(self._buffer) - self._rules._lookback)
+        self._buffer += piece
+        # `$` also matches before a final newline, so that newline is held back too
+        limit = len(self._buffer) - (1 if self._buffer.endswith("\n") else 0)
+        self.fired = self._rules._search(self._buffer, start, before=limit)
+        return self.fired
+
+    def finish(self) -> str | None:
+        """The stream has ended: check the whole text, matches at its end included (same result as the rules)."""
+        if self.fired is None and self._rules._text_rules:
+            self.fired = self._rules._search(self._buffer)
+        return self.fired
+
+
+class TerminationRules:
+    """A set of termination rules, usable as `is_termination_msg`.
+
+    Args:
+        *rules: Rule objects or declarative dicts (see `from_spec`). The message ends the
+            conversation when any rule fires.
+    """
+
+    def __init__(self, *rules: Rule | dict):
+        self.rules = [rule if isinstance(rule, Rule) else self._rule_from_dict(rule) for rule in rules]
+        text_rules = [rule for rule in self.rules if rule.pattern is not None]
+        # Compiled one by one: combined into one alternation, inline global flags such as (?i)
+        # and numbered backreferences of one rule would break or shift
+        self._text_rules = [(rule.name, re.compile(rule.pattern, rule.flags)) for rule in text_rules]
+        self._lookback = max((rule.max_length for rule in text_rules), default=0)
+        self._tools = {tool: rule.name for rule in self.rules for tool in rule.tools}
+
+    @staticmethod
+    def _rule_from_dict(spec: dict) -> Rule:
+        spec = dict(spec)
+        if "contains" in spec:
+            return contains(spec.pop("contains"), **spec)
+        if "regex" in spec:
+            return regex(spec.pop("regex"), **spec)
+        if "tool_call" in spec:
+            names = spec.pop("tool_call")
+            return tool_call(*([names] if isinstance(names, str) else names), **spec)
+        raise ValueError(f"Unknown termination rule {spec!r}; expected 'contains', 'regex' or 'tool_call'.")
+
+    @classmethod
+    def from_spec(cls, spec: list[dict]) -> "TerminationRules":
+        """Build rules from a list such as [{"contains": "TERMINATE"}, {"regex": "...", "ignore_case": True}, {"tool_call": ["finish"]}]."""
+        return cls(*spec)
+
+    def _search(self, text: str, start: int = 0, before: int | None = None) -> str | None:
+        # The rule whose match starts first (ties: the rule declared first); with `before`,
+        # only matches that end before that position count
+        best = None
+        for name, pattern in self._text_rules:
+            match = pattern.search(text, start)
+            if match is not None and (before is None or match.end() < before) and (best is None or match.start() < best[0]):
+                best = (match.start(), name)
+        return None if best is None else best[1]
+
+    def fired(self, message: Any) -> str | None:
+        """Name of the first rule that fires for a complete message, or None."""
+        if self._tools:
+            for tool in _called_tools(message):
+                if tool in self._tools or "*" in self._tools:
+                    return self._tools.get(tool) or self._tools["*"]
+        if self._text_rules:
+            return self._search(_text(message))
+        return None
+
+    def __call__(self, message: Any) -> bool:
+        return self.fired(message) is not None
+
+    def matcher(self) -> StreamMatcher:
+        """A fresh incremental matcher for one streamed reply (text rules only)."""
+        return StreamMatcher(self)
+
+    def __repr__(self) -> str:
+        return f"TerminationRules({', '.join(rule.name for rule in self.rules)})"
+
+
+class EarlyTermination:
+    """Streams an agent's LLM replies and stops them once a termination rule fires. See `register_early_termination`."""
+
+    def __init__(self, rules: TerminationRules | None = None):
+        self.rules = rules
+        self.stats = {"streamed": 0, "stopped_early": 0}
+
+    def _rules_for(self, sender: Agent | None) -> TerminationRules | None:
+        # The rules that matter are the receiver's: the agent this reply is sent to
+        if self.rules is not None:
+            return self.rules
+        rules = getattr(sender, "_is_termination_msg", None)
+        return rules if isinstance(rules, TerminationRules) and rules._text_rules else None
+
+    def _finish(self, stream) -> tuple[bool, dict]:
+        self.stats["streamed"] += 1
+        if stream.stopped_by is not None:
+            self.stats["stopped_early"] += 1
+        return True, stream.message
+
+    def streamed_oai_reply(self, agent: ConversableAgent, messages: list[dict] | None = None, sender: Agent | None = None, config: Any = None) -> tuple[bool, dict | None]:
+        rules = self._rules_for(sender)
+        if rules is None or agent.client is None:
+            return False, None  # Nothing to watch for; the normal LLM reply runs
+        stream = open_reply_stream(agent, agent._oai_messages[sender] if messages is None else messages, stop_on=rules.matcher())
+        for _ in stream:
+            pass
+        return self._finish(stream)
+
+    async def a_streamed_oai_reply(self, agent: ConversableAgent, messages: list[dict] | None = None, sender: Agent | None = None, config: Any = None) -> tuple[bool, dict | None]:
+        rules = self._rules_for(sender)
+        if rules is None or agent.client is None:
+            return False, None
+        stream = AsyncReplyStream(open_reply_stream(agent, agent._oai_messages[sender] if messages is None else messages, stop_on=rules.matcher()))
+        async for _ in stream:
+            pass
+        return self._finish(stream)
+
+    def add_to_agent(self, agent: ConversableAgent) -> None:
+        # Names matter: AutoGen skips `streamed_oai_reply` in async chats because `a_streamed_oai_reply` exists
+        def streamed_oai_reply(recipient, messages=None, sender=None, config=None):
+            return self.streamed_oai_reply(recipient, messages, sender, config)
+
+        async def a_streamed_oai_reply(recipient, messages=None, sender=None, config=None):
+            return await self.a_streamed_oai_reply(recipient, messages, sender, config)
+
+        # Just before the normal LLM reply, after termination checks, human input and tool execution
+        llm_replies = (ConversableAgent.generate_oai_reply, ConversableAgent.a_generate_oai_reply)
+        position = next(
+            (i for i, entry in enumerate(agent._reply_func_list) if entry["reply_func"] in llm_replies),
+            len(agent._reply_func_list),
+        )
+        agent.register_reply([Agent, None], a_streamed_oai_reply, position, ignore_async_in_sync_chat=True)
+        agent.register_reply([Agent, None], streamed_oai_reply, position)
+
+
+def register_early_termination(agent: ConversableAgent, rules: TerminationRules | None = None) -> EarlyTermination:
+    """Stream `agent`'s LLM replies and close the request as soon as a termination rule fires.
+
+    Args:
+        agent: The agent whose LLM replies are streamed.
+        rules: Rules to watch for. By default the receiver's `is_termination_msg` is used
+            when it is a TerminationRules; replies to other agents are generated normally.
+
+    Only text rules stop a stream early; tool-call rules need the complete call and are
+    checked on the finished message. Streamed replies bypass the response cache.
+    Returns the EarlyTermination object, whose `stats` count streamed and early-stopped replies.
+    """
+    early = EarlyTermination(rules)
+    early.add_to_agent(agent)
+    return early
@@ -0,0 +1,145 @@
+# -----------------------------
+# MEMOIZATION FOR PURE TOOLS
+# -----------------------------
+# Tools like `get_hotel_info` or `add_numbers` always return the same answer for
+# the same arguments, yet the LLM calls them again and again across turns. The
+# `memoize_tool` decorator keeps recent results in memory (LRU with an optional
+# time-to-live) and counts hits and misses. It keeps the function's name,
+# docstring and `Annotated` parameters, so AutoGen builds exactly the same tool
+# schema as for the undecorated function.
+#
+# Usage:
+#     @memoize_tool(maxsize=256, ttl=3600)
+#     def get_hotel_info(location: Annotated[str, "Location"]) -> str: ...
+#
+#     assistant.register_for_llm(name="get_hotel_info", description="...")(get_hotel_info)
+#     user_proxy.register_for_execution(name="get_hotel_info")(get_hotel_info)
+#     print(get_hotel_info.cache_info())
+
+import functools  # For keeping the wrapped function's metadata (and signature)
+import inspect  # For normalising positional/keyword arguments and detecting async tools
+import json  # For keys built from unhashable arguments (sets, custom objects)
+import threading  # Tools may run in several threads at once
+import time  # For the time-to-live
+from collections import OrderedDict  # LRU order
+from typing import Any, Callable
+
+
+def _typed(value: Any) -> Any:
+    # 1, 1.0 and True are equal (and hash alike) in Python but are different tool arguments,
+    # so every value is keyed together with its type; lists and dicts become hashable tuples
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__, tuple(_typed(item) for item in value))
+    if isinstance(value, dict):
+        items = sorted(value.items(), key=lambda item: repr(item[0]))
+        return (type(value).__name__, tuple((_typed(k), _typed(v)) for k, v in items))
+    return (type(value).__name__, value)
+
+
+def _make_key(signature: inspect.Signature, args: tuple, kwargs: dict) -> Any:
+    # f(1, b=2) and f(a=1, b=2) must share one entry, so bind to parameter names first
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    items = tuple((name, _typed(value)) for name, value in sorted(bound.arguments.items()))
+    try:
+        hash(items)
+        return items
+    except TypeError:
+        return json.dumps(items, default=repr)
+
+
+class _ToolCache:
+    """Thread-safe LRU store with TTL and counters, attached to each memoized tool."""
+
+    def __init__(self, maxsize: int | None, ttl: float | None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def get(self, key) -> tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while self.maxsize is not None and len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def info(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "currsize": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+
+def memoize_tool(maxsize: int | None = 256, ttl: float | None = None) -> Callable:
+    """Decorator that caches a pure tool's results by argument values.
+
+    Args:
+        maxsize: Maximum number of cached results (least recently used are dropped); None = unbounded.
+        ttl: Seconds a result stays valid; None = until evicted.
+
+    The decorated function gains `cache_info()` and `cache_clear()`. Errors are not cached.
+    Works for both normal and `async def` tools.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        cache = _ToolCache(maxsize, ttl)
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                key = _make_key(signature, args, kwargs)
+                found, value = cache.get(key)
+                if not found:
+                    value = await func(*args, **kwargs)
+                    cache.put(key, value)
+                return value
+
+            wrapper = async_wrapper
+        else:
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                key = _make_key(signature, args, kwargs)
+                found, value = cache.get(key)
+                if not found:
+                    value = func(*args, **kwargs)
+                    cache.put(key, value)
+                return value
+
+        wrapper.cache_info = cache.info
+        wrapper.cache_clear = cache.clear
+        return wrapper
+
+    return decorator
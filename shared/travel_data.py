@@ -0,0 +1,161 @@
+# -----------------------------
+# INDEXED TRAVEL REFERENCE DATA
+# -----------------------------
+# The travel tools used to rebuild a small dict on every call and only found
+# exact-case keys ("New York" but not "new york"). TravelReferenceStore loads the
+# reference data once (from JSON or CSV), indexes it by a normalised key for
+# O(1) lookups, and keeps a trigram index for fuzzy matching ("New Yrok"), so
+# lookups stay fast with hundreds of thousands of flights and cities.
+#
+# Data layout:
+#   JSON: {"flights": {"AA123": "On time", ...}, "hotels": {"New York": "...", ...}, ...}
+#   CSV:  one file per table, e.g. flights.csv with columns "key,value"
+#
+# Usage:
+#     store = get_travel_store()                     # loads Tools/data/travel_reference.json once
+#     store.lookup("hotels", "new york")             # case-insensitive
+#     store.lookup("hotels", "New Yrok")             # fuzzy match
+#     store.lookup("flights", "aa 123", fuzzy=False) # codes ignore separators: finds AA123
+
+import csv  # For bulk-loading CSV tables
+import difflib  # For scoring fuzzy candidates
+import json  # For bulk-loading JSON tables
+import os  # For file paths and the data location setting
+import re  # For normalising keys
+import threading  # For loading the default store once
+import unicodedata  # For removing accents ("Zürich" -> "zurich")
+from collections import Counter, defaultdict  # Trigram candidate counting and posting lists
+
+# Tables keyed by codes: separators are dropped instead of kept ("AA-123" == "AA123")
+COMPACT_TABLES = ("flights",)
+
+# Default reference data shipped with the Tools examples
+DEFAULT_DATA_PATH = os.environ.get(
+    "TRAVEL_DATA_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Tools", "data", "travel_reference.json"),
+)
+
+
+def normalize(key: str, compact: bool = False) -> str:
+    """Case-, accent-, punctuation- and whitespace-insensitive form of a key.
+
+    With `compact=True` separators are removed instead of collapsed to one space, for codes
+    that users type with or without them ("aa 123", "AA-123" and "AA123" are all "aa123").
+    """
+    key = unicodedata.normalize("NFKD", str(key)).encode("ascii", "ignore").decode("ascii")
+    if compact:
+        return re.sub(r"[^a-z0-9]+", "", key.lower())
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", key.lower()).split())
+
+
+def _trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class _Table:
+    """One indexed table: exact lookups by normalised key plus a trigram index for fuzzy ones."""
+
+    def __init__(self, compact: bool = False):
+        self.compact = compact  # Keys are codes: normalised without separators
+        self.values: dict[str, str] = {}  # normalised key -> value
+        self.keys: list[str] = []  # normalised keys, position = id in the trigram index
+        self.postings: dict[str, list[int]] = defaultdict(list)  # trigram -> key ids
+
+    def add(self, key: str, value: str) -> None:
+        norm = normalize(key, self.compact)
+        if norm not in self.values:
+            key_id = len(self.keys)
+            self.keys.append(norm)
+            for gram in _trigrams(norm):
+                self.postings[gram].append(key_id)
+        self.values[norm] = value
+
+    def fuzzy(self, norm: str, cutoff: float, max_candidates: int = 20) -> str | None:
+        # Count shared trigrams, skipping grams so common they say little (unless nothing else is left)
+        grams = _trigrams(norm)
+        limit = max(1000, len(self.keys) // 20)
+        useful = [g for g in grams if g in self.postings and len(self.postings[g]) <= limit] or [g for g in grams if g in self.postings]
+        counts = Counter()
+        for gram in useful:
+            counts.update(self.postings[gram])
+        best_key, best_score = None, cutoff
+        for key_id, _ in counts.most_common(max_candidates):
+            candidate = self.keys[key_id]
+            score = difflib.SequenceMatcher(None, norm, candidate).ratio()
+            if score >= best_score:
+                best_key, best_score = candidate, score
+        return best_key
+
+
+class TravelReferenceStore:
+    """Preloaded, indexed reference tables (flights, hotels, travel advice, activities, ...)."""
+
+    def __init__(self, fuzzy_cutoff: float = 0.8, compact_tables: tuple[str, ...] = COMPACT_TABLES):
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.compact_tables = set(compact_tables)
+        self._tables: dict[str, _Table] = {}
+
+    # ---- loading ---------------------------------------------------------------------
+
+    def add(self, table: str, key: str, value: str) -> None:
+        if table not in self._tables:
+            self._tables[table] = _Table(compact=table in self.compact_tables)
+        self._tables[table].add(key, value)
+
+    def load_json(self, path: str) -> "TravelReferenceStore":
+        with open(path, encoding="utf-8") as f:
+            for table, rows in json.load(f).items():
+                for key, value in rows.items():
+                    self.add(table, key, value)
+        return self
+
+    def load_csv(self, table: str, path: str, key_column: str = "key", value_column: str = "value") -> "TravelReferenceStore":
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                self.add(table, row[key_column], row[value_column])
+        return self
+
+    def load(self, path: str) -> "TravelReferenceStore":
+        """Load a JSON file, a single CSV file (table = file name) or a directory of them."""
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith((".json", ".csv")):
+                    self.load(os.path.join(path, name))
+        elif path.endswith(".csv"):
+            self.load_csv(os.path.splitext(os.path.basename(path))[0], path)
+        else:
+            self.load_json(path)
+        return self
+
+    # ---- queries ---------------------------------------------------------------------
+
+    def lookup(self, table: str, key: str, fuzzy: bool = True) -> str | None:
+        """Return the value for `key` in `table`, or None when nothing matches."""
+        if table not in self._tables:
+            return None
+        index = self._tables[table]
+        norm = normalize(key, index.compact)
+        value = index.values.get(norm)
+        if value is None and fuzzy and norm:
+            match = index.fuzzy(norm, self.fuzzy_cutoff)
+            value = index.values.get(match) if match else None
+        return value
+
+    def size(self, table: str) -> int:
+        return len(self._tables[table].values) if table in self._tables else 0
+
+
+# The store used by the example tools, loaded on first use and then shared
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_travel_store(path: str = DEFAULT_DATA_PATH) -> TravelReferenceStore:
+    """Return the shared store, bulk-loading `path` the first time it is called."""
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                _default_store = TravelReferenceStore().load(path)
+    return _default_store
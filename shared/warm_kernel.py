@@ -0,0 +1,248 @@
+# -----------------------------
+# PERSISTENT ("WARM") PYTHON KERNEL FOR CODE EXECUTION
+# -----------------------------
+# With `code_execution_config={"work_dir": "codes"}` AutoGen starts a new Python
+# process for every code block, so each retry re-imports pandas, matplotlib or
+# yfinance (seconds every time) and forgets every variable. WarmKernelCodeExecutor
+# keeps one Python process alive for the whole conversation:
+#   - imports and variables survive from one code block to the next
+#   - heavy modules can be imported in the background before the first block arrives
+#   - a block that runs too long is interrupted (the kernel and its state survive);
+#     if it does not stop, the kernel is restarted
+#   - shell blocks (sh/bash/...) still run in a normal subprocess
+#
+# Usage:
+#     executor = WarmKernelCodeExecutor(work_dir="codes", timeout=60, preload=["pandas", "matplotlib.pyplot"])
+#     user_proxy = UserProxyAgent(..., code_execution_config={"executor": executor})
+#
+# Like AutoGen's local executor, this runs code on your machine without isolation.
+
+import json  # Commands and results are exchanged as JSON lines
+import os  # For signals and environment
+import queue  # For waiting on the kernel's answer with a timeout
+import signal  # For interrupting a long-running block
+import subprocess  # For the kernel process
+import sys  # For the current Python interpreter
+import threading  # For reading the kernel's answers in the background
+from hashlib import md5  # Same file naming as AutoGen's local executor
+from pathlib import Path
+
+from autogen.code_utils import PYTHON_VARIANTS, TIMEOUT_MSG
+from autogen.coding import CodeBlock, CodeExtractor, LocalCommandLineCodeExecutor, MarkdownCodeExtractor
+from autogen.coding.base import CommandLineCodeResult
+from autogen.coding.utils import _get_file_name_from_content
+
+# Program run inside the kernel process. It reads one JSON command per line from
+# stdin and answers on a private copy of the original stdout, while fds 1 and 2
+# point to a scratch file, so output of the code (and of any subprocess it starts)
+# is captured in the order it was written.
+KERNEL_SOURCE = r"""
+import importlib, json, os, sys, tempfile, traceback
+
+answers = os.fdopen(os.dup(1), "w", encoding="utf-8", buffering=1)
+capture = tempfile.TemporaryFile()
+os.dup2(capture.fileno(), 1)
+os.dup2(capture.fileno(), 2)
+namespace = {"__name__": "__main__", "__builtins__": __builtins__}
+sys.path.insert(0, os.getcwd())
+
+def collect():
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os.lseek(1, 0, os.SEEK_SET)
+    data = b"".join(iter(lambda: os.read(1, 65536), b""))
+    os.ftruncate(1, 0)
+    os.lseek(1, 0, os.SEEK_SET)
+    return data.decode("utf-8", errors="replace")
+
+for module in json.loads(sys.argv[1]):
+    try:
+        importlib.import_module(module)
+    except Exception:
+        pass
+collect()
+
+while True:
+    try:
+        line = sys.stdin.readline()
+        if not line:
+            break
+        command = json.loads(line)
+    except KeyboardInterrupt:  # An interrupt that arrived between two blocks
+        continue
+    exit_code = 0
+    try:
+        namespace["__file__"] = command["filename"]
+        exec(compile(command["code"], command["filename"], "exec"), namespace)
+    except SystemExit as e:
+        exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        if e.code is not None and not isinstance(e.code, int):
+            print(e.code, file=sys.stderr)
+    except KeyboardInterrupt:
+        exit_code = 124
+    except BaseException as e:
+        exit_code = 1
+        traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+    answers.write(json.dumps({"exit_code": exit_code, "output": collect()}) + "\n")
+"""
+
+
+class WarmKernelCodeExecutor:
+    """CodeExecutor that runs Python blocks in one long-lived, stateful Python process.
+
+    Args:
+        work_dir: Directory where code files are saved and code runs (like `work_dir` in AutoGen).
+        timeout: Seconds a code block may run before it is interrupted.
+        preload: Modules the kernel imports right after it starts, e.g. ["pandas", "matplotlib.pyplot"].
+        interrupt_grace: Seconds to wait for an interrupted block to stop before the kernel is restarted.
+        python: Interpreter for the kernel (defaults to the current one).
+        env: Extra environment variables for the kernel.
+    """
+
+    def __init__(
+        self,
+        work_dir: str | Path = "codes",
+        timeout: float = 60,
+        preload: list[str] | tuple[str, ...] = (),
+        interrupt_grace: float = 2.0,
+        python: str | None = None,
+        env: dict[str, str] | None = None,
+    ):
+        self._work_dir = Path(work_dir)
+        self._work_dir.mkdir(parents=True, exist_ok=True)
+        self._timeout = timeout
+        self._preload = list(preload)
+        self._interrupt_grace = interrupt_grace
+        self._python = python or sys.executable
+        self._env = {**os.environ, **(env or {})}
+        self._shell = LocalCommandLineCodeExecutor(work_dir=self._work_dir, timeout=int(timeout))  # For non-Python blocks
+        self._lock = threading.Lock()  # One block at a time per kernel
+        self._process: subprocess.Popen | None = None
+        self._answers: queue.Queue = queue.Queue()
+        self.stats = {"executions": 0, "starts": 0, "interrupts": 0, "restarts": 0}
+        self._start()  # Start now, so the preloads run while the LLM writes the first block
+
+    # ---- CodeExecutor protocol ---------------------------------------------------
+
+    @property
+    def code_extractor(self) -> CodeExtractor:
+        return MarkdownCodeExtractor()
+
+    @property
+    def work_dir(self) -> Path:
+        return self._work_dir
+
+    @property
+    def timeout(self) -> float:
+        return self._timeout
+
+    def execute_code_blocks(self, code_blocks: list[CodeBlock]) -> CommandLineCodeResult:
+        """Run the blocks in order; Python blocks share the kernel's state. Stops at the first failure."""
+        output, exit_code, code_file = "", 0, None
+        for block in code_blocks:
+            if block.language.lower() not in [v.lower() for v in PYTHON_VARIANTS]:
+                result = self._shell.execute_code_blocks([block])
+                output += result.output
+                exit_code, code_file = result.exit_code, code_file or result.code_file
+            else:
+                try:
+                    path = self._save(block.code)
+                except ValueError:
+                    return CommandLineCodeResult(exit_code=1, output="Filename is not in the workspace")
+                code_file = code_file or str(path)
+                exit_code, block_output = self._run(block.code, path)
+                output += block_output
+            if exit_code != 0:
+                break
+        return CommandLineCodeResult(exit_code=exit_code, output=output, code_file=code_file)
+
+    def restart(self) -> None:
+        """Start a fresh kernel (all variables and imports are dropped)."""
+        with self._lock:
+            self._stop_process()
+            self.stats["restarts"] += 1
+            self._start()
+
+    # ---- lifecycle -----------------------------------------------------------------
+
+    def stop(self) -> None:
+        """Shut the kernel down; the next code block starts a new one."""
+        with self._lock:
+            self._stop_process()
+
+    def __enter__(self) -> "WarmKernelCodeExecutor":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _start(self) -> None:
+        self._process = subprocess.Popen(
+            [self._python, "-u", "-c", KERNEL_SOURCE, json.dumps(self._preload)],
+            cwd=self._work_dir,
+            env=self._env,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+        )
+        self._answers = queue.Queue()
+        threading.Thread(target=self._read_answers, args=(self._process, self._answers), daemon=True).start()
+        self.stats["starts"] += 1
+
+    @staticmethod
+    def _read_answers(process: subprocess.Popen, answers: queue.Queue) -> None:
+        for line in process.stdout:
+            answers.put(json.loads(line))
+        answers.put(None)  # The kernel exited
+
+    def _stop_process(self) -> None:
+        if self._process is not None and self._process.poll() is None:
+            self._process.kill()
+            self._process.wait()
+        self._process = None
+
+    # ---- execution -----------------------------------------------------------------
+
+    def _save(self, code: str) -> Path:
+        # Same file names as AutoGen's local executor ("# filename: x.py" or tmp_code_<md5>.py)
+        filename = _get_file_name_from_content(code, self._work_dir) or f"tmp_code_{md5(code.encode()).hexdigest()}.py"
+        path = (self._work_dir / filename).resolve()
+        path.write_text(code, encoding="utf-8")
+        return path
+
+    def _run(self, code: str, path: Path) -> tuple[int, str]:
+        with self._lock:
+            if self._process is None or self._process.poll() is not None:
+                self._start()  # First use after stop(), or the code killed the kernel
+            self.stats["executions"] += 1
+            self._process.stdin.write(json.dumps({"code": code, "filename": str(path)}) + "\n")
+            self._process.stdin.flush()
+            try:
+                answer = self._answers.get(timeout=self._timeout)
+            except queue.Empty:
+                return self._interrupt()
+            if answer is None:
+                self._stop_process()
+                return 1, "The Python kernel exited unexpectedly; it will be restarted for the next block.\n"
+            if answer["exit_code"] == 124:
+                answer["output"] += "\n" + TIMEOUT_MSG
+            return answer["exit_code"], answer["output"]
+
+    def _interrupt(self) -> tuple[int, str]:
+        # Ask the block to stop (KeyboardInterrupt keeps the kernel and its variables) ...
+        self.stats["interrupts"] += 1
+        if os.name == "posix":
+            self._process.send_signal(signal.SIGINT)
+            try:
+                answer = self._answers.get(timeout=self._interrupt_grace)
+                if answer is not None:
+                    return 124, answer["output"] + "\n" + TIMEOUT_MSG
+            except queue.Empty:
+                pass
+        # ... and if it does not, start over with a fresh kernel
+        self._stop_process()
+        self.stats["restarts"] += 1
+        self._start()
+        return 124, f"{TIMEOUT_MSG}\nThe Python kernel was restarted; variables from earlier blocks are gone.\n"